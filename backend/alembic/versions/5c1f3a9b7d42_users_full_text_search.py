@@ -0,0 +1,86 @@
+"""Users full text search
+
+Revision ID: 5c1f3a9b7d42
+Revises: e9da0ed9e00b
+Create Date: 2026-10-18 11:02:54.118630
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = "5c1f3a9b7d42"
+down_revision: Union[str, None] = "e9da0ed9e00b"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# must stay in sync with helpers.crud.TEXT_SEARCH_CONFIG; {row} qualifies the
+# columns, the trigger reads them from NEW
+SEARCH_VECTOR = """
+    setweight(to_tsvector('russian', coalesce({row}about_me, '')), 'A')
+    || setweight(to_tsvector('russian', coalesce({row}full_status, '') || ' ' || coalesce({row}short_status, '')), 'B')
+    || setweight(to_tsvector('russian', coalesce({row}university, '') || ' ' || coalesce({row}course, '')), 'C')
+"""
+
+# rows updated per transaction while backfilling existing users
+BACKFILL_BATCH = 5_000
+
+
+def upgrade() -> None:
+    # a generated column would rewrite the whole table under an exclusive
+    # lock; a plain nullable column is only a catalog change, and a trigger
+    # keeps it current while the existing rows are backfilled in batches
+    op.add_column(
+        "users",
+        sa.Column("search_vector", postgresql.TSVECTOR(), nullable=True),
+    )
+    op.execute(f"""
+        CREATE FUNCTION users_search_vector() RETURNS trigger AS $$
+        BEGIN
+            NEW.search_vector := {SEARCH_VECTOR.format(row="NEW.")};
+            RETURN NEW;
+        END
+        $$ LANGUAGE plpgsql
+        """)
+    op.execute("""
+        CREATE TRIGGER users_search_vector
+        BEFORE INSERT OR UPDATE OF about_me, full_status, short_status, university, course
+        ON users FOR EACH ROW EXECUTE FUNCTION users_search_vector()
+        """)
+    with op.get_context().autocommit_block():
+        connection = op.get_bind()
+        first, last = connection.execute(
+            sa.text("SELECT min(id), max(id) FROM users")
+        ).one()
+        # each batch commits on its own, so row locks are held only briefly
+        for start in range(first or 0, (last or -1) + 1, BACKFILL_BATCH):
+            connection.execute(
+                sa.text(
+                    f"UPDATE users SET search_vector = {SEARCH_VECTOR.format(row='')} "
+                    "WHERE id >= :start AND id < :end AND search_vector IS NULL"
+                ),
+                {"start": start, "end": start + BACKFILL_BATCH},
+            )
+        op.create_index(
+            "ix_users_search_vector",
+            "users",
+            ["search_vector"],
+            postgresql_using="gin",
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            "ix_users_search_vector",
+            table_name="users",
+            postgresql_concurrently=True,
+        )
+    op.execute("DROP TRIGGER users_search_vector ON users")
+    op.execute("DROP FUNCTION users_search_vector()")
+    op.drop_column("users", "search_vector")
@@ -0,0 +1,88 @@
+"""Users unique email and phone
+
+Revision ID: a5d2c7e9f146
+Revises: f2c6d8e4b913
+Create Date: 2026-10-18 16:02:41.318507
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "a5d2c7e9f146"
+down_revision: Union[str, None] = "f2c6d8e4b913"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# shown in the error, enough to start resolving them
+DUPLICATES_SHOWN = 20
+
+
+def find_duplicates(connection, column: str) -> list[str]:
+    """
+    Returns the values of a login column held by more than one user.
+    """
+    result = connection.execute(
+        sa.text(
+            f"SELECT {column} FROM users WHERE {column} IS NOT NULL AND {column} <> '' "
+            f"GROUP BY {column} HAVING count(*) > 1 ORDER BY {column} LIMIT :limit"
+        ),
+        {"limit": DUPLICATES_SHOWN},
+    )
+    return result.scalars().all()
+
+
+def drop_invalid_index(name: str) -> None:
+    # left by a build that failed, e.g. on a duplicate registered meanwhile
+    invalid = (
+        op.get_bind()
+        .execute(
+            sa.text(
+                "SELECT 1 FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid "
+                "WHERE c.relname = :name AND NOT i.indisvalid"
+            ),
+            {"name": name},
+        )
+        .first()
+    )
+    if invalid is not None:
+        op.drop_index(name, table_name="users", postgresql_concurrently=True)
+
+
+def upgrade() -> None:
+    # registration relies on these to reject taken logins, so duplicates that
+    # slipped through the old check-then-insert must be resolved beforehand
+    for column in ("email", "phone"):
+        duplicates = find_duplicates(op.get_bind(), column)
+        if duplicates:
+            raise RuntimeError(
+                f"users share these {column} values, resolve them before "
+                f"upgrading: {', '.join(duplicates)}"
+            )
+
+    with op.get_context().autocommit_block():
+        for column in ("email", "phone"):
+            drop_invalid_index(f"ix_users_{column}")
+            op.create_index(
+                f"ix_users_{column}",
+                "users",
+                [column],
+                unique=True,
+                postgresql_where=sa.text(f"{column} IS NOT NULL AND {column} <> ''"),
+                postgresql_concurrently=True,
+                if_not_exists=True,
+            )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for column in ("email", "phone"):
+            op.drop_index(
+                f"ix_users_{column}",
+                table_name="users",
+                postgresql_concurrently=True,
+            )
@@ -0,0 +1,38 @@
+"""Subscription followers index
+
+Revision ID: b7e2c4d18f30
+Revises: 5c1f3a9b7d42
+Create Date: 2026-10-18 11:47:09.530214
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "b7e2c4d18f30"
+down_revision: Union[str, None] = "5c1f3a9b7d42"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # the primary key (user_id_from, user_id_to) already serves subscriptions;
+    # followers need the reverse order
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_subscription_user_id_to_user_id_from",
+            "subscription",
+            ["user_id_to", "user_id_from"],
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            "ix_subscription_user_id_to_user_id_from",
+            table_name="subscription",
+            postgresql_concurrently=True,
+        )
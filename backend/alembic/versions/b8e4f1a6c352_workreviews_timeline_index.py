@@ -0,0 +1,37 @@
+"""Workreviews timeline index
+
+Revision ID: b8e4f1a6c352
+Revises: a5d2c7e9f146
+Create Date: 2026-10-18 16:40:13.052871
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "b8e4f1a6c352"
+down_revision: Union[str, None] = "a5d2c7e9f146"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # a user's work reviews by start date, with id breaking ties for paging
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_workreviews_user_id_date_start_id",
+            "workreviews",
+            ["user_id", "date_start", "id"],
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            "ix_workreviews_user_id_date_start_id",
+            table_name="workreviews",
+            postgresql_concurrently=True,
+        )
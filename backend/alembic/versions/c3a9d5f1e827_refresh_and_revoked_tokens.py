@@ -0,0 +1,55 @@
+"""Refresh and revoked tokens
+
+Revision ID: c3a9d5f1e827
+Revises: b8e4f1a6c352
+Create Date: 2026-10-18 17:21:45.338190
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+# revision identifiers, used by Alembic.
+revision: str = "c3a9d5f1e827"
+down_revision: Union[str, None] = "b8e4f1a6c352"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "refreshtoken",
+        sa.Column("token_hash", sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+        sa.Column("family", sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("expires_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("used_at", sa.DateTime(timezone=True), nullable=True),
+        sa.ForeignKeyConstraint(
+            ["user_id"],
+            ["users.id"],
+        ),
+        sa.PrimaryKeyConstraint("token_hash"),
+    )
+    op.create_index("ix_refreshtoken_family", "refreshtoken", ["family"])
+    op.create_index("ix_refreshtoken_expires_at", "refreshtoken", ["expires_at"])
+    op.create_table(
+        "revokedtoken",
+        sa.Column("jti", sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+        sa.Column("expires_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("revoked_at", sa.DateTime(timezone=True), nullable=False),
+        sa.PrimaryKeyConstraint("jti"),
+    )
+    op.create_index("ix_revokedtoken_expires_at", "revokedtoken", ["expires_at"])
+    op.create_index("ix_revokedtoken_revoked_at", "revokedtoken", ["revoked_at"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_revokedtoken_revoked_at", table_name="revokedtoken")
+    op.drop_index("ix_revokedtoken_expires_at", table_name="revokedtoken")
+    op.drop_table("revokedtoken")
+    op.drop_index("ix_refreshtoken_expires_at", table_name="refreshtoken")
+    op.drop_index("ix_refreshtoken_family", table_name="refreshtoken")
+    op.drop_table("refreshtoken")
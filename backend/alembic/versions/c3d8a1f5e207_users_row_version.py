@@ -0,0 +1,57 @@
+"""Users row version
+
+Revision ID: c3d8a1f5e207
+Revises: b7e2c4d18f30
+Create Date: 2026-10-18 13:20:41.082317
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "c3d8a1f5e207"
+down_revision: Union[str, None] = "b7e2c4d18f30"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # constant defaults, so existing rows are not rewritten
+    op.add_column(
+        "users",
+        sa.Column("version", sa.Integer(), server_default="1", nullable=False),
+    )
+    op.add_column(
+        "users",
+        sa.Column(
+            "updated_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.func.now(),
+            nullable=False,
+        ),
+    )
+    # the ORM bumps both columns itself; the trigger also covers writes that
+    # bypass it (bulk imports, manual fixes), so ETags never go stale
+    op.execute("""
+        CREATE FUNCTION users_bump_version() RETURNS trigger AS $$
+        BEGIN
+            NEW.version := OLD.version + 1;
+            NEW.updated_at := now();
+            RETURN NEW;
+        END
+        $$ LANGUAGE plpgsql
+        """)
+    op.execute("""
+        CREATE TRIGGER users_bump_version BEFORE UPDATE ON users
+        FOR EACH ROW EXECUTE FUNCTION users_bump_version()
+        """)
+
+
+def downgrade() -> None:
+    op.execute("DROP TRIGGER users_bump_version ON users")
+    op.execute("DROP FUNCTION users_bump_version()")
+    op.drop_column("users", "updated_at")
+    op.drop_column("users", "version")
@@ -0,0 +1,49 @@
+"""Recommendation table
+
+Revision ID: d4a9e2b7c610
+Revises: c3d8a1f5e207
+Create Date: 2026-10-18 14:05:12.640981
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "d4a9e2b7c610"
+down_revision: Union[str, None] = "c3d8a1f5e207"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # filled by `python -m tools.rebuild_recommendations` after upgrading
+    op.create_table(
+        "recommendation",
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("candidate_id", sa.Integer(), nullable=False),
+        sa.Column("mutuals", sa.Integer(), nullable=False),
+        sa.Column("shared_tags", sa.Integer(), nullable=False),
+        sa.Column("score", sa.Float(), nullable=False),
+        sa.ForeignKeyConstraint(
+            ["user_id"],
+            ["users.id"],
+        ),
+        sa.ForeignKeyConstraint(
+            ["candidate_id"],
+            ["users.id"],
+        ),
+        sa.PrimaryKeyConstraint("user_id", "candidate_id"),
+    )
+    op.create_index(
+        "ix_recommendation_user_id_score",
+        "recommendation",
+        ["user_id", "score", "candidate_id"],
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_recommendation_user_id_score", table_name="recommendation")
+    op.drop_table("recommendation")
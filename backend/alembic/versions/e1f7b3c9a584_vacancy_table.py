@@ -0,0 +1,69 @@
+"""Vacancy table
+
+Revision ID: e1f7b3c9a584
+Revises: d4a9e2b7c610
+Create Date: 2026-10-18 14:48:30.517204
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = "e1f7b3c9a584"
+down_revision: Union[str, None] = "d4a9e2b7c610"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# must stay in sync with helpers.crud.TEXT_SEARCH_CONFIG
+SEARCH_VECTOR = """
+    setweight(to_tsvector('russian', coalesce(title, '')), 'A')
+    || setweight(to_tsvector('russian', coalesce(description, '')), 'B')
+"""
+
+
+def upgrade() -> None:
+    op.create_table(
+        "vacancy",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("title", sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+        sa.Column("description", sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+        sa.Column("price", sa.Float(), nullable=False),
+        sa.Column("conditions", sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+        sa.Column("vacancy_holder_id", sa.Integer(), nullable=False),
+        sa.Column("related_project", sqlmodel.sql.sqltypes.AutoString(), nullable=True),
+        sa.Column(
+            "search_vector",
+            postgresql.TSVECTOR(),
+            sa.Computed(SEARCH_VECTOR, persisted=True),
+            nullable=True,
+        ),
+        sa.ForeignKeyConstraint(
+            ["vacancy_holder_id"],
+            ["users.id"],
+        ),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    # keyset pagination: (price, id) for the price orders and price ranges,
+    # (vacancy_holder_id, id) for one holder's vacancies
+    op.create_index("ix_vacancy_price_id", "vacancy", ["price", "id"])
+    op.create_index(
+        "ix_vacancy_vacancy_holder_id_id", "vacancy", ["vacancy_holder_id", "id"]
+    )
+    op.create_index(
+        "ix_vacancy_search_vector",
+        "vacancy",
+        ["search_vector"],
+        postgresql_using="gin",
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_vacancy_search_vector", table_name="vacancy")
+    op.drop_index("ix_vacancy_vacancy_holder_id_id", table_name="vacancy")
+    op.drop_index("ix_vacancy_price_id", table_name="vacancy")
+    op.drop_table("vacancy")
@@ -0,0 +1,95 @@
+"""Tag search indexes
+
+Revision ID: e9da0ed9e00b
+Revises: 1a44728d2e14
+Create Date: 2026-10-18 10:12:31.402117
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "e9da0ed9e00b"
+down_revision: Union[str, None] = "1a44728d2e14"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# tags sharing a name with one of a lower id, paired with the id they merge into
+DUPLICATE_TAGS = """
+    SELECT t.id, k.keep FROM tags t
+    JOIN (SELECT name, min(id) AS keep FROM tags GROUP BY name) k ON k.name = t.name
+    WHERE t.id <> k.keep
+"""
+
+MERGE_DUPLICATE_TAGS = (
+    f"""
+    INSERT INTO tagsusers (user_id, tag_id)
+    SELECT DISTINCT tu.user_id, d.keep FROM tagsusers tu
+    JOIN ({DUPLICATE_TAGS}) d ON d.id = tu.tag_id
+    WHERE true
+    ON CONFLICT DO NOTHING
+    """,
+    f"DELETE FROM tagsusers WHERE tag_id IN (SELECT id FROM ({DUPLICATE_TAGS}) d)",
+    f"DELETE FROM tags WHERE id IN (SELECT id FROM ({DUPLICATE_TAGS}) d)",
+)
+
+
+def drop_invalid_index(name: str, table: str) -> None:
+    """
+    Drops what a failed concurrent build of the index left behind.
+    """
+    invalid = (
+        op.get_bind()
+        .execute(
+            sa.text(
+                "SELECT 1 FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid "
+                "WHERE c.relname = :name AND NOT i.indisvalid"
+            ),
+            {"name": name},
+        )
+        .first()
+    )
+    if invalid is not None:
+        op.drop_index(name, table_name=table, postgresql_concurrently=True)
+
+
+def upgrade() -> None:
+    # the old check-then-insert could create a tag twice; users of the copies
+    # are moved to the oldest one, or the unique index below cannot be built
+    for statement in MERGE_DUPLICATE_TAGS:
+        op.execute(statement)
+
+    # built concurrently so that large tables stay writable during the upgrade;
+    # an earlier attempt that failed half-way can simply be run again
+    with op.get_context().autocommit_block():
+        drop_invalid_index("ix_tags_name", "tags")
+        op.create_index(
+            "ix_tags_name",
+            "tags",
+            ["name"],
+            unique=True,
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+        drop_invalid_index("ix_tagsusers_tag_id_user_id", "tagsusers")
+        op.create_index(
+            "ix_tagsusers_tag_id_user_id",
+            "tagsusers",
+            ["tag_id", "user_id"],
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            "ix_tagsusers_tag_id_user_id",
+            table_name="tagsusers",
+            postgresql_concurrently=True,
+        )
+        op.drop_index("ix_tags_name", table_name="tags", postgresql_concurrently=True)
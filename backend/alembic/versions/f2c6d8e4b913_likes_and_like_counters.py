@@ -0,0 +1,50 @@
+"""Likes and like counters
+
+Revision ID: f2c6d8e4b913
+Revises: e1f7b3c9a584
+Create Date: 2026-10-18 15:32:06.904115
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "f2c6d8e4b913"
+down_revision: Union[str, None] = "e1f7b3c9a584"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "likes",
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("liked_user_id", sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(
+            ["user_id"],
+            ["users.id"],
+        ),
+        sa.ForeignKeyConstraint(
+            ["liked_user_id"],
+            ["users.id"],
+        ),
+        sa.PrimaryKeyConstraint("user_id", "liked_user_id"),
+    )
+    op.create_table(
+        "likecounter",
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("likes", sa.Integer(), server_default="0", nullable=False),
+        sa.ForeignKeyConstraint(
+            ["user_id"],
+            ["users.id"],
+        ),
+        sa.PrimaryKeyConstraint("user_id"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("likecounter")
+    op.drop_table("likes")
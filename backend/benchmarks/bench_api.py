@@ -0,0 +1,304 @@
+"""
+Latency/throughput benchmark for the user API.
+
+The database is seeded at a configurable scale. Then each scenario is driven
+in-process through an ASGI transport, with a fixed number of concurrent
+clients. Every scenario reports p50/p95/p99 latency, requests per second and
+SQL statements per request. Results are written as JSON so runs on different
+commits can be compared with --compare.
+
+By default a throwaway SQLite file is used. Point --database-url at a scratch
+PostgreSQL database to benchmark the real driver stack. Its tables are dropped
+and recreated.
+
+Usage (from the backend directory):
+    python -m benchmarks.bench_api --users 10000 --requests 2000 --concurrency 32
+    python -m benchmarks.bench_api --compare benchmarks/results/<older run>.json
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import asyncio
+import argparse
+import platform
+import tempfile
+import subprocess
+from datetime import datetime, timezone
+
+SCENARIOS = ("register", "token", "me", "get_user", "search_tags")
+
+
+def configure_environment(database_url: str) -> None:
+    """
+    Sets the environment the app reads at import time; must run before importing it.
+
+    Exits if ``database`` ends up on another database anyway: it loads a
+    ``.env`` file over the environment, and ``seed`` drops every table.
+    """
+    from sqlalchemy import make_url
+
+    os.environ["DATABASE_URL"] = database_url
+    os.environ.setdefault("SECRET_KEY", "benchmark-secret-key-of-sufficient-length")
+    os.environ.setdefault("HASH_ALGORITHM", "HS256")
+    os.environ.setdefault("ACCESS_TOKEN_EXPIRE_MINUTES", "60")
+
+    import database
+
+    if database.database_url != make_url(database_url):
+        sys.exit(f"DATABASE_URL is overridden by a .env file: {database.database_url}")
+
+
+def percentile(sorted_values: list[float], fraction: float) -> float:
+    index = min(len(sorted_values) - 1, round(fraction * (len(sorted_values) - 1)))
+    return sorted_values[index]
+
+
+def seed(engine, users: int, tags: int, tags_per_user: int, password_hash: str):
+    """
+    Creates the schema and fills it with deterministic data.
+    """
+    from sqlalchemy import insert
+    from sqlmodel import SQLModel
+    from models.users import Tags, TagsUsers, Users
+
+    rng = random.Random(42)
+    SQLModel.metadata.drop_all(engine)
+    SQLModel.metadata.create_all(engine)
+    with engine.begin() as connection:
+        connection.execute(insert(Tags), [{"name": f"tag{i}"} for i in range(tags)])
+        for start in range(0, users, 5_000):
+            batch = range(start, min(users, start + 5_000))
+            connection.execute(
+                insert(Users),
+                [
+                    {
+                        "name": f"name{i}",
+                        "surname": f"surname{i}",
+                        "email": f"user{i}@bench.local",
+                        "phone": f"+7{i:010d}",
+                        "about_me": f"benchmark user {i}",
+                        "hashed_password": password_hash,
+                    }
+                    for i in batch
+                ],
+            )
+            connection.execute(
+                insert(TagsUsers),
+                [
+                    {"user_id": i + 1, "tag_id": tag_id + 1}
+                    for i in batch
+                    for tag_id in rng.sample(range(tags), tags_per_user)
+                ],
+            )
+
+
+class QueryCounter:
+    """
+    Counts SQL statements issued on the given engines.
+    """
+
+    def __init__(self, *engines):
+        from sqlalchemy import event
+
+        self.count = 0
+        for engine in engines:
+            event.listen(engine, "before_cursor_execute", self._on_execute)
+
+    def _on_execute(self, *args) -> None:
+        self.count += 1
+
+
+async def run_scenario(client, name, requests, concurrency, users, tags, counter):
+    rng = random.Random(name)
+    login = {"email": "user0@bench.local", "phone": None, "password": "benchmark"}
+    token = (await client.post("/user/token", json=login)).json()["access_token"]
+    auth = {"Authorization": f"Bearer {token}"}
+    sequence = iter(range(requests))
+
+    def build(i: int):
+        if name == "register":
+            body = {
+                "name": "new",
+                "surname": "user",
+                "email": f"new{i}-{time.time_ns()}@bench.local",
+                "phone": "",
+                "password": "benchmark",
+            }
+            return "POST", "/user/register", {"json": body}
+        if name == "token":
+            return "POST", "/user/token", {"json": login}
+        if name == "me":
+            return "GET", "/user/me", {"headers": auth}
+        if name == "get_user":
+            return "GET", f"/user/{rng.randint(1, users)}", {}
+        picked = ",".join(f"tag{t}" for t in rng.sample(range(tags), 2))
+        return "GET", f"/user/search/{picked}", {}
+
+    latencies: list[float] = []
+    errors = 0
+
+    async def worker():
+        nonlocal errors
+        for i in sequence:
+            method, url, kwargs = build(i)
+            started = time.perf_counter()
+            response = await client.request(method, url, **kwargs)
+            latencies.append(time.perf_counter() - started)
+            if response.status_code >= 400:
+                errors += 1
+
+    queries_before = counter.count
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "rps": round(len(latencies) / elapsed, 1),
+        "p50_ms": round(percentile(latencies, 0.50) * 1000, 3),
+        "p95_ms": round(percentile(latencies, 0.95) * 1000, 3),
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 3),
+        "queries_per_request": round(
+            (counter.count - queries_before) / len(latencies), 2
+        ),
+    }
+
+
+async def run_benchmarks(args) -> dict:
+    import httpx
+
+    import database
+    from main import app
+    from helpers.hashing import get_password_hash_sync, hashing_pool
+
+    seed(
+        database.engine,
+        args.users,
+        args.tags,
+        args.tags_per_user,
+        get_password_hash_sync("benchmark"),
+    )
+    counter = QueryCounter(database.engine, database.async_engine.sync_engine)
+
+    results = {}
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(
+        transport=transport, base_url="http://bench"
+    ) as client:
+        for name in args.scenarios:
+            # bcrypt-bound scenarios are far slower; keep their run time comparable
+            requests = (
+                args.requests // 10 if name in ("register", "token") else args.requests
+            )
+            # warm-up: fill caches and the connection pool before measuring
+            await run_scenario(
+                client,
+                name,
+                min(50, requests),
+                args.concurrency,
+                args.users,
+                args.tags,
+                counter,
+            )
+            results[name] = await run_scenario(
+                client, name, requests, args.concurrency, args.users, args.tags, counter
+            )
+            print(f"{name:>12}: {results[name]}", file=sys.stderr)
+    hashing_pool.shutdown()
+
+    return {
+        "meta": {
+            "commit": git_commit(),
+            "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "database": database.engine.dialect.name,
+            "db_async": database.DB_ASYNC,
+            "python": platform.python_version(),
+            "users": args.users,
+            "tags": args.tags,
+            "concurrency": args.concurrency,
+        },
+        "scenarios": results,
+    }
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"],
+            text=True,
+            stderr=subprocess.DEVNULL,
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def compare(baseline: dict, current: dict, threshold: float) -> bool:
+    """
+    Prints per-scenario changes against a baseline run.
+
+    Returns:
+        bool: True if any scenario's p95 latency or throughput regressed by more
+        than ``threshold`` (a fraction).
+    """
+    regressed = False
+    print(f"{'scenario':>12} {'p95 ms':>20} {'rps':>20} {'queries/req':>14}")
+    for name, now in current["scenarios"].items():
+        before = baseline["scenarios"].get(name)
+        if before is None:
+            continue
+        p95 = now["p95_ms"] / before["p95_ms"] - 1
+        rps = now["rps"] / before["rps"] - 1
+        worse = p95 > threshold or rps < -threshold
+        regressed |= worse
+        print(
+            f"{name:>12} {before['p95_ms']:>8} -> {now['p95_ms']:<8} ({p95:+.0%})"
+            f" {before['rps']:>7} -> {now['rps']:<7} ({rps:+.0%})"
+            f" {before['queries_per_request']:>5} -> {now['queries_per_request']:<5}"
+            f"{'  REGRESSION' if worse else ''}"
+        )
+    return regressed
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument(
+        "--database-url", help="scratch database (default: temp SQLite)"
+    )
+    parser.add_argument("--users", type=int, default=1_000)
+    parser.add_argument("--tags", type=int, default=50)
+    parser.add_argument("--tags-per-user", type=int, default=3)
+    parser.add_argument("--requests", type=int, default=1_000)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--scenarios", nargs="+", choices=SCENARIOS, default=SCENARIOS)
+    parser.add_argument("--output", help="result file (default: benchmarks/results/)")
+    parser.add_argument("--compare", help="previous result file to diff against")
+    parser.add_argument("--threshold", type=float, default=0.10)
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        configure_environment(args.database_url or f"sqlite:///{tmp}/bench.db")
+        result = asyncio.run(run_benchmarks(args))
+
+    output = args.output or os.path.join(
+        os.path.dirname(__file__),
+        "results",
+        f"{result['meta']['timestamp'].replace(':', '')}-{result['meta']['commit']}.json",
+    )
+    os.makedirs(os.path.dirname(output), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(result, f, indent=2)
+    print(f"results written to {output}", file=sys.stderr)
+
+    if args.compare:
+        with open(args.compare) as f:
+            if compare(json.load(f), result, args.threshold):
+                sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
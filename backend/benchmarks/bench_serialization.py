@@ -0,0 +1,131 @@
+"""
+Micro-benchmark of the ways a list of users can be loaded and encoded.
+
+A list of ``--users`` users is loaded and turned into the JSON body of a
+``list[ResponseUser]`` response, without any HTTP in between. Each path
+reports the median time of the load and of the encoding:
+    orm+stdlib: entities, validated by the response model, encoded by
+        ``json.dumps`` (FastAPI before it serialized with pydantic-core)
+    orm+dump_json: entities, validated and encoded by pydantic-core
+        (FastAPI's current default)
+    orm+orjson: entities, validated by the response model, encoded by orjson
+        (``ORJSON_RESPONSES``)
+    columns+adapter: column tuples, validated and encoded by a prebuilt
+        ``TypeAdapter`` (``FAST_JSON``)
+
+Usage (from the backend directory):
+    python -m benchmarks.bench_serialization --users 1000 --rounds 200
+"""
+
+import json
+import time
+import argparse
+import tempfile
+import statistics
+
+import orjson
+
+from benchmarks.bench_api import configure_environment, seed
+
+
+def measure(rounds: int, load, encode) -> tuple[float, float, int]:
+    """
+    Times ``load`` and ``encode(load())`` ``rounds`` times each.
+
+    Returns:
+        tuple[float, float, int]: Median load and encode time in milliseconds,
+        and the size of the body in bytes.
+    """
+    load_times, encode_times = [], []
+    for _ in range(rounds):
+        started = time.perf_counter()
+        rows = load()
+        loaded = time.perf_counter()
+        body = encode(rows)
+        load_times.append(loaded - started)
+        encode_times.append(time.perf_counter() - loaded)
+    return (
+        statistics.median(load_times) * 1000,
+        statistics.median(encode_times) * 1000,
+        len(body),
+    )
+
+
+def run(args) -> None:
+    from pydantic import TypeAdapter
+    from sqlalchemy import select
+    from sqlmodel import Session
+
+    import database
+    from models.users import Users
+    from shemas.user import ResponseUser
+    from helpers.crud import RESPONSE_USER_COLUMNS
+    from helpers.serialization import as_dicts
+
+    seed(database.engine, args.users, tags=1, tags_per_user=1, password_hash="x")
+    adapter = TypeAdapter(list[ResponseUser])
+
+    def validate(users):
+        return adapter.dump_python(
+            adapter.validate_python(users, from_attributes=True), mode="json"
+        )
+
+    with Session(database.engine) as session:
+
+        def load_entities():
+            # a fresh identity map each time, as in a request
+            session.expunge_all()
+            return session.scalars(select(Users).limit(args.users)).all()
+
+        def load_columns():
+            statement = select(*RESPONSE_USER_COLUMNS).limit(args.users)
+            return session.execute(statement).all()
+
+        paths = {
+            "orm+stdlib": (
+                load_entities,
+                lambda users: json.dumps(validate(users)).encode(),
+            ),
+            "orm+dump_json": (
+                load_entities,
+                lambda users: adapter.dump_json(
+                    adapter.validate_python(users, from_attributes=True)
+                ),
+            ),
+            "orm+orjson": (
+                load_entities,
+                lambda users: orjson.dumps(validate(users)),
+            ),
+            "columns+adapter": (
+                load_columns,
+                lambda rows: adapter.dump_json(adapter.validate_python(as_dicts(rows))),
+            ),
+        }
+
+        print(
+            f"{'path':>16} {'load ms':>9} {'encode ms':>10} {'total ms':>9} {'bytes':>9}"
+        )
+        for name, (load, encode) in paths.items():
+            load_ms, encode_ms, size = measure(args.rounds, load, encode)
+            print(
+                f"{name:>16} {load_ms:>9.2f} {encode_ms:>10.2f}"
+                f" {load_ms + encode_ms:>9.2f} {size:>9}"
+            )
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument(
+        "--database-url", help="scratch database (default: temp SQLite)"
+    )
+    parser.add_argument("--users", type=int, default=1_000)
+    parser.add_argument("--rounds", type=int, default=100)
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        configure_environment(args.database_url or f"sqlite:///{tmp}/bench.db")
+        run(args)
+
+
+if __name__ == "__main__":
+    main()
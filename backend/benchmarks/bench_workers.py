@@ -0,0 +1,196 @@
+"""
+Throughput of the app served by serve.py with a growing number of workers.
+
+The database is seeded once. Then for each worker count the app is started
+with ``serve.py`` as a real multi-process server on a local port, and is
+loaded over HTTP for ``--duration`` seconds by ``--clients`` load generator
+processes. Requests per second and latency are reported per worker count,
+with the speedup over a single worker.
+
+The load generators run on the same machine and take cores away from the
+workers. Leave cores free for them (largest ``--workers`` below the CPU count)
+or the curve flattens early.
+
+By default a throwaway SQLite file is used. Point --database-url at a scratch
+PostgreSQL database to benchmark the real driver stack. Its tables are dropped
+and recreated.
+
+Usage (from the backend directory):
+    python -m benchmarks.bench_workers --workers 1 2 4 8 --scenario get_user
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import asyncio
+import argparse
+import tempfile
+import subprocess
+from datetime import timedelta
+from multiprocessing import Pool
+
+from benchmarks.bench_api import configure_environment, percentile, seed
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SCENARIOS = ("ping", "me", "get_user")
+
+
+def default_worker_counts() -> list[int]:
+    cores = os.cpu_count() or 1
+    counts, workers = [], 1
+    while workers < cores:
+        counts.append(workers)
+        workers *= 2
+    return counts + [cores]
+
+
+def start_server(port: int, workers: int) -> subprocess.Popen:
+    """
+    Starts serve.py and waits until every worker answers /ready.
+    """
+    import httpx
+
+    server = subprocess.Popen(
+        [sys.executable, "serve.py", "--port", str(port), "--workers", str(workers)],
+        cwd=BACKEND_DIR,
+        env=dict(os.environ, WEB_MAX_REQUESTS="0"),
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    deadline = time.monotonic() + 120
+    # workers share the socket, so a run of successes is needed to be fairly
+    # sure that all of them, not just the first, have finished starting
+    successes = 0
+    while successes < 10 * workers:
+        if server.poll() is not None or time.monotonic() > deadline:
+            server.kill()
+            raise RuntimeError(f"server with {workers} workers did not start")
+        try:
+            ready = httpx.get(f"http://127.0.0.1:{port}/ready").status_code == 200
+        except httpx.TransportError:
+            ready = False
+        successes = successes + 1 if ready else 0
+        if not ready:
+            time.sleep(0.2)
+    return server
+
+
+async def generate_load(url, scenario, token, users, duration, concurrency, seed):
+    import httpx
+
+    rng = random.Random(seed)
+    headers = {"Authorization": f"Bearer {token}"}
+    latencies: list[float] = []
+    errors = 0
+    stop_at = time.perf_counter() + duration
+
+    def build():
+        if scenario == "ping":
+            return "/ping", {}
+        if scenario == "me":
+            return "/user/me", {"headers": headers}
+        return f"/user/{rng.randint(1, users)}", {}
+
+    async def client_task(client):
+        nonlocal errors
+        while time.perf_counter() < stop_at:
+            path, kwargs = build()
+            started = time.perf_counter()
+            try:
+                response = await client.get(path, **kwargs)
+                if response.status_code >= 400:
+                    errors += 1
+            except httpx.HTTPError:
+                errors += 1
+            latencies.append(time.perf_counter() - started)
+
+    limits = httpx.Limits(max_connections=concurrency)
+    async with httpx.AsyncClient(base_url=url, limits=limits) as client:
+        await asyncio.gather(*(client_task(client) for _ in range(concurrency)))
+    return latencies, errors
+
+
+def load_process(job: tuple) -> tuple[list[float], int]:
+    return asyncio.run(generate_load(*job))
+
+
+def run_workers(args, workers: int, token: str) -> dict:
+    server = start_server(args.port, workers)
+    try:
+        url = f"http://127.0.0.1:{args.port}"
+        per_client = max(1, args.concurrency // args.clients)
+        jobs = [
+            (url, args.scenario, token, args.users, args.duration, per_client, i)
+            for i in range(args.clients)
+        ]
+        with Pool(args.clients) as pool:
+            results = pool.map(load_process, jobs)
+    finally:
+        server.terminate()
+        server.wait()
+
+    latencies = sorted(latency for result in results for latency in result[0])
+    return {
+        "workers": workers,
+        "requests": len(latencies),
+        "errors": sum(result[1] for result in results),
+        "rps": round(len(latencies) / args.duration, 1),
+        "p50_ms": round(percentile(latencies, 0.50) * 1000, 3),
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 3),
+    }
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument(
+        "--database-url", help="scratch database (default: temp SQLite)"
+    )
+    parser.add_argument(
+        "--workers", type=int, nargs="+", default=default_worker_counts()
+    )
+    parser.add_argument("--scenario", choices=SCENARIOS, default="get_user")
+    parser.add_argument("--users", type=int, default=1_000)
+    parser.add_argument("--duration", type=float, default=10, help="seconds per run")
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--clients", type=int, default=2, help="load processes")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--output", help="also write the results as JSON")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        configure_environment(args.database_url or f"sqlite:///{tmp}/bench.db")
+        # the server is not migrated with Alembic, only created from the models
+        os.environ["DB_SCHEMA_CHECK"] = "false"
+
+        import database
+        from helpers.hashing import pwd_context
+        from routes.user import create_access_token
+
+        seed(database.engine, args.users, 50, 3, pwd_context.hash("benchmark"))
+        database.engine.dispose()
+        token = create_access_token({"user-id": 1}, timedelta(hours=1))
+
+        results = []
+        for workers in args.workers:
+            result = run_workers(args, workers, token)
+            result["speedup"] = (
+                round(result["rps"] / results[0]["rps"], 2) if results else 1.0
+            )
+            results.append(result)
+            print(
+                f"{workers:>3} workers: {result['rps']:>9} rps"
+                f"  p50 {result['p50_ms']:>8} ms  p99 {result['p99_ms']:>8} ms"
+                f"  x{result['speedup']}  ({result['errors']} errors)",
+                file=sys.stderr,
+            )
+
+    if args.output:
+        meta = {"scenario": args.scenario, "cpus": os.cpu_count(), "users": args.users}
+        with open(args.output, "w") as f:
+            json.dump({"meta": meta, "runs": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
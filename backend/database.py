@@ -1,52 +1,236 @@
 import os
+import asyncio
 import logging
 from dotenv import load_dotenv
 from typing import Annotated
 
-from fastapi import Depends
-from sqlalchemy import URL, select
+from fastapi import Depends, Request
+from alembic.runtime.migration import MigrationContext
+from alembic.script import ScriptDirectory
+from sqlalchemy import URL, func, make_url, select, text
+from sqlalchemy.ext.asyncio import create_async_engine
 from sqlmodel import create_engine, Session, SQLModel
+from sqlmodel.ext.asyncio.session import AsyncSession
 
 from models.users import Users
-
-from passlib.context import CryptContext
-
+from helpers.hashing import get_password_hash_sync
+from helpers.instrumentation import instrument_engine
+from helpers.pool import TimedAsyncQueuePool, TimedQueuePool, instrument_pool
 
 load_dotenv(override=True)
 
 logger = logging.getLogger("db")
 logger.setLevel("DEBUG")
 
-database_url = URL.create(
-    "postgresql",
-    username=os.getenv("PG_USER"),
-    password=os.getenv("PG_PASSWORD"),
-    host="localhost",
-    port="5432",
-    database="postgres_database",
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", 5))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", 10))
+# connections all workers together may open (leave headroom below the
+# server's max_connections for migrations, tools and psql); 0 = no budget
+DB_CONNECTION_BUDGET = int(os.getenv("DB_CONNECTION_BUDGET", 0))
+WEB_CONCURRENCY = int(os.getenv("WEB_CONCURRENCY", 1))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", 5))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", 1800))
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() in ("1", "true", "yes")
+DB_STATEMENT_TIMEOUT_MS = int(os.getenv("DB_STATEMENT_TIMEOUT_MS", 0))
+DB_APPLICATION_NAME = os.getenv("DB_APPLICATION_NAME", "pautinka-backend")
+DB_SCHEMA_CHECK = os.getenv("DB_SCHEMA_CHECK", "true").lower() in ("1", "true", "yes")
+
+ALEMBIC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "alembic")
+# pg_advisory_xact_lock key serializing the startup bootstrap across workers
+BOOTSTRAP_LOCK_KEY = 0x70617574
+
+# Request handlers run on the asyncio engine by default; set DB_ASYNC=false to
+# serve them from the blocking psycopg2 engine instead (e.g. to benchmark both).
+DB_ASYNC = os.getenv("DB_ASYNC", "true").lower() in ("1", "true", "yes")
+
+# Optional read replica for ReadSessionDep. After a write, a client reads from
+# the primary for REPLICA_STICKY_SECONDS so it sees its own changes despite
+# replication lag (see helpers.replica).
+DATABASE_REPLICA_URL = os.getenv("DATABASE_REPLICA_URL")
+REPLICA_STICKY_SECONDS = int(os.getenv("REPLICA_STICKY_SECONDS", 5))
+PRIMARY_COOKIE = "db_primary"
+
+if DB_CONNECTION_BUDGET:
+    # each worker gets an equal share: one connection for the engine that
+    # doesn't serve requests, the rest as a fixed-size pool for the one that
+    # does, with no overflow that could exceed the budget under load
+    _worker_share = DB_CONNECTION_BUDGET // WEB_CONCURRENCY
+    if _worker_share < 2:
+        raise RuntimeError(
+            f"DB_CONNECTION_BUDGET={DB_CONNECTION_BUDGET} is too small for "
+            f"{WEB_CONCURRENCY} workers, each needs at least 2 connections"
+        )
+    DB_POOL_SIZE = _worker_share - 1
+    DB_MAX_OVERFLOW = 0
+
+if os.getenv("DATABASE_URL"):
+    database_url = make_url(os.getenv("DATABASE_URL"))
+else:
+    database_url = URL.create(
+        "postgresql+psycopg2",
+        username=os.getenv("PG_USER"),
+        password=os.getenv("PG_PASSWORD"),
+        host=os.getenv("PG_HOST", "localhost"),
+        port=int(os.getenv("PG_PORT", 5432)),
+        database=os.getenv("PG_DATABASE", "postgres_database"),
+    )
+
+ASYNC_DRIVERS = {"postgresql": "postgresql+asyncpg", "sqlite": "sqlite+aiosqlite"}
+async_database_url = database_url.set(
+    drivername=ASYNC_DRIVERS[database_url.get_backend_name()]
 )
-connect_args = {}
 
-engine = create_engine(database_url, connect_args=connect_args)
+if database_url.get_backend_name() == "postgresql":
+    connect_args = {"application_name": DB_APPLICATION_NAME}
+    async_connect_args = {"server_settings": {"application_name": DB_APPLICATION_NAME}}
+    if DB_STATEMENT_TIMEOUT_MS:
+        connect_args["options"] = f"-c statement_timeout={DB_STATEMENT_TIMEOUT_MS}"
+        async_connect_args["server_settings"]["statement_timeout"] = str(
+            DB_STATEMENT_TIMEOUT_MS
+        )
+else:
+    connect_args = {}
+    async_connect_args = {}
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+pool_options = dict(
+    pool_timeout=DB_POOL_TIMEOUT,
+    pool_recycle=DB_POOL_RECYCLE,
+    pool_pre_ping=DB_POOL_PRE_PING,
+)
+request_pool_size = dict(pool_size=DB_POOL_SIZE, max_overflow=DB_MAX_OVERFLOW)
+# the other engine only runs the startup bootstrap and maintenance work
+if DB_CONNECTION_BUDGET:
+    side_pool_size = dict(pool_size=1, max_overflow=0)
+else:
+    side_pool_size = request_pool_size
 
+engine = create_engine(
+    database_url,
+    connect_args=connect_args,
+    poolclass=TimedQueuePool,
+    **pool_options,
+    **(side_pool_size if DB_ASYNC else request_pool_size),
+)
+async_engine = create_async_engine(
+    async_database_url,
+    connect_args=async_connect_args,
+    poolclass=TimedAsyncQueuePool,
+    **pool_options,
+    **(request_pool_size if DB_ASYNC else side_pool_size),
+)
+instrument_pool(engine.pool, "sync")
+instrument_pool(async_engine.sync_engine.pool, "async")
+instrument_engine(engine)
+instrument_engine(async_engine.sync_engine)
 
-def get_session():
+# only reads served by requests go to the replica, so it needs a single engine
+# of the kind that serves requests; its pool isn't part of the primary's budget
+replica_engine = None
+if DATABASE_REPLICA_URL:
+    replica_url = make_url(DATABASE_REPLICA_URL)
+    if DB_ASYNC:
+        replica_engine = create_async_engine(
+            replica_url.set(drivername=ASYNC_DRIVERS[replica_url.get_backend_name()]),
+            connect_args=async_connect_args,
+            poolclass=TimedAsyncQueuePool,
+            **pool_options,
+            **request_pool_size,
+        )
+        replica_sync_engine = replica_engine.sync_engine
+    else:
+        replica_engine = create_engine(
+            replica_url,
+            connect_args=connect_args,
+            poolclass=TimedQueuePool,
+            **pool_options,
+            **request_pool_size,
+        )
+        replica_sync_engine = replica_engine
+    replica_sync_engine.pool.metrics_label = "replica"
+    instrument_pool(replica_sync_engine.pool, "replica")
+    instrument_engine(replica_sync_engine)
+
+
+async def get_session():
     """
     Provides a database session for dependency injection.
-    
+
+    Yields an ``AsyncSession`` on ``async_engine`` unless ``DB_ASYNC`` is
+    disabled, in which case a blocking ``Session`` on ``engine`` is used.
+    Use the helpers in ``helpers.crud`` to work with either of them.
+
     Yields:
-        Session: A SQLAlchemy session object.
+        AsyncSession | Session: A SQLAlchemy session object.
     """
-    with Session(engine) as session:
-        yield session
+    if DB_ASYNC:
+        async with AsyncSession(async_engine, expire_on_commit=False) as session:
+            yield session
+    else:
+        with Session(engine) as session:
+            yield session
+
+
+def get_read_engine(request: Request):
+    """
+    Picks the engine that serves the reads of a request: the read replica when
+    one is configured, unless the client wrote recently and carries the
+    ``PRIMARY_COOKIE``, else the primary engine of the request kind.
+
+    Args:
+        request (Request): The current request.
+
+    Returns:
+        AsyncEngine | Engine: The engine to read from.
+    """
+    if replica_engine is not None and PRIMARY_COOKIE not in request.cookies:
+        return replica_engine
+    return async_engine if DB_ASYNC else engine
+
+
+async def get_read_session(request: Request):
+    """
+    Provides a database session for endpoints that only read.
+
+    Like ``get_session``, but bound to ``get_read_engine(request)``.
+
+    Args:
+        request (Request): The current request.
+
+    Yields:
+        AsyncSession | Session: A SQLAlchemy session object.
+    """
+    bind = get_read_engine(request)
+    if DB_ASYNC:
+        async with AsyncSession(bind, expire_on_commit=False) as session:
+            yield session
+    else:
+        with Session(bind) as session:
+            yield session
+
+
+def _create_root_user(session: Session) -> None:
+    _root_user_name = os.getenv("ROOT_NAME")
+    _root_user_surname = os.getenv("ROOT_SURNAME")
+    _root_user_password = os.getenv("ROOT_PASSWORD")
+    root_user = session.exec(select(Users).where(Users.name == _root_user_name)).first()
+    if not root_user:
+        hashed_password = get_password_hash_sync(_root_user_password)
+        new_user = Users(
+            name=_root_user_name,
+            surname=_root_user_surname,
+            email=None,
+            phone=None,
+            hashed_password=hashed_password,
+        )
+        session.add(new_user)
+        session.commit()
+        logger.info("Default root user created")
 
 
 def create_db_and_tables() -> None:
     """
     Creates database tables and a default root user if it does not exist.
-    
+
     This function initializes the database schema by creating all tables defined
     in the SQLModel metadata. It also checks if a root user exists, and if not,
     creates one with the credentials specified in the environment variables.
@@ -55,21 +239,82 @@ def create_db_and_tables() -> None:
     logger.info("tables created")
 
     with Session(engine) as session:
-        _root_user_name = os.getenv("ROOT_NAME")
-        _root_user_surname = os.getenv("ROOT_SURNAME")
-        _root_user_password = os.getenv("ROOT_PASSWORD")
-        root_user = session.exec(select(Users).where(Users.name == _root_user_name)).first()
-        if not root_user:
-            hashed_password = pwd_context.hash(_root_user_password)
-            new_user = Users(
-                name=_root_user_name,
-                surname=_root_user_surname,
-                email=None,
-                phone=None,
-                hashed_password=hashed_password
-            )
-            session.add(new_user)
-            session.commit()
-            logger.info("Default root user created")
-
-SessionDep = Annotated[Session, Depends(get_session)]
+        _create_root_user(session)
+
+
+def check_schema(connection) -> None:
+    """
+    Checks that the database is migrated to the latest Alembic revision.
+
+    Args:
+        connection (Connection): A connection to the database.
+
+    Raises:
+        RuntimeError: If the database is not at the head revision.
+    """
+    current = set(MigrationContext.configure(connection).get_current_heads())
+    expected = set(ScriptDirectory(ALEMBIC_DIR).get_heads())
+    if current != expected:
+        raise RuntimeError(
+            f"database schema is at {sorted(current) or 'no revision'}, "
+            f"expected {sorted(expected)}; run `alembic upgrade head`"
+        )
+
+
+def bootstrap() -> None:
+    """
+    Checks the schema and creates the default root user if it does not exist.
+
+    Every worker runs this on startup, but in PostgreSQL they take turns on an
+    advisory lock: the first one creates the root user, the others find it
+    already there. Blocking; call it from a thread when in the event loop.
+    """
+    with Session(engine) as session:
+        if engine.dialect.name == "postgresql":
+            # released with the transaction, i.e. at the commit below
+            session.exec(select(func.pg_advisory_xact_lock(BOOTSTRAP_LOCK_KEY))).first()
+        if DB_SCHEMA_CHECK:
+            check_schema(session.connection())
+        if os.getenv("ROOT_NAME"):
+            _create_root_user(session)
+        session.commit()
+
+
+async def warm_up_pool() -> None:
+    """
+    Opens ``DB_POOL_SIZE`` connections of the request engine, and of the
+    replica engine if there is one, ahead of traffic.
+
+    Connections are checked out all at once so that the pool really holds that
+    many afterwards, and each runs a round trip to the database.
+    """
+    if DB_ASYNC:
+        binds = [async_engine] + ([replica_engine] if replica_engine else [])
+        connections = await asyncio.gather(
+            *(bind.connect() for bind in binds for _ in range(DB_POOL_SIZE))
+        )
+        try:
+            for connection in connections:
+                await connection.execute(text("SELECT 1"))
+        finally:
+            for connection in connections:
+                await connection.close()
+    else:
+        binds = [engine] + ([replica_engine] if replica_engine else [])
+
+        def warm_up() -> None:
+            connections = [
+                bind.connect() for bind in binds for _ in range(DB_POOL_SIZE)
+            ]
+            try:
+                for connection in connections:
+                    connection.execute(text("SELECT 1"))
+            finally:
+                for connection in connections:
+                    connection.close()
+
+        await asyncio.to_thread(warm_up)
+
+
+SessionDep = Annotated[AsyncSession | Session, Depends(get_session)]
+ReadSessionDep = Annotated[AsyncSession | Session, Depends(get_read_session)]
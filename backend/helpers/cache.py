@@ -0,0 +1,72 @@
+"""
+In-process caches.
+
+``TTLCache`` is a size-bounded LRU mapping whose entries expire after a
+time-to-live. Every cache reports its hits and misses to the metrics registry
+under its ``name``.
+"""
+
+import time
+import threading
+from collections import OrderedDict
+from typing import Any, Hashable
+
+from helpers.metrics import Counter
+
+cache_hits = Counter("cache_hits_total", "Cache lookups served", labelnames=("cache",))
+cache_misses = Counter(
+    "cache_misses_total", "Cache lookups that missed", labelnames=("cache",)
+)
+
+_MISSING = object()
+
+
+class TTLCache:
+    """
+    A thread-safe LRU cache with per-entry expiry.
+
+    Args:
+        name (str): Label used for the hit/miss counters.
+        maxsize (int): Maximum number of entries; the least recently used is evicted.
+        ttl (float): Default time-to-live of an entry, in seconds.
+    """
+
+    def __init__(self, name: str, maxsize: int, ttl: float):
+        self.name = name
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._data.get(key, _MISSING)
+            if entry is not _MISSING:
+                expires_at, value = entry
+                if expires_at > now:
+                    self._data.move_to_end(key)
+                    cache_hits.inc(cache=self.name)
+                    return value
+                del self._data[key]
+        cache_misses.inc(cache=self.name)
+        return default
+
+    def set(self, key: Hashable, value: Any, ttl: float | None = None) -> None:
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._data[key] = (expires_at, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def pop(self, key: Hashable) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
@@ -0,0 +1,99 @@
+"""
+Validators for conditional requests.
+
+Resources are identified by a strong ``ETag`` built from their id and row
+version, and dated by ``Last-Modified``. ``is_not_modified`` evaluates
+``If-None-Match`` and ``If-Modified-Since`` as described in RFC 9110,
+section 13.2.2: the entity tag wins when both are sent. ``if_match_versions``
+reads the row versions an ``If-Match`` header allows a write to replace.
+"""
+
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+
+
+def make_etag(*parts) -> str:
+    """
+    Builds a strong entity tag such as ``"42-7"`` from the given parts.
+    """
+    return '"' + "-".join(str(part) for part in parts) + '"'
+
+
+def http_date(value: datetime) -> str:
+    """
+    Formats a datetime as an HTTP date; naive values are taken as UTC.
+    """
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return format_datetime(value.astimezone(timezone.utc), usegmt=True)
+
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    if if_none_match.strip() == "*":
+        return True
+    # If-None-Match uses the weak comparison, so W/ prefixes are ignored
+    return any(
+        candidate.strip().removeprefix("W/") == etag
+        for candidate in if_none_match.split(",")
+    )
+
+
+def is_not_modified(
+    etag: str,
+    last_modified: datetime,
+    if_none_match: str | None = None,
+    if_modified_since: str | None = None,
+) -> bool:
+    """
+    Tells whether a GET can be answered with 304 Not Modified.
+
+    Args:
+        etag (str): Current entity tag of the resource.
+        last_modified (datetime): Current modification time of the resource.
+        if_none_match (str | None): The ``If-None-Match`` request header.
+        if_modified_since (str | None): The ``If-Modified-Since`` request header.
+
+    Returns:
+        bool: True if the client's copy is current.
+    """
+    if if_none_match is not None:
+        return _etag_matches(if_none_match, etag)
+    if if_modified_since is None:
+        return False
+    try:
+        since = parsedate_to_datetime(if_modified_since)
+    except (TypeError, ValueError):
+        return False
+    if since.tzinfo is None:
+        since = since.replace(tzinfo=timezone.utc)
+    if last_modified.tzinfo is None:
+        last_modified = last_modified.replace(tzinfo=timezone.utc)
+    # HTTP dates have one second resolution
+    return last_modified.replace(microsecond=0) <= since
+
+
+def if_match_versions(if_match: str, *parts) -> list[int] | None:
+    """
+    Reads the row versions named by an ``If-Match`` header, for entity tags
+    built by ``make_etag(*parts, version)``.
+
+    Args:
+        if_match (str): The ``If-Match`` request header.
+        *parts: The leading parts of the resource's entity tags, e.g. its id.
+
+    Returns:
+        list[int] | None: The versions a write may replace, or None for ``*``,
+        which matches any version.
+    """
+    if if_match.strip() == "*":
+        return None
+    prefix = make_etag(*parts, "")[:-1]
+    versions = []
+    # If-Match uses the strong comparison, so weak tags never match
+    for candidate in if_match.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith(prefix) and candidate.endswith('"'):
+            version = candidate[len(prefix) : -1]
+            if version.isdigit():
+                versions.append(int(version))
+    return versions
@@ -1,32 +1,567 @@
+import os
+from datetime import date
+
+from sqlalchemy import and_, func, insert, literal_column, or_, tuple_, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.dialects.postgresql import TSVECTOR
 from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
 
 from database import SessionDep
-from models.users import Users as UserModel, Workreviews as WorkreviewModel
-from shemas.user import RegisterUser, WorkReview
+from helpers.cache import TTLCache
+from models.users import (
+    Subscription as SubscriptionModel,
+    Tags as TagModel,
+    TagsUsers as TagsUsersModel,
+    Users as UserModel,
+    Vacancy as VacancyModel,
+    Workreviews as WorkreviewModel,
+)
+from shemas.user import RegisterUser, ResponseUser, WorkReview
+from shemas.vacancy import CreateVacancy
+
+TAG_CACHE_TTL_SECONDS = float(os.getenv("TAG_CACHE_TTL_SECONDS", 300))
+
+# text search configuration used by the trigger-maintained users.search_vector
+TEXT_SEARCH_CONFIG = "russian"
+HEADLINE_OPTIONS = "MaxFragments=2, MaxWords=20, MinWords=5"
+
+tag_id_cache = TTLCache("tag_ids", maxsize=50_000, ttl=TAG_CACHE_TTL_SECONDS)
+
+# the users columns exposed by ResponseUser, for queries that skip the ORM
+RESPONSE_USER_COLUMNS = tuple(
+    getattr(UserModel, name) for name in ResponseUser.model_fields
+)
+
+
+async def execute(session: SessionDep, statement):
+    """
+    Runs a statement on either an async or a blocking session.
+
+    Args:
+        session (SessionDep): The database session.
+        statement: The SQLModel/SQLAlchemy statement to execute.
+
+    Returns:
+        The result of ``session.exec``.
+    """
+    if isinstance(session, AsyncSession):
+        return await session.exec(statement)
+    return session.exec(statement)
+
+
+async def save(session: SessionDep, *instances) -> None:
+    """
+    Adds instances to the session and commits the transaction.
+
+    Args:
+        session (SessionDep): The database session.
+        *instances: ORM objects to persist.
+    """
+    session.add_all(instances)
+    if isinstance(session, AsyncSession):
+        await session.commit()
+    else:
+        session.commit()
+
+
+async def rollback(session: SessionDep) -> None:
+    """
+    Rolls back the transaction, e.g. after a statement failed.
 
+    Args:
+        session (SessionDep): The database session.
+    """
+    if isinstance(session, AsyncSession):
+        await session.rollback()
+    else:
+        session.rollback()
 
-def get_user_by_email(email: str, session: SessionDep) -> UserModel | None:
-    return session.exec(select(UserModel).where(UserModel.email == email)).first()
 
+def dialect_insert(session: SessionDep, model):
+    """
+    Starts an INSERT supporting ``ON CONFLICT`` clauses on the session's database.
 
-def get_user_by_phone(phone: str, session: SessionDep) -> UserModel | None:
-    return session.exec(select(UserModel).where(UserModel.phone == phone)).first()
+    Args:
+        session (SessionDep): The database session.
+        model: The model or table to insert into.
 
+    Returns:
+        Insert: A PostgreSQL (or, for local runs, SQLite) insert statement.
+    """
+    if session.bind.dialect.name == "sqlite":
+        return sqlite.insert(model)
+    return postgresql.insert(model)
 
-def get_user_by_id(id: int, session: SessionDep) -> UserModel | None:
-    return session.exec(select(UserModel).where(UserModel.id == id)).first()
 
+def _is_set(column):
+    # the predicate of the partial unique indexes on users.email and
+    # users.phone; spelling it out lets PostgreSQL use them with generic plans
+    # of prepared statements, so the empty string must not become a parameter
+    return and_(column.is_not(None), column != literal_column("''"))
 
-def create_user(user: RegisterUser, hashed_password: str) -> UserModel:
-    new_user = UserModel(
-        name=user.name,
-        surname=user.surname,
-        phone=user.phone,
-        email=user.email,
-        hashed_password=hashed_password,
+
+async def get_user_by_email(email: str, session: SessionDep) -> UserModel | None:
+    result = await execute(
+        session,
+        select(UserModel).where(UserModel.email == email, _is_set(UserModel.email)),
+    )
+    return result.first()
+
+
+async def get_user_by_phone(phone: str, session: SessionDep) -> UserModel | None:
+    result = await execute(
+        session,
+        select(UserModel).where(UserModel.phone == phone, _is_set(UserModel.phone)),
+    )
+    return result.first()
+
+
+async def get_taken_login(
+    email: str | None,
+    phone: str | None,
+    session: SessionDep,
+    exclude_id: int | None = None,
+) -> str | None:
+    """
+    Finds which of an email and a phone is already registered.
+
+    Args:
+        email (str | None): The email to check.
+        phone (str | None): The phone to check.
+        session (SessionDep): The database session.
+        exclude_id (int | None): A user whose own email and phone don't count.
+
+    Returns:
+        str | None: ``"email"`` or ``"phone"`` (email first), None if neither is.
+    """
+    statement = select(UserModel.email, UserModel.phone).where(
+        or_(
+            and_(UserModel.email == email, _is_set(UserModel.email)),
+            and_(UserModel.phone == phone, _is_set(UserModel.phone)),
+        )
     )
+    if exclude_id is not None:
+        statement = statement.where(UserModel.id != exclude_id)
+    result = await execute(session, statement)
+    taken = result.all()
+    if email and any(row.email == email for row in taken):
+        return "email"
+    if phone and any(row.phone == phone for row in taken):
+        return "phone"
+    return None
+
+
+async def get_user_by_id(id: int, session: SessionDep) -> UserModel | None:
+    result = await execute(session, select(UserModel).where(UserModel.id == id))
+    return result.first()
+
+
+async def get_user_version(id: int, session: SessionDep):
+    """
+    Looks up only the version and modification time of a user.
+
+    This is a primary key lookup that never touches the rest of the row, used
+    to answer conditional requests.
 
-    return new_user
+    Args:
+        id (int): The user id.
+        session (SessionDep): The database session.
+
+    Returns:
+        Row | None: ``(version, updated_at)``, or None if there is no such user.
+    """
+    result = await execute(
+        session,
+        select(UserModel.version, UserModel.updated_at).where(UserModel.id == id),
+    )
+    return result.first()
+
+
+async def get_users_by_ids(
+    ids: list[int], session: SessionDep, columns: tuple | None = None
+) -> list:
+    """
+    Loads several users in a single ``WHERE id IN (...)`` query.
+
+    Args:
+        ids (list[int]): User ids.
+        session (SessionDep): The database session.
+        columns (tuple | None): Columns to select instead of the entity,
+            e.g. ``RESPONSE_USER_COLUMNS``.
+
+    Returns:
+        list: The users that exist, in no particular order.
+    """
+    if not ids:
+        return []
+    statement = select(*(columns or (UserModel,))).where(UserModel.id.in_(ids))
+    result = await execute(session, statement)
+    return result.all()
+
+
+async def get_tag_ids(names: list[str], session: SessionDep) -> dict[str, int]:
+    """
+    Resolves tag names to ids, going to the database only for uncached names.
+
+    Args:
+        names (list[str]): Tag names.
+        session (SessionDep): The database session.
+
+    Returns:
+        dict[str, int]: Ids of the names that exist.
+    """
+    tag_ids = {}
+    missing = []
+    for name in names:
+        tag_id = tag_id_cache.get(name)
+        if tag_id is None:
+            missing.append(name)
+        else:
+            tag_ids[name] = tag_id
+
+    if missing:
+        result = await execute(
+            session,
+            select(TagModel.name, TagModel.id).where(TagModel.name.in_(missing)),
+        )
+        for name, tag_id in result.all():
+            tag_id_cache.set(name, tag_id)
+            tag_ids[name] = tag_id
+
+    return tag_ids
+
+
+def tag_search_statement(
+    tag_ids: list[int],
+    match_all: bool,
+    *columns,
+    limit: int | None = None,
+    after: tuple[int, int] | None = None,
+):
+    """
+    Builds the ranked tag search query selecting ``columns`` plus the match count.
+
+    Matches are counted on ``tagsusers`` alone, which is served by the
+    ``(tag_id, user_id)`` index, and only the limited set of user ids is
+    joined to ``users``. Rows are ordered by matched tag count descending,
+    then user id.
+
+    Args:
+        tag_ids (list[int]): Ids of the requested tags.
+        match_all (bool): Only return users having every requested tag.
+        *columns: Entities or columns of ``users`` to select.
+        limit (int | None): Maximum number of users to return.
+        after (tuple[int, int] | None): ``(matched, user_id)`` of the last row
+            of the previous page.
+
+    Returns:
+        Select: The statement.
+    """
+    matched = func.count()
+    ranked = (
+        select(TagsUsersModel.user_id, matched.label("matched"))
+        .where(TagsUsersModel.tag_id.in_(tag_ids))
+        .group_by(TagsUsersModel.user_id)
+    )
+    if match_all:
+        ranked = ranked.having(matched == len(tag_ids))
+    if after is not None:
+        last_matched, last_user_id = after
+        ranked = ranked.having(
+            or_(
+                matched < last_matched,
+                and_(matched == last_matched, TagsUsersModel.user_id > last_user_id),
+            )
+        )
+    ranked = ranked.order_by(matched.desc(), TagsUsersModel.user_id)
+    if limit is not None:
+        ranked = ranked.limit(limit)
+    ranked = ranked.subquery()
+
+    return (
+        select(*columns, ranked.c.matched.label("matched_tags"))
+        .join(ranked, UserModel.id == ranked.c.user_id)
+        .order_by(ranked.c.matched.desc(), UserModel.id)
+    )
+
+
+def export_users_statement():
+    """
+    Builds the query listing every user's public columns in id order.
+
+    Returns:
+        Select: The statement.
+    """
+    return select(*RESPONSE_USER_COLUMNS).order_by(UserModel.id)
+
+
+async def search_users_by_tag_ids(
+    tag_ids: list[int],
+    match_all: bool,
+    limit: int,
+    session: SessionDep,
+    after: tuple[int, int] | None = None,
+    columns: tuple | None = None,
+) -> list[tuple]:
+    """
+    Finds users having any (or all) of the given tags, best matches first.
+
+    Args:
+        tag_ids (list[int]): Ids of the requested tags.
+        match_all (bool): Only return users having every requested tag.
+        limit (int): Maximum number of users to return.
+        session (SessionDep): The database session.
+        after (tuple[int, int] | None): ``(matched, user_id)`` of the last row
+            of the previous page.
+        columns (tuple | None): Columns to select for each user instead of
+            the entity, e.g. ``RESPONSE_USER_COLUMNS``.
+
+    Returns:
+        list[tuple]: Rows of ``columns`` followed by the matched tag count.
+    """
+    result = await execute(
+        session,
+        tag_search_statement(
+            tag_ids, match_all, *(columns or (UserModel,)), limit=limit, after=after
+        ),
+    )
+    return result.all()
+
+
+async def search_users_by_text(
+    text: str,
+    limit: int,
+    session: SessionDep,
+    after: tuple[float, int] | None = None,
+) -> list[tuple[UserModel, float, str]]:
+    """
+    Full-text search over the users' free-text profile fields.
+
+    Matching goes through the GIN index on ``users.search_vector``; highlighted
+    snippets are only built for the rows of the requested page.
+
+    Args:
+        text (str): Search query in web search syntax (quotes, ``or``, ``-``).
+        limit (int): Maximum number of users to return.
+        session (SessionDep): The database session.
+        after (tuple[float, int] | None): ``(rank, user_id)`` of the last row of
+            the previous page.
+
+    Returns:
+        list[tuple[UserModel, float, str]]: Users with their rank and headline.
+    """
+    search_vector = literal_column("users.search_vector", TSVECTOR)
+    query = func.websearch_to_tsquery(TEXT_SEARCH_CONFIG, text)
+    rank = func.ts_rank_cd(search_vector, query)
+
+    ranked = select(UserModel.id, rank.label("rank")).where(
+        search_vector.bool_op("@@")(query)
+    )
+    if after is not None:
+        last_rank, last_user_id = after
+        ranked = ranked.where(
+            or_(rank < last_rank, and_(rank == last_rank, UserModel.id > last_user_id))
+        )
+    ranked = ranked.order_by(rank.desc(), UserModel.id).limit(limit).subquery()
+
+    document = func.concat_ws(
+        " ",
+        UserModel.about_me,
+        UserModel.full_status,
+        UserModel.short_status,
+        UserModel.university,
+        UserModel.course,
+    )
+    headline = func.ts_headline(TEXT_SEARCH_CONFIG, document, query, HEADLINE_OPTIONS)
+    result = await execute(
+        session,
+        select(UserModel, ranked.c.rank, headline)
+        .join(ranked, UserModel.id == ranked.c.id)
+        .order_by(ranked.c.rank.desc(), UserModel.id),
+    )
+    return result.all()
+
+
+async def get_subscription_page(
+    user_id: int,
+    followers: bool,
+    limit: int,
+    session: SessionDep,
+    after: int | None = None,
+) -> list:
+    """
+    Pages through one side of a user's subscriptions, ordered by the other user's id.
+
+    Only the columns of ``UserShort`` are selected. The primary key serves
+    subscriptions and ``ix_subscription_user_id_to_user_id_from`` serves
+    followers, so every page is a single index range scan.
+
+    Args:
+        user_id (int): The user whose subscriptions are listed.
+        followers (bool): List users following ``user_id`` instead of the
+            users ``user_id`` follows.
+        limit (int): Maximum number of users to return.
+        session (SessionDep): The database session.
+        after (int | None): Id of the last user of the previous page.
+
+    Returns:
+        list: Rows of ``(id, name, surname, short_status)``.
+    """
+    if followers:
+        owner, other = SubscriptionModel.user_id_to, SubscriptionModel.user_id_from
+    else:
+        owner, other = SubscriptionModel.user_id_from, SubscriptionModel.user_id_to
+
+    statement = (
+        select(UserModel.id, UserModel.name, UserModel.surname, UserModel.short_status)
+        .join(SubscriptionModel, other == UserModel.id)
+        .where(owner == user_id)
+    )
+    if after is not None:
+        statement = statement.where(other > after)
+    result = await execute(session, statement.order_by(other).limit(limit))
+    return result.all()
+
+
+async def get_vacancy_by_id(id: int, session: SessionDep) -> VacancyModel | None:
+    result = await execute(session, select(VacancyModel).where(VacancyModel.id == id))
+    return result.first()
+
+
+async def list_vacancies(
+    limit: int,
+    session: SessionDep,
+    order: str = "newest",
+    min_price: float | None = None,
+    max_price: float | None = None,
+    holder_id: int | None = None,
+    text: str | None = None,
+    after: tuple | None = None,
+) -> list[VacancyModel]:
+    """
+    Lists vacancies matching the filters, one keyset page at a time.
+
+    Pages continue strictly after the sort key of the previous page's last row
+    instead of using OFFSET, so a deep page costs the same as the first one.
+    ``newest`` walks the primary key, or ``(vacancy_holder_id, id)`` when
+    filtering by holder; the price orders walk ``(price, id)``.
+
+    Args:
+        limit (int): Maximum number of vacancies to return.
+        session (SessionDep): The database session.
+        order (str): ``newest``, ``price_asc`` or ``price_desc``.
+        min_price (float | None): Lowest price, inclusive.
+        max_price (float | None): Highest price, inclusive.
+        holder_id (int | None): Only vacancies of this user.
+        text (str | None): Full-text query over title and description.
+        after (tuple | None): Sort key of the last row of the previous page:
+            ``(id,)`` for ``newest``, ``(price, id)`` otherwise.
+
+    Returns:
+        list[VacancyModel]: The vacancies of the page.
+    """
+    statement = select(VacancyModel)
+    if min_price is not None:
+        statement = statement.where(VacancyModel.price >= min_price)
+    if max_price is not None:
+        statement = statement.where(VacancyModel.price <= max_price)
+    if holder_id is not None:
+        statement = statement.where(VacancyModel.vacancy_holder_id == holder_id)
+    if text:
+        search_vector = literal_column("vacancy.search_vector", TSVECTOR)
+        query = func.websearch_to_tsquery(TEXT_SEARCH_CONFIG, text)
+        statement = statement.where(search_vector.bool_op("@@")(query))
+
+    if order == "newest":
+        if after is not None:
+            statement = statement.where(VacancyModel.id < after[0])
+        statement = statement.order_by(VacancyModel.id.desc())
+    else:
+        # a row comparison, so the (price, id) index range starts at the cursor
+        key = tuple_(VacancyModel.price, VacancyModel.id)
+        if after is not None:
+            statement = statement.where(
+                key > tuple_(*after) if order == "price_asc" else key < tuple_(*after)
+            )
+        if order == "price_asc":
+            statement = statement.order_by(VacancyModel.price, VacancyModel.id)
+        else:
+            statement = statement.order_by(
+                VacancyModel.price.desc(), VacancyModel.id.desc()
+            )
+
+    result = await execute(session, statement.limit(limit))
+    return result.all()
+
+
+async def insert_user(
+    user: RegisterUser, hashed_password: str, session: SessionDep
+) -> int | None:
+    """
+    Inserts a user unless its email or phone is already registered.
+
+    The unique indexes on email and phone decide, so concurrent registrations
+    of the same login cannot both succeed.
+
+    Args:
+        user (RegisterUser): The registration data.
+        hashed_password (str): The hashed password.
+        session (SessionDep): The database session.
+
+    Returns:
+        int | None: The new user's ID, None if the email or phone is taken.
+    """
+    result = await execute(
+        session,
+        dialect_insert(session, UserModel)
+        .values(
+            name=user.name,
+            surname=user.surname,
+            phone=user.phone,
+            email=user.email,
+            hashed_password=hashed_password,
+        )
+        .on_conflict_do_nothing()
+        .returning(UserModel.id),
+    )
+    user_id = result.scalar()
+    await save(session)
+    return user_id
+
+
+async def update_user(
+    id: int, values: dict, session: SessionDep, versions: list[int] | None = None
+):
+    """
+    Updates some columns of a user in one ``UPDATE ... RETURNING`` statement.
+
+    The row version is bumped by the update itself, so two edits based on the
+    same version cannot both pass the ``versions`` check.
+
+    Args:
+        id (int): The user id.
+        values (dict): The new column values.
+        session (SessionDep): The database session.
+        versions (list[int] | None): Update only if the current version is one
+            of these.
+
+    Returns:
+        Row | None: The new ``(version, updated_at)``, or None if there is no
+        such user or its version did not match.
+    """
+    statement = (
+        update(UserModel)
+        .where(UserModel.id == id)
+        .values(**values)
+        .returning(UserModel.version, UserModel.updated_at)
+    )
+    if versions is not None:
+        statement = statement.where(UserModel.version.in_(versions))
+    result = await execute(session, statement)
+    updated = result.first()
+    await save(session)
+    return updated
 
 
 def create_workreview(review: WorkReview, owner_id: int) -> WorkreviewModel:
@@ -40,3 +575,96 @@ def create_workreview(review: WorkReview, owner_id: int) -> WorkreviewModel:
     )
 
     return new_review
+
+
+async def insert_workreviews(
+    reviews: list[WorkReview], owner_id: int, session: SessionDep
+) -> list[WorkreviewModel]:
+    """
+    Inserts several work reviews of a user in one statement and transaction.
+
+    Args:
+        reviews (list[WorkReview]): The work reviews.
+        owner_id (int): The user the reviews belong to.
+        session (SessionDep): The database session.
+
+    Returns:
+        list[WorkreviewModel]: The created reviews, in timeline order.
+    """
+    today = date.today()
+    result = await execute(
+        session,
+        insert(WorkreviewModel)
+        .values(
+            [
+                {
+                    "post": review.post,
+                    "date_start": review.date_start or today,
+                    "date_end": review.date_end,
+                    "company_name": review.company_name,
+                    "subcompany_name": review.subcompany_name,
+                    "user_id": owner_id,
+                }
+                for review in reviews
+            ]
+        )
+        .returning(WorkreviewModel),
+    )
+    created = result.scalars().all()
+    await save(session)
+    return sorted(created, key=lambda review: (review.date_start, review.id))
+
+
+async def get_workreview_page(
+    user_id: int,
+    limit: int,
+    session: SessionDep,
+    date_from: date | None = None,
+    date_to: date | None = None,
+    after: tuple[date, int] | None = None,
+) -> list[WorkreviewModel]:
+    """
+    Pages through a user's work reviews ordered by start date.
+
+    Served by ``ix_workreviews_user_id_date_start_id``: the date range and the
+    cursor only narrow the range scanned in it.
+
+    Args:
+        user_id (int): The user whose reviews are listed.
+        limit (int): Maximum number of reviews to return.
+        session (SessionDep): The database session.
+        date_from (date | None): Only reviews starting on or after this date.
+        date_to (date | None): Only reviews starting on or before this date.
+        after (tuple[date, int] | None): ``(date_start, id)`` of the last
+            review of the previous page.
+
+    Returns:
+        list[WorkreviewModel]: The reviews.
+    """
+    statement = select(WorkreviewModel).where(WorkreviewModel.user_id == user_id)
+    if date_from is not None:
+        statement = statement.where(WorkreviewModel.date_start >= date_from)
+    if date_to is not None:
+        statement = statement.where(WorkreviewModel.date_start <= date_to)
+    if after is not None:
+        statement = statement.where(
+            tuple_(WorkreviewModel.date_start, WorkreviewModel.id) > tuple_(*after)
+        )
+    result = await execute(
+        session,
+        statement.order_by(WorkreviewModel.date_start, WorkreviewModel.id).limit(limit),
+    )
+    return result.all()
+
+
+def create_vacancy(vacancy: CreateVacancy, holder_id: int) -> VacancyModel:
+    new_vacancy = VacancyModel(
+        title=vacancy.title,
+        description=vacancy.description,
+        price=vacancy.price,
+        conditions=vacancy.conditions,
+        related_project=vacancy.related_project,
+        vacancy_holder_id=holder_id,
+    )
+
+    return new_vacancy
@@ -0,0 +1,175 @@
+"""
+Password hashing offloaded to a bounded process pool.
+
+bcrypt burns 100-300 ms of CPU per call, which would freeze the event loop if it
+ran inline in a route. Hashes are computed in a pool of ``HASH_POOL_SIZE``
+processes instead. At most ``HASH_POOL_MAX_PENDING`` jobs may be queued or
+running at once; callers beyond that get a 503 straight away rather than
+waiting in an ever-growing queue.
+
+Attributes:
+    HASH_POOL_SIZE (int): Number of hashing processes.
+    HASH_POOL_MAX_PENDING (int): Admission limit for in-flight hashing jobs.
+    pwd_context (CryptContext): The password hashing context.
+    hashing_pool (HashingPool): The shared pool used by routes and bootstrap.
+"""
+
+import os
+import time
+import asyncio
+import logging
+import threading
+import multiprocessing
+from concurrent.futures import Future, ProcessPoolExecutor
+
+from fastapi import HTTPException, status
+from passlib.context import CryptContext
+
+from helpers.metrics import Counter, Gauge, Histogram
+
+# with several app workers (see serve.py) the cores are shared between them
+_cores_per_worker = (os.cpu_count() or 1) // int(os.getenv("WEB_CONCURRENCY", 1))
+HASH_POOL_SIZE = int(os.getenv("HASH_POOL_SIZE", min(4, max(1, _cores_per_worker))))
+HASH_POOL_MAX_PENDING = int(os.getenv("HASH_POOL_MAX_PENDING", HASH_POOL_SIZE * 8))
+
+logger = logging.getLogger("hashing")
+logger.setLevel("DEBUG")
+
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+
+hash_queue_depth = Gauge(
+    "password_hash_queue_depth", "Hashing jobs queued or running in the pool"
+)
+hash_latency = Histogram(
+    "password_hash_seconds",
+    "Time from submission to result of a hashing job",
+    labelnames=("op",),
+)
+hash_rejected = Counter(
+    "password_hash_rejected_total", "Hashing jobs refused because the pool was full"
+)
+
+
+def _hash(password: str) -> str:
+    return pwd_context.hash(password)
+
+
+def _verify(plain_password: str, hashed_password: str) -> bool:
+    return pwd_context.verify(plain_password, hashed_password)
+
+
+class HashingPool:
+    """
+    A process pool with an admission limit and queue/latency metrics.
+
+    The executor is created on first use so that importing this module
+    does not spawn processes.
+    """
+
+    def __init__(self, max_workers: int, max_pending: int):
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self._executor: ProcessPoolExecutor | None = None
+        self._pending = 0
+        self._lock = threading.Lock()
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+            logger.info(f"hashing pool started with {self.max_workers} processes")
+        return self._executor
+
+    def _release(self, op: str, started: float) -> None:
+        with self._lock:
+            self._pending -= 1
+            hash_queue_depth.set(self._pending)
+        hash_latency.observe(time.perf_counter() - started, op=op)
+
+    def submit(self, fn, *args) -> Future:
+        """
+        Submits a job to the pool.
+
+        Raises:
+            HTTPException: 503 if ``max_pending`` jobs are already in flight.
+        """
+        with self._lock:
+            if self._pending >= self.max_pending:
+                hash_rejected.inc()
+                raise HTTPException(
+                    status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                    detail="server is busy, try again later",
+                    headers={"Retry-After": "1"},
+                )
+            self._pending += 1
+            hash_queue_depth.set(self._pending)
+            executor = self._get_executor()
+
+        op = fn.__name__.lstrip("_")
+        started = time.perf_counter()
+        try:
+            future = executor.submit(fn, *args)
+        except BaseException:
+            self._release(op, started)
+            raise
+        future.add_done_callback(lambda _: self._release(op, started))
+        return future
+
+    async def run(self, fn, *args):
+        return await asyncio.wrap_future(self.submit(fn, *args))
+
+    def run_sync(self, fn, *args):
+        return self.submit(fn, *args).result()
+
+    async def warm_up(self) -> None:
+        """
+        Starts every process and loads the bcrypt backend in it, so that the
+        first logins after a restart don't pay for it.
+        """
+        await asyncio.gather(
+            *(self.run(_hash, "warm-up") for _ in range(self.max_workers))
+        )
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+
+
+hashing_pool = HashingPool(HASH_POOL_SIZE, HASH_POOL_MAX_PENDING)
+
+
+async def get_password_hash(password: str) -> str:
+    """
+    Hashes a plain password in the hashing pool.
+
+    Args:
+        password (str): The plain password to hash.
+
+    Returns:
+        str: The hashed password.
+    """
+    return await hashing_pool.run(_hash, password)
+
+
+async def verify_password(plain_password: str, hashed_password: str) -> bool:
+    """
+    Verifies a plain password against a hashed password in the hashing pool.
+
+    Args:
+        plain_password (str): The plain password.
+        hashed_password (str): The hashed password.
+
+    Returns:
+        bool: True if the password matches, False otherwise.
+    """
+    return await hashing_pool.run(_verify, plain_password, hashed_password)
+
+
+def get_password_hash_sync(password: str) -> str:
+    """
+    Blocking variant of ``get_password_hash`` for code outside the event loop.
+    """
+    return hashing_pool.run_sync(_hash, password)
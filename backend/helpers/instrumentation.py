@@ -0,0 +1,155 @@
+"""
+Request and query instrumentation.
+
+``MetricsMiddleware`` times every HTTP request and records it per route
+template and status. ``instrument_engine`` hooks the cursor events of an
+engine, so each SQL statement is counted and timed against the request that
+issued it; failed statements are counted separately. Statements slower than ``SLOW_QUERY_MS`` are logged.
+
+Attributes:
+    SLOW_QUERY_MS (float): Threshold above which statements are logged.
+"""
+
+import os
+import time
+import logging
+from contextvars import ContextVar
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from helpers.metrics import Counter, Histogram
+
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", 200))
+
+logger = logging.getLogger("instrumentation")
+logger.setLevel("DEBUG")
+
+http_request_duration = Histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency by route",
+    labelnames=("method", "route"),
+)
+http_requests = Counter(
+    "http_requests_total",
+    "HTTP requests by route and status code",
+    labelnames=("method", "route", "status"),
+)
+request_db_queries = Histogram(
+    "http_request_db_queries",
+    "SQL statements issued per HTTP request",
+    labelnames=("route",),
+    buckets=(0, 1, 2, 3, 5, 10, 20, 50, 100),
+)
+request_db_time = Histogram(
+    "http_request_db_seconds",
+    "Time spent in SQL statements per HTTP request",
+    labelnames=("route",),
+)
+db_query_duration = Histogram(
+    "db_query_duration_seconds", "Duration of individual SQL statements"
+)
+db_slow_queries = Counter(
+    "db_slow_queries_total", "SQL statements slower than SLOW_QUERY_MS"
+)
+db_query_errors = Counter("db_query_errors_total", "SQL statements that failed")
+
+
+class RequestStats:
+    """
+    Per-request DB accounting, shared by reference with threadpool workers.
+    """
+
+    __slots__ = ("queries", "db_time")
+
+    def __init__(self):
+        self.queries = 0
+        self.db_time = 0.0
+
+
+request_stats: ContextVar[RequestStats | None] = ContextVar(
+    "request_stats", default=None
+)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    # kept on the execution context, which a failed statement simply discards
+    context._query_started = time.perf_counter()
+
+
+def _record_query(statement: str, elapsed: float) -> None:
+    db_query_duration.observe(elapsed)
+
+    stats = request_stats.get()
+    if stats is not None:
+        stats.queries += 1
+        stats.db_time += elapsed
+
+    if elapsed * 1000 >= SLOW_QUERY_MS:
+        db_slow_queries.inc()
+        logger.warning(f"slow query ({elapsed * 1000:.0f} ms): {statement[:500]}")
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    _record_query(statement, time.perf_counter() - context._query_started)
+
+
+def _handle_error(exception_context):
+    context = exception_context.execution_context
+    started = getattr(context, "_query_started", None)
+    if started is None:
+        # failed before reaching the cursor, e.g. while connecting
+        return
+    db_query_errors.inc()
+    _record_query(exception_context.statement or "", time.perf_counter() - started)
+
+
+def instrument_engine(engine: Engine) -> None:
+    """
+    Counts and times every statement executed on ``engine``.
+
+    Args:
+        engine (Engine): A sync engine; pass ``AsyncEngine.sync_engine`` for async ones.
+    """
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(engine, "handle_error", _handle_error)
+
+
+class MetricsMiddleware:
+    """
+    Pure ASGI middleware recording latency, status and DB usage per route.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+
+        async def send_with_status(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        stats = RequestStats()
+        token = request_stats.set(stats)
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            elapsed = time.perf_counter() - started
+            request_stats.reset(token)
+            # label by route template, not the raw path, to keep cardinality bounded
+            route = scope.get("route")
+            path = route.path if route is not None else "unmatched"
+            method = scope["method"]
+            http_request_duration.observe(elapsed, method=method, route=path)
+            http_requests.inc(method=method, route=path, status=status_code)
+            request_db_queries.observe(stats.queries, route=path)
+            request_db_time.observe(stats.db_time, route=path)
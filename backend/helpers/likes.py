@@ -0,0 +1,230 @@
+"""
+Likes between users and their write-behind counters.
+
+A like is stored as one ``likes`` row per (liker, liked) pair, so liking twice
+or unliking something not liked changes nothing. The per-user totals in
+``likecounter`` are not updated by the request itself: a popular profile
+would make every like wait for the same counter row. Instead each like or
+unlike adds a delta to ``like_counter_buffer``. The buffer coalesces deltas
+per user in memory and writes them every ``LIKE_FLUSH_INTERVAL_SECONDS`` (or
+once ``LIKE_BUFFER_MAX_PENDING`` users are pending) as batched upserts, so a
+thousand likes of one user cost a single row update.
+
+Pending deltas are lost if the process dies without a clean shutdown;
+``python -m tools.recount_likes`` rebuilds the counters from ``likes``.
+
+Attributes:
+    LIKE_FLUSH_INTERVAL_SECONDS (float): Delay between two flushes.
+    LIKE_FLUSH_BATCH (int): Users written per upsert statement.
+    LIKE_BUFFER_MAX_PENDING (int): Pending users that trigger an early flush.
+    like_counter_buffer (LikeCounterBuffer): The process-wide buffer.
+"""
+
+import os
+import asyncio
+import logging
+import threading
+
+from sqlalchemy import delete
+from sqlmodel import select
+
+from database import SessionDep, get_session
+from helpers.crud import dialect_insert, execute, save
+from helpers.metrics import Counter, Gauge
+from models.users import LikeCounter as LikeCounterModel, Likes as LikesModel
+
+LIKE_FLUSH_INTERVAL_SECONDS = float(os.getenv("LIKE_FLUSH_INTERVAL_SECONDS", 1))
+LIKE_FLUSH_BATCH = int(os.getenv("LIKE_FLUSH_BATCH", 1_000))
+LIKE_BUFFER_MAX_PENDING = int(os.getenv("LIKE_BUFFER_MAX_PENDING", 10_000))
+
+logger = logging.getLogger("likes")
+logger.setLevel("DEBUG")
+
+like_buffer_pending = Gauge(
+    "like_buffer_pending_users", "Users with like count changes not yet written"
+)
+like_flushed = Counter(
+    "like_counter_rows_flushed_total", "Coalesced like counter updates written"
+)
+like_flush_errors = Counter(
+    "like_counter_flush_errors_total", "Like counter flushes that failed"
+)
+
+
+class LikeCounterBuffer:
+    """
+    Coalesces like counter deltas in memory and writes them in batches.
+    """
+
+    def __init__(self, interval: float, batch_size: int, max_pending: int):
+        self.interval = interval
+        self.batch_size = batch_size
+        self.max_pending = max_pending
+        self._deltas: dict[int, int] = {}
+        self._lock = threading.Lock()
+        self._wakeup: asyncio.Event | None = None
+        self._task: asyncio.Task | None = None
+
+    def add(self, user_id: int, delta: int) -> None:
+        """
+        Records a change of ``delta`` likes for ``user_id``.
+        """
+        with self._lock:
+            self._deltas[user_id] = self._deltas.get(user_id, 0) + delta
+            pending = len(self._deltas)
+        like_buffer_pending.set(pending)
+        if pending >= self.max_pending and self._wakeup is not None:
+            self._wakeup.set()
+
+    def pending(self, user_id: int) -> int:
+        """
+        Returns the delta for ``user_id`` that has not been written yet.
+        """
+        return self._deltas.get(user_id, 0)
+
+    async def flush(self) -> None:
+        """
+        Writes all pending deltas. On failure they are kept for the next flush.
+        """
+        with self._lock:
+            deltas, self._deltas = self._deltas, {}
+        like_buffer_pending.set(0)
+        # a fixed order keeps concurrent flushes from several workers
+        # from deadlocking on each other's counter rows
+        rows = [
+            {"user_id": user_id, "likes": delta}
+            for user_id, delta in sorted(deltas.items())
+            if delta
+        ]
+        if not rows:
+            return
+
+        try:
+            async for session in get_session():
+                for start in range(0, len(rows), self.batch_size):
+                    statement = dialect_insert(session, LikeCounterModel).values(
+                        rows[start : start + self.batch_size]
+                    )
+                    statement = statement.on_conflict_do_update(
+                        index_elements=["user_id"],
+                        set_={
+                            "likes": LikeCounterModel.likes + statement.excluded.likes
+                        },
+                    )
+                    await execute(session, statement)
+                await save(session)
+        except Exception:
+            like_flush_errors.inc()
+            logger.exception(f"like counter flush of {len(rows)} users failed")
+            with self._lock:
+                for row in rows:
+                    user_id = row["user_id"]
+                    self._deltas[user_id] = self._deltas.get(user_id, 0) + row["likes"]
+                like_buffer_pending.set(len(self._deltas))
+            return
+        like_flushed.inc(len(rows))
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            await self.flush()
+
+    def start(self) -> None:
+        """
+        Starts the periodic flush on the running event loop.
+        """
+        if self._task is None:
+            self._wakeup = asyncio.Event()
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self) -> None:
+        """
+        Stops the periodic flush and writes whatever is still pending.
+        """
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
+
+
+like_counter_buffer = LikeCounterBuffer(
+    LIKE_FLUSH_INTERVAL_SECONDS, LIKE_FLUSH_BATCH, LIKE_BUFFER_MAX_PENDING
+)
+
+
+async def like(user_id: int, liked_user_id: int, session: SessionDep) -> bool:
+    """
+    Records that ``user_id`` likes ``liked_user_id``.
+
+    Args:
+        user_id (int): The liking user.
+        liked_user_id (int): The liked user.
+        session (SessionDep): The database session.
+
+    Returns:
+        bool: False if the like already existed.
+    """
+    inserted = await execute(
+        session,
+        dialect_insert(session, LikesModel)
+        .values(user_id=user_id, liked_user_id=liked_user_id)
+        .on_conflict_do_nothing()
+        .returning(LikesModel.liked_user_id),
+    )
+    created = inserted.first() is not None
+    await save(session)
+    if created:
+        like_counter_buffer.add(liked_user_id, 1)
+    return created
+
+
+async def unlike(user_id: int, liked_user_id: int, session: SessionDep) -> bool:
+    """
+    Removes the like of ``user_id`` for ``liked_user_id``.
+
+    Args:
+        user_id (int): The liking user.
+        liked_user_id (int): The liked user.
+        session (SessionDep): The database session.
+
+    Returns:
+        bool: False if there was no such like.
+    """
+    deleted = await execute(
+        session,
+        delete(LikesModel)
+        .where(LikesModel.user_id == user_id, LikesModel.liked_user_id == liked_user_id)
+        .returning(LikesModel.liked_user_id),
+    )
+    removed = deleted.first() is not None
+    await save(session)
+    if removed:
+        like_counter_buffer.add(liked_user_id, -1)
+    return removed
+
+
+async def get_like_count(user_id: int, session: SessionDep) -> int:
+    """
+    Returns a user's like count from ``likecounter``, including this
+    process's unwritten changes.
+
+    Args:
+        user_id (int): The user.
+        session (SessionDep): The database session.
+
+    Returns:
+        int: The number of likes.
+    """
+    result = await execute(
+        session,
+        select(LikeCounterModel.likes).where(LikeCounterModel.user_id == user_id),
+    )
+    return (result.first() or 0) + like_counter_buffer.pending(user_id)
@@ -0,0 +1,55 @@
+"""
+Opaque cursors for keyset pagination.
+
+A cursor is the sort key of the last row on a page, JSON-encoded and wrapped in
+URL-safe base64 so clients treat it as an opaque token.
+"""
+
+import json
+import base64
+import binascii
+
+from fastapi import HTTPException, status
+
+
+def encode_cursor(*values) -> str:
+    """
+    Encodes the sort key of the last row of a page.
+
+    Args:
+        *values: JSON-serializable components of the sort key.
+
+    Returns:
+        str: The opaque cursor.
+    """
+    raw = json.dumps(values, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, *types: type) -> tuple:
+    """
+    Decodes a cursor produced by ``encode_cursor``.
+
+    Args:
+        cursor (str): The opaque cursor.
+        *types (type): Expected type of each sort key component.
+
+    Returns:
+        tuple: The sort key, converted to ``types``.
+
+    Raises:
+        HTTPException: 400 if the cursor is malformed.
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        values = json.loads(raw)
+        if not isinstance(values, list) or len(values) != len(types):
+            raise ValueError(cursor)
+        return tuple(
+            None if value is None else cast(value) for cast, value in zip(types, values)
+        )
+    except (ValueError, TypeError, binascii.Error):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="invalid cursor",
+        )
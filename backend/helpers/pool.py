@@ -0,0 +1,89 @@
+"""
+Connection pool instrumentation.
+
+``TimedQueuePool`` and ``TimedAsyncQueuePool`` record how long each checkout
+waited for a connection and keep the checked-out and overflow gauges current.
+``instrument_pool`` hooks SQLAlchemy pool events to count new connections.
+"""
+
+import time
+
+from sqlalchemy import event
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import AsyncAdaptedQueuePool, Pool, QueuePool
+
+from helpers.metrics import Counter, Gauge, Histogram
+
+pool_checkout_wait = Histogram(
+    "db_pool_checkout_wait_seconds",
+    "Time spent waiting for a pooled connection",
+    labelnames=("pool",),
+    buckets=(0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0, 30.0),
+)
+pool_checked_out = Gauge(
+    "db_pool_checked_out", "Connections currently checked out", labelnames=("pool",)
+)
+pool_overflow = Gauge(
+    "db_pool_overflow",
+    "Connections opened beyond pool_size (negative while the pool warms up)",
+    labelnames=("pool",),
+)
+pool_connects = Counter(
+    "db_pool_connects_total", "New DBAPI connections opened", labelnames=("pool",)
+)
+pool_timeouts = Counter(
+    "db_pool_checkout_timeouts_total",
+    "Checkouts that gave up after pool_timeout",
+    labelnames=("pool",),
+)
+
+
+class _TimedCheckoutMixin:
+    metrics_label = "sync"
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        except PoolTimeoutError:
+            pool_timeouts.inc(pool=self.metrics_label)
+            raise
+        finally:
+            pool_checkout_wait.observe(
+                time.perf_counter() - started, pool=self.metrics_label
+            )
+            self._update_gauges()
+
+    def _do_return_conn(self, record):
+        # the "checkin" event fires before the connection is back in the
+        # queue, so the gauges are updated here instead
+        try:
+            super()._do_return_conn(record)
+        finally:
+            self._update_gauges()
+
+    def _update_gauges(self) -> None:
+        pool_checked_out.set(self.checkedout(), pool=self.metrics_label)
+        pool_overflow.set(self.overflow(), pool=self.metrics_label)
+
+
+class TimedQueuePool(_TimedCheckoutMixin, QueuePool):
+    metrics_label = "sync"
+
+
+class TimedAsyncQueuePool(_TimedCheckoutMixin, AsyncAdaptedQueuePool):
+    metrics_label = "async"
+
+
+def instrument_pool(pool: Pool, label: str) -> None:
+    """
+    Counts the connections the pool opens through pool events.
+
+    Args:
+        pool (Pool): The pool to observe.
+        label (str): Value of the ``pool`` metrics label.
+    """
+
+    @event.listens_for(pool, "connect")
+    def on_connect(*args) -> None:
+        pool_connects.inc(pool=label)
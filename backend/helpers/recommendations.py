@@ -0,0 +1,279 @@
+"""
+"People you may know" candidates, maintained from the subscription graph.
+
+A candidate ``c`` of user ``u`` is someone followed by a user that ``u``
+follows, excluding ``u`` itself and users ``u`` already follows. Its score is
+
+    mutuals + RECOMMENDATION_TAG_WEIGHT * shared_tags
+
+where ``mutuals`` counts the users ``m`` with ``u -> m -> c`` and
+``shared_tags`` counts the tags both have. Candidates live in the
+``recommendation`` table, so reading them is one index range scan.
+
+``subscribe`` and ``unsubscribe`` keep the table current by applying the
+change in path counts caused by one edge ``u -> m``:
+    - ``u`` gains (or loses) one path to every user ``m`` follows;
+    - every follower of ``u`` gains (or loses) one path to ``m``;
+    - ``m`` stops (or starts again) being a candidate of ``u``.
+``tools/rebuild_recommendations.py`` recomputes the table from scratch, which
+also picks up tag changes and a changed weight.
+
+Attributes:
+    RECOMMENDATION_TAG_WEIGHT (float): Score added per shared tag.
+"""
+
+import os
+
+from sqlalchemy import delete, exists, func, literal, true, update
+from sqlalchemy.orm import aliased
+from sqlmodel import select
+
+from database import SessionDep
+from helpers.crud import dialect_insert, execute, save
+from models.users import (
+    Recommendation as RecommendationModel,
+    Subscription as SubscriptionModel,
+    TagsUsers as TagsUsersModel,
+    Users as UserModel,
+)
+
+RECOMMENDATION_TAG_WEIGHT = float(os.getenv("RECOMMENDATION_TAG_WEIGHT", 0.5))
+
+
+def _follows(follower, followed):
+    # aliased, so it is not correlated with the subscription rows being scanned
+    edge = aliased(SubscriptionModel)
+    return exists().where(edge.user_id_from == follower, edge.user_id_to == followed)
+
+
+def _shared_tags(user_id, candidate_id):
+    mine = aliased(TagsUsersModel)
+    theirs = aliased(TagsUsersModel)
+    return (
+        select(func.count())
+        .select_from(mine)
+        .join(theirs, theirs.tag_id == mine.tag_id)
+        .where(mine.user_id == user_id, theirs.user_id == candidate_id)
+        .scalar_subquery()
+    )
+
+
+def _add_paths(session: SessionDep, paths):
+    """
+    Adds path counts to candidates, creating the missing ones.
+
+    Args:
+        session (SessionDep): The database session.
+        paths (Select): Rows of ``(user_id, candidate_id, mutuals)``.
+
+    Returns:
+        Insert: The upsert statement.
+    """
+    paths = paths.subquery()
+    scored = select(
+        paths.c.user_id,
+        paths.c.candidate_id,
+        paths.c.mutuals,
+        _shared_tags(paths.c.user_id, paths.c.candidate_id).label("shared_tags"),
+    ).subquery()
+    statement = dialect_insert(session, RecommendationModel).from_select(
+        ["user_id", "candidate_id", "mutuals", "shared_tags", "score"],
+        select(
+            scored.c.user_id,
+            scored.c.candidate_id,
+            scored.c.mutuals,
+            scored.c.shared_tags,
+            scored.c.mutuals + RECOMMENDATION_TAG_WEIGHT * scored.c.shared_tags,
+        )
+        # SQLite needs a WHERE to tell the upsert's ON from a join constraint
+        .where(true()),
+    )
+    return statement.on_conflict_do_update(
+        index_elements=["user_id", "candidate_id"],
+        set_={
+            "mutuals": RecommendationModel.mutuals + statement.excluded.mutuals,
+            "score": RecommendationModel.score + statement.excluded.mutuals,
+        },
+    )
+
+
+async def subscribe(follower_id: int, followed_id: int, session: SessionDep) -> bool:
+    """
+    Subscribes a user to another one and updates both sides' candidates.
+
+    Args:
+        follower_id (int): The subscribing user.
+        followed_id (int): The user to follow.
+        session (SessionDep): The database session.
+
+    Returns:
+        bool: False if the subscription already existed.
+    """
+    inserted = await execute(
+        session,
+        dialect_insert(session, SubscriptionModel)
+        .values(user_id_from=follower_id, user_id_to=followed_id)
+        .on_conflict_do_nothing()
+        .returning(SubscriptionModel.user_id_to),
+    )
+    if inserted.first() is None:
+        return False
+
+    await execute(
+        session,
+        delete(RecommendationModel).where(
+            RecommendationModel.user_id == follower_id,
+            RecommendationModel.candidate_id == followed_id,
+        ),
+    )
+    # the follower reaches everyone the followed user follows
+    followed_follows = SubscriptionModel.user_id_to
+    await execute(
+        session,
+        _add_paths(
+            session,
+            select(
+                literal(follower_id).label("user_id"),
+                followed_follows.label("candidate_id"),
+                literal(1).label("mutuals"),
+            ).where(
+                SubscriptionModel.user_id_from == followed_id,
+                followed_follows != follower_id,
+                ~_follows(follower_id, followed_follows),
+            ),
+        ),
+    )
+    # and the follower's own followers now reach the followed user
+    followers = SubscriptionModel.user_id_from
+    await execute(
+        session,
+        _add_paths(
+            session,
+            select(
+                followers.label("user_id"),
+                literal(followed_id).label("candidate_id"),
+                literal(1).label("mutuals"),
+            ).where(
+                SubscriptionModel.user_id_to == follower_id,
+                followers != followed_id,
+                ~_follows(followers, followed_id),
+            ),
+        ),
+    )
+    await save(session)
+    return True
+
+
+async def unsubscribe(follower_id: int, followed_id: int, session: SessionDep) -> bool:
+    """
+    Removes a subscription and updates both sides' candidates.
+
+    Args:
+        follower_id (int): The unsubscribing user.
+        followed_id (int): The user to stop following.
+        session (SessionDep): The database session.
+
+    Returns:
+        bool: False if there was no such subscription.
+    """
+    deleted = await execute(
+        session,
+        delete(SubscriptionModel)
+        .where(
+            SubscriptionModel.user_id_from == follower_id,
+            SubscriptionModel.user_id_to == followed_id,
+        )
+        .returning(SubscriptionModel.user_id_to),
+    )
+    if deleted.first() is None:
+        return False
+
+    lose_one = {
+        "mutuals": RecommendationModel.mutuals - 1,
+        "score": RecommendationModel.score - 1,
+    }
+    await execute(
+        session,
+        update(RecommendationModel)
+        .where(
+            RecommendationModel.user_id == follower_id,
+            RecommendationModel.candidate_id.in_(
+                select(SubscriptionModel.user_id_to).where(
+                    SubscriptionModel.user_id_from == followed_id
+                )
+            ),
+        )
+        .values(lose_one),
+    )
+    await execute(
+        session,
+        update(RecommendationModel)
+        .where(
+            RecommendationModel.candidate_id == followed_id,
+            RecommendationModel.user_id.in_(
+                select(SubscriptionModel.user_id_from).where(
+                    SubscriptionModel.user_id_to == follower_id
+                )
+            ),
+        )
+        .values(lose_one),
+    )
+    await execute(
+        session,
+        delete(RecommendationModel).where(
+            (RecommendationModel.user_id == follower_id)
+            | (RecommendationModel.candidate_id == followed_id),
+            RecommendationModel.mutuals <= 0,
+        ),
+    )
+    # the user just unfollowed may still be reachable through others
+    first, second = aliased(SubscriptionModel), aliased(SubscriptionModel)
+    await execute(
+        session,
+        _add_paths(
+            session,
+            select(
+                first.user_id_from.label("user_id"),
+                second.user_id_to.label("candidate_id"),
+                func.count().label("mutuals"),
+            )
+            .join(second, second.user_id_from == first.user_id_to)
+            .where(first.user_id_from == follower_id, second.user_id_to == followed_id)
+            .group_by(first.user_id_from, second.user_id_to),
+        ),
+    )
+    await save(session)
+    return True
+
+
+async def get_recommendations(user_id: int, limit: int, session: SessionDep) -> list:
+    """
+    Lists a user's best candidates, highest score first.
+
+    Args:
+        user_id (int): The user to recommend people to.
+        limit (int): Maximum number of candidates.
+        session (SessionDep): The database session.
+
+    Returns:
+        list: Rows of ``(id, name, surname, short_status, mutuals, shared_tags, score)``.
+    """
+    result = await execute(
+        session,
+        select(
+            UserModel.id,
+            UserModel.name,
+            UserModel.surname,
+            UserModel.short_status,
+            RecommendationModel.mutuals,
+            RecommendationModel.shared_tags,
+            RecommendationModel.score,
+        )
+        .join(RecommendationModel, RecommendationModel.candidate_id == UserModel.id)
+        .where(RecommendationModel.user_id == user_id)
+        # same direction on both keys, so the index is simply read backwards
+        .order_by(
+            RecommendationModel.score.desc(), RecommendationModel.candidate_id.desc()
+        ).limit(limit),
+    )
+    return result.all()
@@ -0,0 +1,40 @@
+"""
+Read-your-writes stickiness for the read replica.
+
+``ReadSessionDep`` sends reads to ``DATABASE_REPLICA_URL``, which may lag
+behind the primary. So that a client doesn't miss its own changes, every
+successful write response sets a short-lived ``PRIMARY_COOKIE``. While a
+client carries it, its reads go to the primary as well. The state lives in
+the client, so it holds whichever worker or instance serves the next request.
+"""
+
+from starlette.datastructures import MutableHeaders
+
+from database import PRIMARY_COOKIE, REPLICA_STICKY_SECONDS
+
+SAFE_METHODS = frozenset(("GET", "HEAD", "OPTIONS"))
+
+
+class PrimaryStickinessMiddleware:
+    """
+    Pure ASGI middleware marking clients that just wrote to the primary.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self.cookie = (
+            f"{PRIMARY_COOKIE}=1; Max-Age={REPLICA_STICKY_SECONDS}; Path=/; "
+            "HttpOnly; SameSite=Lax"
+        )
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] in SAFE_METHODS:
+            await self.app(scope, receive, send)
+            return
+
+        async def send_with_cookie(message):
+            if message["type"] == "http.response.start" and message["status"] < 400:
+                MutableHeaders(scope=message).append("set-cookie", self.cookie)
+            await send(message)
+
+        await self.app(scope, receive, send_with_cookie)
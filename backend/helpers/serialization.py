@@ -0,0 +1,87 @@
+"""
+Fast JSON serialization of user payloads.
+
+With ``FAST_JSON`` enabled, list endpoints fetch plain column tuples instead
+of ORM entities, validate them with a prebuilt pydantic ``TypeAdapter`` and
+return the bytes produced by pydantic-core directly, so FastAPI does not
+validate and encode the payload a second time.
+
+``ORJSON_RESPONSES`` additionally makes ``ORJSONResponse`` the application's
+default response class. Recent FastAPI versions already serialize
+``response_model`` routes with pydantic-core, which is faster than going
+through orjson, so only enable it on older versions
+(see ``benchmarks/bench_serialization.py``).
+
+Attributes:
+    FAST_JSON (bool): Serve list endpoints through the column/TypeAdapter path.
+    ORJSON_RESPONSES (bool): Use ``ORJSONResponse`` as the default response class.
+    DEFAULT_RESPONSE_CLASS: The response class to pass to ``FastAPI``.
+"""
+
+import os
+
+import orjson
+from fastapi.datastructures import Default
+from fastapi.responses import JSONResponse, Response
+from pydantic import TypeAdapter
+
+FAST_JSON = os.getenv("FAST_JSON", "false").lower() in ("1", "true", "yes")
+ORJSON_RESPONSES = os.getenv("ORJSON_RESPONSES", "false").lower() in (
+    "1",
+    "true",
+    "yes",
+)
+
+
+class ORJSONResponse(JSONResponse):
+    """
+    JSON response rendered with orjson.
+    """
+
+    def render(self, content) -> bytes:
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+
+
+if ORJSON_RESPONSES:
+    DEFAULT_RESPONSE_CLASS = ORJSONResponse
+else:
+    # keep FastAPI's placeholder so it can serialize with pydantic-core directly
+    DEFAULT_RESPONSE_CLASS = Default(JSONResponse)
+
+
+def as_dicts(rows) -> list[dict]:
+    """
+    Converts column tuples to dicts keyed by column label.
+
+    This is several times cheaper than ``Row._asdict()`` or validating the
+    rows by attribute.
+
+    Args:
+        rows (Sequence[Row]): Rows of one result.
+
+    Returns:
+        list[dict]: One dict per row.
+    """
+    if not rows:
+        return []
+    keys = rows[0]._fields
+    return [dict(zip(keys, row)) for row in rows]
+
+
+def json_response(adapter: TypeAdapter, content, status_code: int = 200) -> Response:
+    """
+    Validates ``content`` with ``adapter`` and serializes it in one pass.
+
+    Args:
+        adapter (TypeAdapter): A prebuilt adapter for the response model.
+        content: Python data matching the model, e.g. built with ``as_dicts``.
+        status_code (int): The response status code.
+
+    Returns:
+        Response: The encoded JSON response.
+    """
+    return Response(
+        adapter.dump_json(adapter.validate_python(content)),
+        status_code=status_code,
+        media_type="application/json",
+    )
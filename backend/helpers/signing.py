@@ -0,0 +1,170 @@
+"""
+Keys that sign and verify the access tokens.
+
+Keys are read and parsed once, into the ``KeyRing`` returned by
+``get_key_ring``, rather than on every token: for the asymmetric algorithms
+(RS256, ES256, EdDSA, ...) parsing a PEM key costs as much as a signature.
+New tokens are signed with the current key, whose id goes in the ``kid``
+header. Tokens are verified with the key their ``kid`` names, so a key can be
+rotated without logging everyone out: sign with a new ``JWT_KEY_ID`` and keep
+the previous key in ``JWT_RETIRED_KEYS_DIR`` until its last tokens expire.
+
+The signing key is the PEM file ``JWT_PRIVATE_KEY_FILE`` if set, else
+``SECRET_KEY`` (for the HMAC algorithms). Each file in
+``JWT_RETIRED_KEYS_DIR`` is named by a key id and holds that key's public key
+or HMAC secret. Tokens without a ``kid`` were signed before key ids existed
+and are checked with the current key.
+
+Verified claims are kept in ``verified_token_cache`` until the token
+expires (at most ``TOKEN_CACHE_TTL_SECONDS``), so a client sending the same
+bearer token again skips the signature check.
+
+Attributes:
+    SECRET_KEY (str): The HMAC secret, when no private key file is given.
+    HASH_ALGORITHM (str): The JWT signing algorithm.
+    JWT_KEY_ID (str): The id of the current signing key.
+    JWT_PRIVATE_KEY_FILE (str): PEM file of the current private key.
+    JWT_RETIRED_KEYS_DIR (str): Directory of the keys still accepted for verification.
+    verified_token_cache (TTLCache): Claims of already verified tokens.
+"""
+
+import os
+import time
+import functools
+
+import jwt
+from jwt.exceptions import InvalidKeyError, InvalidTokenError
+
+from helpers.cache import TTLCache
+
+SECRET_KEY = os.getenv("SECRET_KEY")
+HASH_ALGORITHM = os.getenv("HASH_ALGORITHM")
+JWT_KEY_ID = os.getenv("JWT_KEY_ID", "default")
+JWT_PRIVATE_KEY_FILE = os.getenv("JWT_PRIVATE_KEY_FILE")
+JWT_RETIRED_KEYS_DIR = os.getenv("JWT_RETIRED_KEYS_DIR")
+TOKEN_CACHE_SIZE = int(os.getenv("TOKEN_CACHE_SIZE", 10_000))
+TOKEN_CACHE_TTL_SECONDS = float(os.getenv("TOKEN_CACHE_TTL_SECONDS", 900))
+
+verified_token_cache = TTLCache(
+    "verified_token", maxsize=TOKEN_CACHE_SIZE, ttl=TOKEN_CACHE_TTL_SECONDS
+)
+
+
+class KeyRing:
+    """
+    The parsed signing key and the verification keys by key id.
+
+    Args:
+        algorithm (str): The JWT algorithm of every key.
+        key_id (str): The id of the signing key.
+        signing_key (str | bytes): The HMAC secret or PEM private key.
+        retired_keys (dict[str, bytes]): Older verification keys by key id.
+    """
+
+    def __init__(
+        self,
+        algorithm: str,
+        key_id: str,
+        signing_key: str | bytes,
+        retired_keys: dict[str, bytes],
+    ):
+        self.algorithm = algorithm
+        self.key_id = key_id
+        prepare = jwt.get_algorithm_by_name(algorithm).prepare_key
+        self.signing_key = prepare(signing_key)
+        # the private key objects of the asymmetric algorithms carry their
+        # public key; an HMAC secret verifies itself
+        public_key = getattr(self.signing_key, "public_key", None)
+        self.verify_keys = {
+            kid: prepare(key) for kid, key in retired_keys.items() if kid != key_id
+        }
+        self.verify_keys[key_id] = public_key() if public_key else self.signing_key
+
+    def sign(self, claims: dict) -> str:
+        """
+        Signs the claims with the current key.
+        """
+        return jwt.encode(
+            claims,
+            self.signing_key,
+            algorithm=self.algorithm,
+            headers={"kid": self.key_id},
+        )
+
+    def verify(self, token: str) -> dict:
+        """
+        Checks the token's signature and expiry and returns its claims.
+
+        Raises:
+            InvalidTokenError: If the token is invalid, expired or signed
+                with an unknown key.
+        """
+        kid = jwt.get_unverified_header(token).get("kid", self.key_id)
+        key = self.verify_keys.get(kid)
+        if key is None:
+            raise InvalidTokenError(f"unknown key id {kid!r}")
+        return jwt.decode(token, key, algorithms=[self.algorithm])
+
+
+def _read(path: str) -> bytes:
+    with open(path, "rb") as f:
+        return f.read().strip()
+
+
+@functools.cache
+def get_key_ring() -> KeyRing:
+    """
+    Loads the keys from the environment on first use.
+
+    Returns:
+        KeyRing: The process-wide key ring.
+
+    Raises:
+        RuntimeError: If the algorithm or the signing key is missing or invalid.
+    """
+    if not HASH_ALGORITHM:
+        raise RuntimeError("missing or invalid auth settings: HASH_ALGORITHM")
+    if JWT_PRIVATE_KEY_FILE:
+        signing_key = _read(JWT_PRIVATE_KEY_FILE)
+    elif SECRET_KEY:
+        signing_key = SECRET_KEY
+    else:
+        raise RuntimeError("missing or invalid auth settings: SECRET_KEY")
+
+    retired_keys = {}
+    if JWT_RETIRED_KEYS_DIR:
+        for name in sorted(os.listdir(JWT_RETIRED_KEYS_DIR)):
+            path = os.path.join(JWT_RETIRED_KEYS_DIR, name)
+            if os.path.isfile(path) and not name.startswith("."):
+                retired_keys[os.path.splitext(name)[0]] = _read(path)
+
+    try:
+        return KeyRing(HASH_ALGORITHM, JWT_KEY_ID, signing_key, retired_keys)
+    except (InvalidKeyError, NotImplementedError, ValueError, TypeError) as e:
+        raise RuntimeError(f"invalid JWT keys for {HASH_ALGORITHM}: {e}") from e
+
+
+def decode_access_token(token: str) -> dict:
+    """
+    Returns the claims of a valid access token, verifying it only if it is
+    not in ``verified_token_cache``.
+
+    Args:
+        token (str): The JWT token.
+
+    Returns:
+        dict: The token claims.
+
+    Raises:
+        InvalidTokenError: If the token is invalid or expired.
+    """
+    claims = verified_token_cache.get(token)
+    if claims is not None:
+        return claims
+    claims = get_key_ring().verify(token)
+    ttl = TOKEN_CACHE_TTL_SECONDS
+    if "exp" in claims:
+        ttl = min(ttl, claims["exp"] - time.time())
+    if ttl > 0:
+        verified_token_cache.set(token, claims, ttl=ttl)
+    return claims
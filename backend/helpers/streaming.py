@@ -0,0 +1,71 @@
+"""
+NDJSON streaming of large query results.
+
+``ndjson_stream`` executes a statement with ``yield_per``, so PostgreSQL rows
+are fetched through a server-side cursor ``STREAM_CHUNK_SIZE`` at a time, and
+every fetched partition is encoded into one chunk of newline-delimited JSON.
+Only one partition is held in memory at a time, however large the result is.
+
+The stream checks out its own connection instead of using the request session:
+the response body is produced after the route returns, and the connection has
+to stay open until the last row was sent. Routes pass the engine from
+``database.get_read_engine`` so that streams are served by the read replica
+like the other reads.
+
+Attributes:
+    STREAM_CHUNK_SIZE (int): Rows fetched from the cursor and sent per chunk.
+    NDJSON_MEDIA_TYPE (str): Content type of the streamed responses.
+"""
+
+import os
+
+from pydantic_core import to_json
+from sqlalchemy import Select
+
+from database import DB_ASYNC, async_engine, engine
+from helpers.serialization import as_dicts
+
+STREAM_CHUNK_SIZE = int(os.getenv("STREAM_CHUNK_SIZE", 1_000))
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+
+def _encode(rows) -> bytes:
+    return b"".join(to_json(row) + b"\n" for row in as_dicts(rows))
+
+
+async def _stream_async(statement: Select, chunk_size: int, bind):
+    async with bind.connect() as connection:
+        result = await connection.stream(
+            statement.execution_options(yield_per=chunk_size)
+        )
+        async for rows in result.partitions():
+            yield _encode(rows)
+
+
+def _stream_sync(statement: Select, chunk_size: int, bind):
+    # a plain generator; StreamingResponse iterates it in the threadpool
+    with bind.connect() as connection:
+        result = connection.execute(statement.execution_options(yield_per=chunk_size))
+        for rows in result.partitions():
+            yield _encode(rows)
+
+
+def ndjson_stream(statement: Select, chunk_size: int = STREAM_CHUNK_SIZE, bind=None):
+    """
+    Streams the rows of ``statement`` as newline-delimited JSON objects.
+
+    The statement should select plain columns; each row becomes one object
+    keyed by column label.
+
+    Args:
+        statement (Select): The query to stream.
+        chunk_size (int): Rows fetched and emitted per chunk.
+        bind (AsyncEngine | Engine | None): The engine to read from; the
+            primary engine of the request kind by default.
+
+    Returns:
+        AsyncIterator[bytes] | Iterator[bytes]: Body chunks for a ``StreamingResponse``.
+    """
+    if DB_ASYNC:
+        return _stream_async(statement, chunk_size, bind or async_engine)
+    return _stream_sync(statement, chunk_size, bind or engine)
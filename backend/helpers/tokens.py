@@ -0,0 +1,414 @@
+"""
+Refresh tokens and the revocation of access tokens.
+
+Access tokens are short-lived JWTs; a client renews them with a refresh token
+instead of logging in again, so renewal costs two indexed statements and no
+bcrypt. A refresh token is a random string handed out once and stored only as
+its SHA-256 hash (it has far too much entropy to be guessed, so a slow hash
+buys nothing). Each refresh marks the presented token as used and issues the
+next one of the same family. A used token presented again means it was
+copied, and the whole family is revoked: whoever holds it has to log in.
+
+An access token revoked before it expires (on logout) gets a ``revokedtoken``
+row for its ``jti``. Each worker keeps those ids in ``revocation_filter``, a
+Bloom filter it loads on startup and tops up every
+``REVOCATION_SYNC_INTERVAL_SECONDS``, so that checking a token costs a few
+hashes and no query. Only a hit, a revoked token or the rare false positive,
+is confirmed in the database. A token revoked through another worker is
+accepted here for up to one sync interval.
+
+Attributes:
+    REFRESH_TOKEN_EXPIRE_DAYS (int): Lifetime of a refresh token family member.
+    REVOCATION_SYNC_INTERVAL_SECONDS (float): Delay between two filter syncs.
+    REVOCATION_REBUILD_INTERVAL_SECONDS (float): Delay between two full reloads,
+        which also drop expired tokens.
+    REVOCATION_FILTER_CAPACITY (int): Revoked tokens the filter is sized for.
+    REVOCATION_FILTER_ERROR_RATE (float): Target false positive rate.
+    revocation_filter (RevocationFilter): The process-wide filter.
+"""
+
+import os
+import math
+import uuid
+import asyncio
+import hashlib
+import logging
+import secrets
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import delete, update
+from sqlmodel import select
+
+from database import SessionDep, get_session
+from helpers.crud import dialect_insert, execute, save
+from helpers.metrics import Counter, Gauge
+from models.users import RefreshToken as RefreshTokenModel
+from models.users import RevokedToken as RevokedTokenModel
+
+REFRESH_TOKEN_EXPIRE_DAYS = int(os.getenv("REFRESH_TOKEN_EXPIRE_DAYS", 30))
+REVOCATION_SYNC_INTERVAL_SECONDS = float(
+    os.getenv("REVOCATION_SYNC_INTERVAL_SECONDS", 5)
+)
+REVOCATION_REBUILD_INTERVAL_SECONDS = float(
+    os.getenv("REVOCATION_REBUILD_INTERVAL_SECONDS", 3_600)
+)
+REVOCATION_FILTER_CAPACITY = int(os.getenv("REVOCATION_FILTER_CAPACITY", 100_000))
+REVOCATION_FILTER_ERROR_RATE = float(os.getenv("REVOCATION_FILTER_ERROR_RATE", 0.001))
+# revocations are fetched from a bit before the last sync, so that rows
+# committed late or stamped by a worker with a slightly different clock
+# are not missed
+REVOCATION_SYNC_OVERLAP = timedelta(seconds=30)
+
+logger = logging.getLogger("tokens")
+logger.setLevel("DEBUG")
+
+revocation_filter_tokens = Gauge(
+    "revocation_filter_tokens", "Revoked access tokens loaded in the filter"
+)
+revocation_filter_hits = Counter(
+    "revocation_filter_hits_total",
+    "Access tokens matched by the revocation filter",
+    ("result",),
+)
+revocation_sync_errors = Counter(
+    "revocation_filter_sync_errors_total", "Revocation filter syncs that failed"
+)
+refresh_token_reuse = Counter(
+    "refresh_token_reuse_total", "Used refresh tokens presented again"
+)
+
+
+class RevocationFilter:
+    """
+    A Bloom filter of revoked access token ids, synced from ``revokedtoken``.
+
+    It never misses an id it was given, but may match one it wasn't, at
+    about ``error_rate`` as long as it holds at most ``capacity`` ids.
+    """
+
+    def __init__(
+        self,
+        capacity: int,
+        error_rate: float,
+        interval: float,
+        rebuild_interval: float,
+    ):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.interval = interval
+        self.rebuild_interval = rebuild_interval
+        self._bits, self._hashes = self._empty(capacity)
+        self._count = 0
+        self._synced_at: datetime | None = None
+        self._loaded_at = 0.0
+        # ids added while a reload is running, replayed into the new filter
+        self._added: set[str] | None = None
+        self._task: asyncio.Task | None = None
+
+    def _empty(self, capacity: int) -> tuple[bytearray, int]:
+        size = math.ceil(-capacity * math.log(self.error_rate) / math.log(2) ** 2)
+        hashes = max(1, round(size / capacity * math.log(2)))
+        return bytearray((size + 7) // 8), hashes
+
+    def _positions(self, bits: bytearray, hashes: int, jti: str):
+        # double hashing: k positions from the two halves of one digest
+        digest = hashlib.blake2b(jti.encode(), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], "little")
+        second = int.from_bytes(digest[8:], "little") | 1
+        size = len(bits) * 8
+        for i in range(hashes):
+            yield (first + i * second) % size
+
+    def _set(self, bits: bytearray, hashes: int, jti: str) -> None:
+        for position in self._positions(bits, hashes, jti):
+            bits[position >> 3] |= 1 << (position & 7)
+
+    def add(self, jti: str) -> None:
+        """
+        Adds a revoked token id.
+        """
+        self._set(self._bits, self._hashes, jti)
+        self._count += 1
+        revocation_filter_tokens.set(self._count)
+        if self._added is not None:
+            self._added.add(jti)
+
+    def might_contain(self, jti: str) -> bool:
+        """
+        Returns False if the token id was certainly not revoked.
+        """
+        bits = self._bits
+        return all(
+            bits[position >> 3] & (1 << (position & 7))
+            for position in self._positions(bits, self._hashes, jti)
+        )
+
+    async def load(self) -> None:
+        """
+        Replaces the filter with every revoked token that has not expired,
+        after deleting the tokens that have.
+        """
+        started = datetime.now(timezone.utc)
+        self._added = set()
+        try:
+            async for session in get_session():
+                await execute(
+                    session,
+                    delete(RevokedTokenModel).where(
+                        RevokedTokenModel.expires_at < started
+                    ),
+                )
+                await execute(
+                    session,
+                    delete(RefreshTokenModel).where(
+                        RefreshTokenModel.expires_at < started
+                    ),
+                )
+                await save(session)
+                result = await execute(session, select(RevokedTokenModel.jti))
+                jtis = result.all()
+        finally:
+            added, self._added = self._added, None
+
+        # leave room to grow until the next reload
+        bits, hashes = self._empty(max(self.capacity, 2 * len(jtis)))
+        for jti in (*jtis, *added):
+            self._set(bits, hashes, jti)
+        self._bits, self._hashes = bits, hashes
+        self._count = len(jtis) + len(added)
+        self._synced_at = started
+        self._loaded_at = asyncio.get_running_loop().time()
+        revocation_filter_tokens.set(self._count)
+
+    async def sync(self) -> None:
+        """
+        Adds the tokens revoked since the last sync.
+        """
+        started = datetime.now(timezone.utc)
+        async for session in get_session():
+            result = await execute(
+                session,
+                select(RevokedTokenModel.jti).where(
+                    RevokedTokenModel.revoked_at
+                    >= self._synced_at - REVOCATION_SYNC_OVERLAP
+                ),
+            )
+            jtis = result.all()
+        for jti in jtis:
+            if not self.might_contain(jti):
+                self.add(jti)
+        self._synced_at = started
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                if loop.time() - self._loaded_at >= self.rebuild_interval:
+                    await self.load()
+                else:
+                    await self.sync()
+            except Exception:
+                revocation_sync_errors.inc()
+                logger.exception("revocation filter sync failed")
+
+    async def start(self) -> None:
+        """
+        Loads the filter and starts the periodic sync on the running event loop.
+        """
+        if self._task is None:
+            await self.load()
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self) -> None:
+        """
+        Stops the periodic sync.
+        """
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+revocation_filter = RevocationFilter(
+    REVOCATION_FILTER_CAPACITY,
+    REVOCATION_FILTER_ERROR_RATE,
+    REVOCATION_SYNC_INTERVAL_SECONDS,
+    REVOCATION_REBUILD_INTERVAL_SECONDS,
+)
+
+
+def new_token_id() -> str:
+    """
+    Returns a random id for the ``jti`` claim of an access token.
+    """
+    return uuid.uuid4().hex
+
+
+def _hash_token(token: str) -> str:
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+async def issue_refresh_token(
+    user_id: int, session: SessionDep, family: str | None = None
+) -> str:
+    """
+    Creates a refresh token for a user. The caller commits.
+
+    Args:
+        user_id (int): The user.
+        session (SessionDep): The database session.
+        family (str | None): The family of the token it replaces, if any.
+
+    Returns:
+        str: The refresh token, which is not stored anywhere.
+    """
+    token = secrets.token_urlsafe(32)
+    await execute(
+        session,
+        dialect_insert(session, RefreshTokenModel).values(
+            token_hash=_hash_token(token),
+            family=family or uuid.uuid4().hex,
+            user_id=user_id,
+            expires_at=datetime.now(timezone.utc)
+            + timedelta(days=REFRESH_TOKEN_EXPIRE_DAYS),
+        ),
+    )
+    return token
+
+
+async def _revoke_family(family: str, session: SessionDep) -> None:
+    # expired rather than used, so that a revoked token is not taken for a copy
+    now = datetime.now(timezone.utc)
+    await execute(
+        session,
+        update(RefreshTokenModel)
+        .where(RefreshTokenModel.family == family, RefreshTokenModel.expires_at > now)
+        .values(expires_at=now),
+    )
+
+
+async def rotate_refresh_token(
+    token: str, session: SessionDep
+) -> tuple[int, str] | None:
+    """
+    Exchanges a refresh token for the next one of its family.
+
+    The token is marked as used in the same statement that checks it, so of
+    two requests presenting it at once only one succeeds.
+
+    Args:
+        token (str): The presented refresh token.
+        session (SessionDep): The database session.
+
+    Returns:
+        tuple[int, str] | None: The user id and the new refresh token, or None
+        if the token is unknown, expired or was already used.
+    """
+    token_hash = _hash_token(token)
+    now = datetime.now(timezone.utc)
+    result = await execute(
+        session,
+        update(RefreshTokenModel)
+        .where(
+            RefreshTokenModel.token_hash == token_hash,
+            RefreshTokenModel.used_at.is_(None),
+            RefreshTokenModel.expires_at > now,
+        )
+        .values(used_at=now)
+        .returning(RefreshTokenModel.user_id, RefreshTokenModel.family),
+    )
+    rotated = result.first()
+    if rotated is None:
+        result = await execute(
+            session,
+            select(RefreshTokenModel.user_id, RefreshTokenModel.family).where(
+                RefreshTokenModel.token_hash == token_hash,
+                RefreshTokenModel.used_at.is_not(None),
+            ),
+        )
+        reused = result.first()
+        if reused is not None:
+            refresh_token_reuse.inc()
+            logger.warning(
+                f"refresh token of user {reused.user_id} reused, revoking its family"
+            )
+            await _revoke_family(reused.family, session)
+            await save(session)
+        return None
+
+    new_token = await issue_refresh_token(rotated.user_id, session, rotated.family)
+    await save(session)
+    return rotated.user_id, new_token
+
+
+async def revoke_refresh_token(token: str, user_id: int, session: SessionDep) -> None:
+    """
+    Revokes the family of a user's refresh token. The caller commits.
+
+    Args:
+        token (str): The refresh token.
+        user_id (int): The user it must belong to.
+        session (SessionDep): The database session.
+    """
+    result = await execute(
+        session,
+        select(RefreshTokenModel.family).where(
+            RefreshTokenModel.token_hash == _hash_token(token),
+            RefreshTokenModel.user_id == user_id,
+        ),
+    )
+    family = result.first()
+    if family is not None:
+        await _revoke_family(family, session)
+
+
+async def revoke_access_token(
+    jti: str, expires_at: datetime, session: SessionDep
+) -> None:
+    """
+    Revokes an access token until it expires. The caller commits.
+
+    The token is rejected by this worker right away and by the others after
+    their next sync.
+
+    Args:
+        jti (str): The token id.
+        expires_at (datetime): When the token expires.
+        session (SessionDep): The database session.
+    """
+    await execute(
+        session,
+        dialect_insert(session, RevokedTokenModel)
+        .values(jti=jti, expires_at=expires_at, revoked_at=datetime.now(timezone.utc))
+        .on_conflict_do_nothing(),
+    )
+    revocation_filter.add(jti)
+
+
+async def is_token_revoked(jti: str) -> bool:
+    """
+    Checks whether an access token was revoked.
+
+    Only tokens matched by ``revocation_filter`` reach the database; the
+    check runs on the primary, which a replica may lag behind.
+
+    Args:
+        jti (str): The token id.
+
+    Returns:
+        bool: True if the token was revoked.
+    """
+    if not revocation_filter.might_contain(jti):
+        return False
+    async for session in get_session():
+        result = await execute(
+            session,
+            select(RevokedTokenModel.jti).where(RevokedTokenModel.jti == jti),
+        )
+        revoked = result.first() is not None
+    revocation_filter_hits.inc(result="revoked" if revoked else "false_positive")
+    return revoked
@@ -1,13 +1,33 @@
 import os
+import time
+import asyncio
 import logging
 from dotenv import load_dotenv
 from contextlib import asynccontextmanager
 
-from fastapi import FastAPI
+from fastapi import FastAPI, Request, status
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, PlainTextResponse
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
 
-from routes.user import user_router
-from database import create_db_and_tables
+from routes.user import check_auth_settings, user_router
+from routes.vacancy import vacancy_router
+from database import (
+    DATABASE_REPLICA_URL,
+    DB_ASYNC,
+    async_engine,
+    bootstrap,
+    engine,
+    replica_engine,
+    warm_up_pool,
+)
+from helpers.likes import like_counter_buffer
+from helpers.tokens import revocation_filter
+from helpers.hashing import hashing_pool
+from helpers.instrumentation import MetricsMiddleware
+from helpers.replica import PrimaryStickinessMiddleware
+from helpers.metrics import Gauge, render as render_metrics
+from helpers.serialization import DEFAULT_RESPONSE_CLASS
 
 load_dotenv(override=True)
 
@@ -25,16 +45,74 @@ origins = [
 ]
 
 
-app = FastAPI()
+startup_seconds = Gauge(
+    "app_startup_seconds", "Time this worker spent in each startup step", ("step",)
+)
+
+
+async def timed_step(step: str, awaitable) -> None:
+    started = time.perf_counter()
+    await awaitable
+    startup_seconds.set(time.perf_counter() - started, step=step)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    started = time.perf_counter()
+    check_auth_settings()
+    await timed_step("bootstrap", asyncio.to_thread(bootstrap))
+    await asyncio.gather(
+        timed_step("db_pool", warm_up_pool()),
+        timed_step("hashing_pool", hashing_pool.warm_up()),
+        timed_step("revocations", revocation_filter.start()),
+    )
+    like_counter_buffer.start()
+    startup_seconds.set(time.perf_counter() - started, step="total")
+    logger.info(f"worker ready in {time.perf_counter() - started:.2f}s")
+    app.state.ready = True
+
+    yield
+
+    app.state.ready = False
+    await revocation_filter.stop()
+    # write the like counter changes still buffered in this process
+    await like_counter_buffer.stop()
+    await asyncio.to_thread(hashing_pool.shutdown)
+    await async_engine.dispose()
+    engine.dispose()
+    if replica_engine is not None:
+        if DB_ASYNC:
+            await replica_engine.dispose()
+        else:
+            replica_engine.dispose()
+
+
+app = FastAPI(lifespan=lifespan, default_response_class=DEFAULT_RESPONSE_CLASS)
+app.state.ready = False
 
 app.include_router(user_router)
+app.include_router(vacancy_router)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=origins,
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag", "Last-Modified"],
 )
+if DATABASE_REPLICA_URL:
+    app.add_middleware(PrimaryStickinessMiddleware)
+app.add_middleware(MetricsMiddleware)
+
+
+@app.exception_handler(PoolTimeoutError)
+async def pool_timeout_handler(request: Request, exc: PoolTimeoutError):
+    logger.warning(f"db pool exhausted on {request.url.path}")
+    return JSONResponse(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        content={"detail": "database is busy, try again later"},
+        headers={"Retry-After": "1"},
+    )
 
 
 @app.get("/")
@@ -46,3 +124,21 @@ async def root():
 async def pong():
     logger.info("pong")
     return "pong"
+
+
+@app.get("/ready")
+async def ready():
+    # unlike /ping, only answers once the DB and hashing pools are warm
+    if not app.state.ready:
+        return JSONResponse(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            content={"detail": "starting"},
+        )
+    return "ready"
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    return PlainTextResponse(
+        render_metrics(), media_type="text/plain; version=0.0.4; charset=utf-8"
+    )
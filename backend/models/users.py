@@ -1,12 +1,15 @@
 """
 This module defines the SQLModel models for the application, including the Users model,
-the many-to-many relationship between users and tags (TagsUsers), and the many-to-many
-relationship for user subscriptions (Subscription).
+the many-to-many relationship between users and tags (TagsUsers), the many-to-many
+relationship for user subscriptions (Subscription), the recommendations derived
+from it (Recommendation) and the refresh and revoked tokens (RefreshToken,
+RevokedToken).
 """
 
-from datetime import date, datetime
+from datetime import date, datetime, timezone
 from typing import Optional
 
+from sqlalchemy import DateTime, Index, func, literal_column, text
 from sqlmodel import SQLModel, Field, Relationship
 
 
@@ -14,6 +17,9 @@ class TagsUsers(SQLModel, table=True):
     """
     Represents the many-to-many relationship between users and tags.
     """
+
+    __table_args__ = (Index("ix_tagsusers_tag_id_user_id", "tag_id", "user_id"),)
+
     user_id: int = Field(foreign_key="users.id", primary_key=True)
     tag_id: int = Field(foreign_key="tags.id", primary_key=True)
 
@@ -22,6 +28,11 @@ class Subscription(SQLModel, table=True):
     """
     Represents the many-to-many relationship for user subscriptions.
     """
+
+    __table_args__ = (
+        Index("ix_subscription_user_id_to_user_id_from", "user_id_to", "user_id_from"),
+    )
+
     user_id_from: int = Field(foreign_key="users.id", primary_key=True)
     user_from: "Users" = Relationship(
         back_populates="subscribers",
@@ -34,10 +45,38 @@ class Subscription(SQLModel, table=True):
         sa_relationship_kwargs={"foreign_keys": "Subscription.user_id_to"},
     )
 
+
+class Recommendation(SQLModel, table=True):
+    """
+    Represents a precomputed "people you may know" candidate for a user.
+
+    Candidates are followed by users that ``user_id`` follows. ``mutuals`` counts
+    those paths and ``score`` adds a boost for the tags both users share.
+    """
+
+    # reads scan one user's candidates by score
+    __table_args__ = (
+        Index("ix_recommendation_user_id_score", "user_id", "score", "candidate_id"),
+    )
+
+    user_id: int = Field(foreign_key="users.id", primary_key=True)
+    candidate_id: int = Field(foreign_key="users.id", primary_key=True)
+    mutuals: int
+    shared_tags: int
+    score: float
+
+
 class Vacancy(SQLModel, table=True):
     """
     Represents a job vacancy.
     """
+
+    # keyset pagination of the feed by price and by holder
+    __table_args__ = (
+        Index("ix_vacancy_price_id", "price", "id"),
+        Index("ix_vacancy_vacancy_holder_id_id", "vacancy_holder_id", "id"),
+    )
+
     id: int = Field(default=None, primary_key=True)
     title: str
     description: str
@@ -45,18 +84,94 @@ class Vacancy(SQLModel, table=True):
     conditions: str
     vacancy_holder_id: int = Field(foreign_key="users.id")
     related_project: Optional[str] = None
-    vacancy_holder = Optional["Users"] = Relationship(back_populates="vacancies")
+    vacancy_holder: Optional["Users"] = Relationship(back_populates="vacancies")
+
 
 class Likes(SQLModel, table=True):
     """
     Represents the many-to-many relationship for likes between users.
     """
+
+    user_id: int = Field(foreign_key="users.id", primary_key=True)
+    user: "Users" = Relationship(
+        back_populates="likes",
+        sa_relationship_kwargs={"foreign_keys": "Likes.user_id"},
+    )
+
+    liked_user_id: int = Field(foreign_key="users.id", primary_key=True)
+
+
+class LikeCounter(SQLModel, table=True):
+    """
+    Represents the number of likes a user has received.
+
+    Maintained in batches by ``helpers.likes.like_counter_buffer``, so that
+    reads never count ``likes`` rows.
+    """
+
     user_id: int = Field(foreign_key="users.id", primary_key=True)
-    
+    likes: int = 0
+
+
+class RefreshToken(SQLModel, table=True):
+    """
+    Represents an issued refresh token, stored by its SHA-256 hash.
+
+    Every refresh replaces the token with a new one of the same ``family``;
+    ``used_at`` marks the old one, so presenting it again reveals a copy.
+    """
+
+    token_hash: str = Field(primary_key=True)
+    family: str = Field(index=True)
+    user_id: int = Field(foreign_key="users.id")
+    expires_at: datetime = Field(sa_type=DateTime(timezone=True), index=True)
+    used_at: Optional[datetime] = Field(default=None, sa_type=DateTime(timezone=True))
+
+
+class RevokedToken(SQLModel, table=True):
+    """
+    Represents an access token revoked before its expiry, by its ``jti``.
+
+    Kept until the token would have expired anyway; the workers load these
+    into ``helpers.tokens.revocation_filter``.
+    """
+
+    jti: str = Field(primary_key=True)
+    expires_at: datetime = Field(sa_type=DateTime(timezone=True), index=True)
+    revoked_at: datetime = Field(
+        default_factory=lambda: datetime.now(timezone.utc),
+        sa_type=DateTime(timezone=True),
+        index=True,
+    )
+
+
 class Users(SQLModel, table=True):
     """
     Represents a user in the system.
     """
+
+    # fetch the new version with RETURNING instead of expiring it
+    __mapper_args__ = {"eager_defaults": True}
+
+    # logins are unique; users registered with an empty or no email/phone
+    # are left out so they don't collide with each other
+    __table_args__ = (
+        Index(
+            "ix_users_email",
+            "email",
+            unique=True,
+            postgresql_where=text("email IS NOT NULL AND email <> ''"),
+            sqlite_where=text("email IS NOT NULL AND email <> ''"),
+        ),
+        Index(
+            "ix_users_phone",
+            "phone",
+            unique=True,
+            postgresql_where=text("phone IS NOT NULL AND phone <> ''"),
+            sqlite_where=text("phone IS NOT NULL AND phone <> ''"),
+        ),
+    )
+
     id: int = Field(default=None, primary_key=True)
     name: str
     surname: str
@@ -73,34 +188,48 @@ class Users(SQLModel, table=True):
 
     hashed_password: Optional[str]
 
+    # bumped on every update, by the ORM and by a trigger in PostgreSQL;
+    # profile ETags are built from it
+    version: int = Field(
+        default=1,
+        sa_column_kwargs={
+            "server_default": "1",
+            "onupdate": literal_column("version + 1"),
+        },
+    )
+    updated_at: datetime = Field(
+        default_factory=lambda: datetime.now(timezone.utc),
+        sa_type=DateTime(timezone=True),
+        sa_column_kwargs={"server_default": func.now(), "onupdate": func.now()},
+    )
+
     subscribers: list["Subscription"] = Relationship(
         back_populates="user_to",
-        sa_relationship_kwargs={
-            "foreign_keys": "Subscription.user_id_from",
-            "lazy": "selectin",
-        },
+        sa_relationship_kwargs={"foreign_keys": "Subscription.user_id_from"},
     )
     followers: list["Subscription"] = Relationship(
         back_populates="user_from",
-        sa_relationship_kwargs={
-            "foreign_keys": "Subscription.user_id_to",
-            "lazy": "selectin",
-        },
+        sa_relationship_kwargs={"foreign_keys": "Subscription.user_id_to"},
+    )
+
+    likes: list["Likes"] = Relationship(
+        back_populates="user",
+        sa_relationship_kwargs={"foreign_keys": "Likes.user_id"},
     )
-    
-    likes: list["Likes"] = Relationship(back_populates="user")
-    
+
     tags: list["Tags"] = Relationship(back_populates="users", link_model=TagsUsers)
     workreviews: list["Workreviews"] = Relationship(back_populates="user")
 
     vacancies: list["Vacancy"] = Relationship(back_populates="vacancy_holder")
 
+
 class Tags(SQLModel, table=True):
     """
     Represents a tag that can be associated with a user.
     """
+
     id: int = Field(default=None, primary_key=True)
-    name: str
+    name: str = Field(index=True, unique=True)
 
     users: list["Users"] = Relationship(back_populates="tags", link_model=TagsUsers)
 
@@ -109,6 +238,12 @@ class Workreviews(SQLModel, table=True):
     """
     Represents a work review for a user.
     """
+
+    # a user's timeline is read in (date_start, id) order
+    __table_args__ = (
+        Index("ix_workreviews_user_id_date_start_id", "user_id", "date_start", "id"),
+    )
+
     id: int = Field(default=None, primary_key=True)
     post: str
     date_start: date = Field(default=datetime.now)
@@ -1,55 +1,134 @@
 """
-    This module contains the user routes. The user routes handle user registration, login, and profile management.
-    
-    Attributes:
-        user_router (APIRouter): The FastAPI router for the user routes.
-        SECRET_KEY (str): The secret key for JWT token encoding.
-        ACCESS_TOKEN_EXPIRE_MINUTES (int): The expiration time for JWT tokens.
-        HASH_ALGORITHM (str): The hashing algorithm for passwords.
-        logger (Logger): The logger for the user routes.
-        pwd_context (CryptContext): The password hashing context.
-        oauth2_scheme (OAuth2PasswordBearer): The OAuth2 password bearer for token authentication.
-        
-    Functions:
-        get_password_hash(password) -> str: Hashes a plain password.
-        verify_password(plain_password, hashed_password) -> bool: Verifies a plain password against a hashed password.
-        create_access_token(data, expires_delta) -> str: Creates a JWT access token.
-        get_current_user(token, session) -> ResponseUser: Retrieves the current authenticated user from the token.
-        register(session, user_data) -> Token: Registers a new user and returns an access token.
-        token(user_data, session) -> Token: Authenticates a user and returns an access token.
-        me(current_user) -> ResponseUser: Retrieves the current authenticated user's details.
-        get_user(user_id, session) -> ResponseUser: Retrieves a user's details by user ID.
-        me(session, edited_user, current_user) -> str: Updates the current authenticated user's details.
-        create_review(session, review_data, current_user) -> str: Creates a new work review.
-        search_user_by_tags(tags, session) -> list[ResponseUser]: Searches for users by tags.
+This module contains the user routes. The user routes handle user registration, login, and profile management.
+
+Attributes:
+    user_router (APIRouter): The FastAPI router for the user routes.
+    ACCESS_TOKEN_EXPIRE_MINUTES (int): The expiration time for JWT tokens.
+    logger (Logger): The logger for the user routes.
+    oauth2_scheme (OAuth2PasswordBearer): The OAuth2 password bearer for token authentication.
+    current_user_cache (TTLCache): Authenticated users by id, so that most requests skip the DB lookup.
+    user_batch_adapter, user_short_page_adapter, tag_search_page_adapter (TypeAdapter): Prebuilt
+        serializers for the ``FAST_JSON`` path of the list endpoints.
+    ADMIN_USER_IDS (set[int]): Users allowed to call the admin endpoints.
+
+Functions:
+    check_auth_settings() -> None: Fails startup if the token settings are missing.
+    create_access_token(data, expires_delta) -> str: Creates a JWT access token.
+    create_tokens(user_id, session, refresh_token) -> Token: Creates an access token and a refresh token.
+    get_token_payload(token) -> dict: Decodes the access token and rejects revoked ones.
+    get_current_user(payload, session) -> CurrentUser: Retrieves the current authenticated user from the token.
+    get_admin_user(current_user) -> CurrentUser: Requires the current user to be an admin.
+    register(session, user_data) -> Token: Registers a new user and returns an access token.
+    token(user_data, session) -> Token: Authenticates a user and returns an access token.
+    refresh_token(request, session) -> Token: Exchanges a refresh token for new tokens.
+    logout(session, payload, request) -> str: Revokes the current access token and refresh token.
+    me(current_user, session) -> ResponseUser: Retrieves the current authenticated user's details.
+    my_recommendations(session, current_user, limit) -> list[RecommendedUser]: Suggests users to follow.
+    get_users_batch(ids, session) -> UserBatch: Retrieves several users by ID in one query.
+    export_users(request, admin) -> StreamingResponse: Streams every user as NDJSON.
+    search_user_by_text(session, q, limit, cursor) -> Page[TextSearchResult]: Full-text search over user profiles.
+    stream_user_by_tags(tags, request, session, mode) -> StreamingResponse: Streams every user matching the tags as NDJSON.
+    search_user_by_tags(tags, session, mode, limit, cursor) -> Page[TagSearchResult]: Searches for users by tags.
+    get_user(user_id, session, response, if_none_match, if_modified_since) -> ResponseUser: Retrieves a
+        user's details by user ID, answering conditional requests with 304.
+    get_followers(user_id, session, limit, cursor) -> Page[UserShort]: Lists the users following a user.
+    get_subscriptions(user_id, session, limit, cursor) -> Page[UserShort]: Lists the users a user follows.
+    subscribe_to_user(user_id, session, current_user) -> str: Follows a user.
+    unsubscribe_from_user(user_id, session, current_user) -> str: Stops following a user.
+    like_user(user_id, session, current_user) -> str: Likes a user.
+    unlike_user(user_id, session, current_user) -> str: Takes back a like.
+    get_likes(user_id, session) -> LikeCount: Retrieves how many likes a user has.
+    me(session, edited_user, current_user, response, if_match) -> str: Updates the current authenticated
+        user's details in one statement, optionally only if unchanged since a given version.
+    create_review(session, review_data, current_user) -> str: Creates a new work review.
+    create_reviews(session, reviews, current_user) -> list[ResponseWorkReview]: Creates several work
+        reviews at once.
+    get_workreviews(user_id, session, date_from, date_to, limit, cursor) -> Page[ResponseWorkReview]: Lists
+        a user's work reviews by start date.
 """
 
 import os
 import logging
-from datetime import timedelta, datetime, timezone
-from typing import Annotated
+from datetime import date, timedelta, datetime, timezone
+from typing import Annotated, Literal
 
-import jwt
-from pydantic import BaseModel
+from pydantic import BaseModel, TypeAdapter
+from sqlalchemy.exc import IntegrityError
 from jwt.exceptions import InvalidTokenError
-from fastapi import APIRouter, HTTPException, status, Depends
+from fastapi import APIRouter, Header, HTTPException, Query, Request, status, Depends
+from fastapi.responses import Response, StreamingResponse
 from fastapi.security import OAuth2PasswordBearer
-from passlib.context import CryptContext
 
-from database import SessionDep, select
-from models.users import TagsUsers, Tags, Users
-from shemas.user import EditedUser, RegisterUser, LoggingUser, ResponseUser, WorkReview
+from database import ReadSessionDep, SessionDep, get_read_engine
+from shemas.user import (
+    CurrentUser,
+    EditedUser,
+    LikeCount,
+    RegisterUser,
+    LoggingUser,
+    RecommendedUser,
+    ResponseUser,
+    TagSearchResult,
+    TextSearchResult,
+    UserBatch,
+    UserShort,
+    WorkReview,
+    ResponseWorkReview,
+)
+from shemas.pagination import Page
+from helpers.cache import TTLCache
+from helpers.pagination import decode_cursor, encode_cursor
+from helpers.hashing import get_password_hash, verify_password
+from helpers.streaming import NDJSON_MEDIA_TYPE, ndjson_stream
+from helpers.serialization import FAST_JSON, as_dicts, json_response
+from helpers.conditional import (
+    http_date,
+    if_match_versions,
+    is_not_modified,
+    make_etag,
+)
+from helpers.recommendations import get_recommendations, subscribe, unsubscribe
+from helpers.likes import get_like_count, like, unlike
+from helpers.signing import decode_access_token, get_key_ring
+from helpers.tokens import (
+    is_token_revoked,
+    issue_refresh_token,
+    new_token_id,
+    revoke_access_token,
+    revoke_refresh_token,
+    rotate_refresh_token,
+)
 from helpers.crud import (
+    RESPONSE_USER_COLUMNS,
     create_workreview,
+    insert_workreviews,
+    get_workreview_page,
+    export_users_statement,
+    save,
+    rollback,
+    get_tag_ids,
+    get_subscription_page,
+    search_users_by_tag_ids,
+    tag_search_statement,
+    search_users_by_text,
     get_user_by_email,
     get_user_by_phone,
     get_user_by_id,
-    create_user,
+    get_taken_login,
+    insert_user,
+    update_user,
+    get_user_version,
+    get_users_by_ids,
 )
 
-SECRET_KEY = os.getenv("SECRET_KEY")
-ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES"))
-HASH_ALGORITHM = os.getenv("HASH_ALGORITHM")
+ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", 0))
+USER_CACHE_TTL_SECONDS = float(os.getenv("USER_CACHE_TTL_SECONDS", 60))
+USER_CACHE_SIZE = int(os.getenv("USER_CACHE_SIZE", 10_000))
+USER_BATCH_MAX = 100
+WORKREVIEW_BATCH_MAX = 50
+ADMIN_USER_IDS = {
+    int(user_id) for user_id in os.getenv("ADMIN_USER_IDS", "").split(",") if user_id
+}
 
 
 logger = logging.getLogger("user_router")
@@ -62,54 +141,63 @@ user_router = APIRouter(
     responses={404: {"description": "Not found"}},
 )
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
-
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="user/token")
 
+current_user_cache = TTLCache(
+    "current_user", maxsize=USER_CACHE_SIZE, ttl=USER_CACHE_TTL_SECONDS
+)
+
+user_batch_adapter = TypeAdapter(UserBatch)
+user_short_page_adapter = TypeAdapter(Page[UserShort])
+tag_search_page_adapter = TypeAdapter(Page[TagSearchResult])
+
 
 class Token(BaseModel):
     """
-        Represents the token response model.
+    Represents the token response model.
     """
+
     access_token: str
     token_type: str
+    refresh_token: str | None = None
 
 
-class TokenData(BaseModel):
+class RefreshRequest(BaseModel):
     """
-    Represents the data contained in a JWT token.
+    Represents a refresh token presented to renew or revoke a session.
     """
-    id: int
 
+    refresh_token: str
 
-def get_password_hash(password) -> str:
-    """
-    Hashes a plain password.
-
-    Args:
-        password (str): The plain password to hash.
 
-    Returns:
-        str: The hashed password.
+class TokenData(BaseModel):
+    """
+    Represents the data contained in a JWT token.
     """
-    return pwd_context.hash(password)
 
+    id: int
 
-def verify_password(plain_password, hashed_password) -> bool:
-    """
-    Verifies a plain password against a hashed password.
 
-    Args:
-        plain_password (str): The plain password.
-        hashed_password (str): The hashed password.
+def check_auth_settings() -> None:
+    """
+    Checks the token settings read from the environment and loads the
+    signing keys, so that a misconfigured worker fails on startup instead of
+    on the first login.
 
-    Returns:
-        bool: True if the password matches, False otherwise.
+    Raises:
+        RuntimeError: If a setting or key is missing or invalid.
     """
-    return pwd_context.verify(plain_password, hashed_password)
+    if ACCESS_TOKEN_EXPIRE_MINUTES <= 0:
+        raise RuntimeError(
+            "missing or invalid auth settings: ACCESS_TOKEN_EXPIRE_MINUTES"
+        )
+    key_ring = get_key_ring()
+    key_ring.verify(key_ring.sign({}))
 
 
-def create_access_token(data: dict, expires_delta: timedelta = timedelta(minutes=15)) -> str:
+def create_access_token(
+    data: dict, expires_delta: timedelta = timedelta(minutes=15)
+) -> str:
     """
     Creates a JWT access token.
 
@@ -122,26 +210,55 @@ def create_access_token(data: dict, expires_delta: timedelta = timedelta(minutes
     """
     to_encode = data.copy()
     expire = datetime.now(timezone.utc) + expires_delta
-    to_encode.update({"exp": expire})
-    encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=HASH_ALGORITHM)
+    to_encode.update({"exp": expire, "jti": new_token_id()})
+    encoded_jwt = get_key_ring().sign(to_encode)
     return encoded_jwt
 
 
-def get_current_user(
-    token: Annotated[str, Depends(oauth2_scheme)], session: SessionDep
-) -> ResponseUser:
+async def create_tokens(
+    user_id: int, session: SessionDep, refresh_token: str | None = None
+) -> Token:
     """
-    Retrieves the current authenticated user from the token.
+    Creates an access token and, unless one is given, a new refresh token.
 
     Args:
-        token (str): The JWT token.
+        user_id (int): The user.
         session (SessionDep): The database session.
+        refresh_token (str | None): An already issued refresh token.
+
+    Returns:
+        Token: The access and refresh tokens.
+    """
+    if refresh_token is None:
+        refresh_token = await issue_refresh_token(user_id=user_id, session=session)
+        await save(session)
+    access_token = create_access_token(
+        data={"user-id": user_id},
+        expires_delta=timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES),
+    )
+    return Token(
+        access_token=access_token, token_type="bearer", refresh_token=refresh_token
+    )
+
+
+async def get_token_payload(token: Annotated[str, Depends(oauth2_scheme)]) -> dict:
+    """
+    Decodes the access token and checks that it was not revoked.
+
+    A token already verified by this worker is served from
+    ``verified_token_cache`` without checking its signature again.
+    Revocations are looked up in ``revocation_filter``, so only revoked
+    tokens and the filter's rare false positives cost a query. Tokens issued
+    without a ``jti`` cannot be revoked and stay valid until they expire.
+
+    Args:
+        token (str): The JWT token.
 
     Returns:
-        ResponseUser: The current authenticated user.
+        dict: The token claims.
 
     Raises:
-        HTTPException: If the token is invalid or the user is not found.
+        HTTPException: If the token is invalid or revoked.
     """
     bad_token_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
@@ -149,59 +266,115 @@ def get_current_user(
         headers={"WWW-Authenticate": "Bearer"},
     )
     try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[HASH_ALGORITHM])
-        user_id: str = payload.get("user-id")
-        if user_id is None:
-            raise bad_token_exception
-        user_data = TokenData(id=user_id)
+        payload = decode_access_token(token)
     except InvalidTokenError:
         raise bad_token_exception
-    user = get_user_by_id(id=user_data.id, session=session)
+    if payload.get("user-id") is None:
+        raise bad_token_exception
+    jti = payload.get("jti")
+    if jti is not None and await is_token_revoked(jti):
+        raise bad_token_exception
+    return payload
+
+
+async def get_current_user(
+    payload: Annotated[dict, Depends(get_token_payload)], session: SessionDep
+) -> CurrentUser:
+    """
+    Retrieves the current authenticated user from the token.
+
+    The user is served from ``current_user_cache`` when possible; the database
+    is only queried on a miss or after the entry expired or was invalidated.
+    Misses are read from the primary, so that a user not replicated yet can
+    log in and the cache never holds a copy older than the replica's.
+    An edit only invalidates the entry in the worker that handled it, so the
+    other workers may return a profile up to ``USER_CACHE_TTL_SECONDS`` old.
+    Endpoints that return the profile itself must revalidate it (see ``me``).
+
+    Args:
+        payload (dict): The claims of the JWT token.
+        session (SessionDep): The database session.
+
+    Returns:
+        CurrentUser: The current authenticated user.
+
+    Raises:
+        HTTPException: If the token is invalid or the user is not found.
+    """
+    user_data = TokenData(id=payload["user-id"])
+
+    current_user = current_user_cache.get(user_data.id)
+    if current_user is not None:
+        return current_user
+
+    user = await get_user_by_id(id=user_data.id, session=session)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="no such login",
             headers={"WWW-Authenticate": "Bearer"},
         )
-    return user
+    current_user = CurrentUser.model_validate(user)
+    current_user_cache.set(current_user.id, current_user)
+    return current_user
 
 
-@user_router.post("/register", response_model=Token)
-async def register(session: SessionDep, user_data: RegisterUser) -> Token:
+async def get_admin_user(
+    current_user: Annotated[CurrentUser, Depends(get_current_user)],
+) -> CurrentUser:
+    """
+    Requires the current authenticated user to be listed in ``ADMIN_USER_IDS``.
 
-    if user_data.email != "":
+    Args:
+        current_user (CurrentUser): The current authenticated user.
 
-        same_email = get_user_by_email(email=user_data.email, session=session)
+    Returns:
+        CurrentUser: The current user.
 
-        if same_email:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="email exists",
-                headers={"WWW-Authenticate": "Bearer"},
-            )
+    Raises:
+        HTTPException: If the user is not an admin.
+    """
+    if current_user.id not in ADMIN_USER_IDS:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="admin only")
+    return current_user
 
-    if user_data.phone != "":
-        same_phone = get_user_by_phone(phone=user_data.phone, session=session)
 
-        if same_phone:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="phone exists",
-                headers={"WWW-Authenticate": "Bearer"},
-            )
+@user_router.post("/register", response_model=Token)
+async def register(session: SessionDep, user_data: RegisterUser) -> Token:
+    """
+    Register a new user and return an access token.
 
-    new_user = create_user(
-        user=user_data, hashed_password=get_password_hash(user_data.password)
-    )
-    session.add(new_user)
-    session.commit()
-    logger.info(f"new user {new_user.name} created")
+    The user is inserted in one statement that skips the row if the email or
+    phone is taken; only then a second query finds out which one.
+
+    Args:
+        session (SessionDep): The database session.
+        user_data (RegisterUser): The registration data.
 
-    access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
-    user_token = create_access_token(
-        data={"user-id": new_user.id}, expires_delta=access_token_expires
+    Returns:
+        Token: The access and refresh tokens.
+
+    Raises:
+        HTTPException: If the email or phone is already registered.
+    """
+    user_id = await insert_user(
+        user=user_data,
+        hashed_password=await get_password_hash(user_data.password),
+        session=session,
     )
-    return Token(access_token=user_token, token_type="bearer")
+
+    if user_id is None:
+        taken = await get_taken_login(
+            email=user_data.email, phone=user_data.phone, session=session
+        )
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="phone exists" if taken == "phone" else "email exists",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    logger.info(f"new user {user_data.name} created")
+
+    return await create_tokens(user_id=user_id, session=session)
 
 
 @user_router.post("/token", response_model=Token)
@@ -211,13 +384,13 @@ async def token(
 ) -> Token:
     """
     Authenticate a user and return an access token.
-    
+
     Args:
         user_data (LoggingUser): The user's login data.
         session (SessionDep): The database session.
-        
+
     Returns:
-        Token: The access token.
+        Token: The access and refresh tokens.
     """
     if not (user_data.email or user_data.phone):
         raise HTTPException(
@@ -227,9 +400,9 @@ async def token(
         )
 
     if user_data.email:
-        user = get_user_by_email(email=user_data.email, session=session)
+        user = await get_user_by_email(email=user_data.email, session=session)
     elif user_data.phone:
-        user = get_user_by_phone(phone=user_data.phone, session=session)
+        user = await get_user_by_phone(phone=user_data.phone, session=session)
     else:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -244,7 +417,7 @@ async def token(
             headers={"WWW-Authenticate": "Bearer"},
         )
 
-    if not verify_password(user_data.password, user.hashed_password):
+    if not await verify_password(user_data.password, user.hashed_password):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="wrong password",
@@ -252,65 +425,699 @@ async def token(
         )
 
     logger.info(f"user {user.name} successfully logged")
-    access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
-    user_token = create_access_token(
-        data={"user-id": user.id}, expires_delta=access_token_expires
+    return await create_tokens(user_id=user.id, session=session)
+
+
+@user_router.post("/token/refresh", response_model=Token)
+async def refresh_token(request: RefreshRequest, session: SessionDep) -> Token:
+    """
+    Exchange a refresh token for a new access token and refresh token.
+
+    Unlike a login this verifies no password, so clients can renew their
+    short-lived access tokens cheaply. Each refresh token works once; using
+    one again logs out every session descended from the same login.
+
+    Args:
+        request (RefreshRequest): The refresh token.
+        session (SessionDep): The database session.
+
+    Returns:
+        Token: The new access and refresh tokens.
+
+    Raises:
+        HTTPException: If the refresh token is invalid, expired or was used.
+    """
+    rotated = await rotate_refresh_token(token=request.refresh_token, session=session)
+    if rotated is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="invalid refresh token",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    user_id, new_refresh_token = rotated
+    return await create_tokens(
+        user_id=user_id, session=session, refresh_token=new_refresh_token
     )
-    return Token(access_token=user_token, token_type="bearer")
+
+
+@user_router.post("/logout")
+async def logout(
+    session: SessionDep,
+    payload: Annotated[dict, Depends(get_token_payload)],
+    request: RefreshRequest | None = None,
+) -> str:
+    """
+    Revoke the current access token and, if given, the refresh token.
+
+    Args:
+        session (SessionDep): The database session.
+        payload (dict): The claims of the current access token.
+        request (RefreshRequest | None): The refresh token of this session.
+
+    Returns:
+        str: "success".
+    """
+    if payload.get("jti") is not None:
+        await revoke_access_token(
+            jti=payload["jti"],
+            expires_at=datetime.fromtimestamp(payload["exp"], timezone.utc),
+            session=session,
+        )
+    if request is not None:
+        await revoke_refresh_token(
+            token=request.refresh_token, user_id=payload["user-id"], session=session
+        )
+    await save(session)
+    return "success"
 
 
 @user_router.get("/me", response_model=ResponseUser)
-async def me(current_user: Annotated[ResponseUser, Depends(get_current_user)]) -> ResponseUser:
+async def me(
+    current_user: Annotated[CurrentUser, Depends(get_current_user)],
+    session: SessionDep,
+) -> ResponseUser:
     """
     Retrieve the current authenticated user's details.
 
+    The cached user is checked against the row version, so an edit made
+    through another worker is seen right away; the profile is only read
+    again when it changed. Both reads go to the primary, like the ones of
+    ``get_current_user`` filling the cache.
+
     Args:
-        current_user (ResponseUser): The current authenticated user.
+        current_user (CurrentUser): The current authenticated user.
+        session (SessionDep): The database session.
 
     Returns:
         ResponseUser: The current user's details.
+
+    Raises:
+        HTTPException: If the user was deleted since it was cached.
     """
+    current = await get_user_version(id=current_user.id, session=session)
+    if current is None:
+        current_user_cache.pop(current_user.id)
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="no such login",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    if current.version == current_user.version:
+        return current_user
+
+    user = await get_user_by_id(id=current_user.id, session=session)
+    current_user = CurrentUser.model_validate(user)
+    current_user_cache.set(current_user.id, current_user)
     return current_user
 
 
-@user_router.get("/{user_id}", response_model=ResponseUser)
-def get_user(user_id: int, session: SessionDep) -> ResponseUser:
+@user_router.get("/me/recommendations", response_model=list[RecommendedUser])
+async def my_recommendations(
+    session: ReadSessionDep,
+    current_user: Annotated[CurrentUser, Depends(get_current_user)],
+    limit: Annotated[int, Query(ge=1, le=100)] = 20,
+) -> list[RecommendedUser]:
+    """
+    Suggest users to follow: people followed by the users the current user
+    follows, ranked by how many of them do and by shared tags.
+
+    Args:
+        session (ReadSessionDep): The database session.
+        current_user (CurrentUser): The current authenticated user.
+        limit (int): Maximum number of suggestions.
+
+    Returns:
+        list[RecommendedUser]: The best candidates first.
+    """
+    rows = await get_recommendations(current_user.id, limit, session=session)
+    return [RecommendedUser.model_validate(row) for row in rows]
+
+
+@user_router.get("/batch", response_model=UserBatch)
+async def get_users_batch(
+    ids: Annotated[str, Query(description="Comma-separated user ids")],
+    session: ReadSessionDep,
+) -> UserBatch | Response:
+    """
+    Retrieve several users' details in one request.
+
+    Args:
+        ids (str): Comma-separated list of up to ``USER_BATCH_MAX`` user ids.
+        session (ReadSessionDep): The database session.
+
+    Returns:
+        UserBatch: The users found, in request order, and the ids that were not.
+    """
+    try:
+        user_ids = list(dict.fromkeys(int(user_id) for user_id in ids.split(",")))
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="ids must be comma-separated integers",
+        )
+    if len(user_ids) > USER_BATCH_MAX:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"at most {USER_BATCH_MAX} ids per request",
+        )
+
+    if FAST_JSON:
+        rows = await get_users_by_ids(
+            user_ids, session=session, columns=RESPONSE_USER_COLUMNS
+        )
+        users = {row["id"]: row for row in as_dicts(rows)}
+    else:
+        users = {
+            user.id: ResponseUser.model_validate(user, from_attributes=True)
+            for user in await get_users_by_ids(user_ids, session=session)
+        }
+    batch = {
+        "users": [users[user_id] for user_id in user_ids if user_id in users],
+        "missing": [user_id for user_id in user_ids if user_id not in users],
+    }
+    if FAST_JSON:
+        return json_response(user_batch_adapter, batch)
+    return UserBatch(**batch)
+
+
+@user_router.get("/export", response_class=StreamingResponse)
+async def export_users(
+    request: Request,
+    admin: Annotated[CurrentUser, Depends(get_admin_user)],
+) -> StreamingResponse:
+    """
+    Stream every user's details as newline-delimited JSON, in id order.
+
+    Rows are read through a server-side cursor and sent in bounded chunks, so
+    memory use does not grow with the number of users.
+
+    Args:
+        request (Request): The current request, to pick the engine to read from.
+        admin (CurrentUser): The current authenticated admin.
+
+    Returns:
+        StreamingResponse: One ``ResponseUser`` object per line.
+    """
+    return StreamingResponse(
+        ndjson_stream(export_users_statement(), bind=get_read_engine(request)),
+        media_type=NDJSON_MEDIA_TYPE,
+    )
+
+
+# registered before the /{user_id} routes, so that tags such as
+# "followers" are not taken for a user id and its sub-resource
+@user_router.get("/search/text", response_model=Page[TextSearchResult])
+async def search_user_by_text(
+    session: ReadSessionDep,
+    q: Annotated[str, Query(min_length=1, max_length=256)],
+    limit: Annotated[int, Query(ge=1, le=100)] = 20,
+    cursor: str | None = None,
+) -> Page[TextSearchResult]:
+    """
+    Full-text search over users' about_me, statuses, university and course.
+
+    Results are ordered by relevance and carry a highlighted ``headline``
+    snippet of the matching text.
+
+    Args:
+        session (ReadSessionDep): The database session.
+        q (str): Search query; supports quoted phrases, ``or`` and ``-word``.
+        limit (int): Page size.
+        cursor (str | None): ``next_cursor`` of the previous page.
+
+    Returns:
+        Page[TextSearchResult]: A page of matching users.
+    """
+    rows = await search_users_by_text(
+        q,
+        limit=limit + 1,
+        session=session,
+        after=decode_cursor(cursor, float, int) if cursor else None,
+    )
+    items = [
+        TextSearchResult.model_validate(
+            {**user.model_dump(), "rank": rank, "headline": headline}
+        )
+        for user, rank, headline in rows[:limit]
+    ]
+    next_cursor = None
+    if len(rows) > limit:
+        next_cursor = encode_cursor(items[-1].rank, items[-1].id)
+    return Page(items=items, next_cursor=next_cursor)
+
+
+@user_router.get("/search/{tags}/stream", response_class=StreamingResponse)
+async def stream_user_by_tags(
+    tags: str,
+    request: Request,
+    session: ReadSessionDep,
+    mode: Literal["any", "all"] = "any",
+) -> StreamingResponse:
+    """
+    Stream every user matching the tags as newline-delimited JSON.
+
+    Same ranking as ``search_user_by_tags``, without paging: the whole result
+    is read through a server-side cursor and sent in bounded chunks.
+
+    Args:
+        tags (str): Comma-separated list of tags to search for.
+        request (Request): The current request, to pick the engine to read from.
+        session (ReadSessionDep): The database session.
+        mode (str): ``any`` to match at least one tag, ``all`` to match every tag.
+
+    Returns:
+        StreamingResponse: One ``TagSearchResult`` object per line.
+    """
+    tag_names = list(dict.fromkeys(tag for tag in tags.split(",") if tag))
+    tag_ids = await get_tag_ids(tag_names, session=session)
+    if not tag_ids or (mode == "all" and len(tag_ids) < len(tag_names)):
+        return StreamingResponse(iter(()), media_type=NDJSON_MEDIA_TYPE)
+
+    statement = tag_search_statement(
+        list(tag_ids.values()), mode == "all", *RESPONSE_USER_COLUMNS
+    )
+    return StreamingResponse(
+        ndjson_stream(statement, bind=get_read_engine(request)),
+        media_type=NDJSON_MEDIA_TYPE,
+    )
+
+
+@user_router.get("/search/{tags}", response_model=Page[TagSearchResult])
+async def search_user_by_tags(
+    tags: str,
+    session: ReadSessionDep,
+    mode: Literal["any", "all"] = "any",
+    limit: Annotated[int, Query(ge=1, le=100)] = 20,
+    cursor: str | None = None,
+) -> Page[TagSearchResult] | Response:
+    """
+    Search for users by tags.
+
+    Users are ranked by how many of the requested tags they have. With
+    ``mode=all`` only users having every requested tag are returned.
+
+    Args:
+        tags (str): Comma-separated list of tags to search for.
+        session (ReadSessionDep): The database session.
+        mode (str): ``any`` to match at least one tag, ``all`` to match every tag.
+        limit (int): Page size.
+        cursor (str | None): ``next_cursor`` of the previous page.
+
+    Returns:
+        Page[TagSearchResult]: A page of users matching the tags.
+    """
+    tag_names = list(dict.fromkeys(tag for tag in tags.split(",") if tag))
+    tag_ids = await get_tag_ids(tag_names, session=session)
+    if not tag_ids or (mode == "all" and len(tag_ids) < len(tag_names)):
+        return Page(items=[])
+
+    rows = await search_users_by_tag_ids(
+        list(tag_ids.values()),
+        match_all=mode == "all",
+        limit=limit + 1,
+        session=session,
+        after=decode_cursor(cursor, int, int) if cursor else None,
+        columns=RESPONSE_USER_COLUMNS if FAST_JSON else None,
+    )
+    if FAST_JSON:
+        items = as_dicts(rows[:limit])
+        next_cursor = None
+        if len(rows) > limit:
+            next_cursor = encode_cursor(items[-1]["matched_tags"], items[-1]["id"])
+        return json_response(
+            tag_search_page_adapter, {"items": items, "next_cursor": next_cursor}
+        )
+    items = [
+        TagSearchResult.model_validate({**user.model_dump(), "matched_tags": matched})
+        for user, matched in rows[:limit]
+    ]
+    next_cursor = None
+    if len(rows) > limit:
+        next_cursor = encode_cursor(items[-1].matched_tags, items[-1].id)
+    return Page(items=items, next_cursor=next_cursor)
+
+
+@user_router.get(
+    "/{user_id}",
+    response_model=ResponseUser,
+    responses={304: {"description": "Not modified"}},
+)
+async def get_user(
+    user_id: int,
+    session: ReadSessionDep,
+    response: Response,
+    if_none_match: Annotated[str | None, Header()] = None,
+    if_modified_since: Annotated[str | None, Header()] = None,
+) -> ResponseUser | Response:
     """
     Retrieve a user's details by user ID.
 
+    Responses carry a strong ``ETag`` built from the user's row version and a
+    ``Last-Modified`` date. A request revalidating with ``If-None-Match`` or
+    ``If-Modified-Since`` is checked against the version alone and gets an
+    empty 304 if the profile did not change.
+
     Args:
         user_id (int): The ID of the user to retrieve.
-        session (SessionDep): The database session.
+        session (ReadSessionDep): The database session.
+        response (Response): The response, to set the validators on.
+        if_none_match (str | None): Entity tags the client has cached.
+        if_modified_since (str | None): Date of the client's cached copy.
 
     Returns:
         ResponseUser: The user's details.
+
+    Raises:
+        HTTPException: If the user is not found.
     """
-    return get_user_by_id(id=user_id, session=session)
+    if if_none_match is not None or if_modified_since is not None:
+        current = await get_user_version(id=user_id, session=session)
+        if current is not None:
+            etag = make_etag(user_id, current.version)
+            if is_not_modified(
+                etag, current.updated_at, if_none_match, if_modified_since
+            ):
+                return Response(
+                    status_code=status.HTTP_304_NOT_MODIFIED,
+                    headers={
+                        "ETag": etag,
+                        "Last-Modified": http_date(current.updated_at),
+                        "Cache-Control": "no-cache",
+                    },
+                )
+
+    user = await get_user_by_id(id=user_id, session=session)
+    if user is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="user not found"
+        )
+    response.headers["ETag"] = make_etag(user.id, user.version)
+    response.headers["Last-Modified"] = http_date(user.updated_at)
+    # let clients keep the profile but revalidate it before every use
+    response.headers["Cache-Control"] = "no-cache"
+    return user
+
+
+@user_router.get("/{user_id}/followers", response_model=Page[UserShort])
+async def get_followers(
+    user_id: int,
+    session: ReadSessionDep,
+    limit: Annotated[int, Query(ge=1, le=100)] = 50,
+    cursor: str | None = None,
+) -> Page[UserShort]:
+    """
+    List the users following a user.
+
+    Args:
+        user_id (int): The ID of the followed user.
+        session (ReadSessionDep): The database session.
+        limit (int): Page size.
+        cursor (str | None): ``next_cursor`` of the previous page.
+
+    Returns:
+        Page[UserShort]: A page of followers ordered by id.
+    """
+    return await _subscription_page(user_id, True, limit, cursor, session)
+
+
+@user_router.get("/{user_id}/subscriptions", response_model=Page[UserShort])
+async def get_subscriptions(
+    user_id: int,
+    session: ReadSessionDep,
+    limit: Annotated[int, Query(ge=1, le=100)] = 50,
+    cursor: str | None = None,
+) -> Page[UserShort]:
+    """
+    List the users a user is subscribed to.
+
+    Args:
+        user_id (int): The ID of the subscribed user.
+        session (ReadSessionDep): The database session.
+        limit (int): Page size.
+        cursor (str | None): ``next_cursor`` of the previous page.
+
+    Returns:
+        Page[UserShort]: A page of subscriptions ordered by id.
+    """
+    return await _subscription_page(user_id, False, limit, cursor, session)
+
+
+async def _subscription_page(
+    user_id: int, followers: bool, limit: int, cursor: str | None, session
+) -> Page[UserShort] | Response:
+    rows = await get_subscription_page(
+        user_id,
+        followers=followers,
+        limit=limit + 1,
+        session=session,
+        after=decode_cursor(cursor, int)[0] if cursor else None,
+    )
+    if FAST_JSON:
+        items = as_dicts(rows[:limit])
+        next_cursor = encode_cursor(items[-1]["id"]) if len(rows) > limit else None
+        return json_response(
+            user_short_page_adapter, {"items": items, "next_cursor": next_cursor}
+        )
+    items = [UserShort.model_validate(row) for row in rows[:limit]]
+    next_cursor = encode_cursor(items[-1].id) if len(rows) > limit else None
+    return Page(items=items, next_cursor=next_cursor)
 
 
-@user_router.patch("/me")
+@user_router.post("/{user_id}/subscribe")
+async def subscribe_to_user(
+    user_id: int,
+    session: SessionDep,
+    current_user: Annotated[CurrentUser, Depends(get_current_user)],
+) -> str:
+    """
+    Follow a user. Following someone already followed is a no-op.
+
+    Args:
+        user_id (int): The ID of the user to follow.
+        session (SessionDep): The database session.
+        current_user (CurrentUser): The current authenticated user.
+
+    Returns:
+        str: Success message.
+
+    Raises:
+        HTTPException: If the user is the current user or does not exist.
+    """
+    if user_id == current_user.id:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="cannot subscribe to yourself",
+        )
+    if await get_user_version(id=user_id, session=session) is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="user not found"
+        )
+
+    await subscribe(current_user.id, user_id, session=session)
+    return "success"
+
+
+@user_router.delete("/{user_id}/subscribe")
+async def unsubscribe_from_user(
+    user_id: int,
+    session: SessionDep,
+    current_user: Annotated[CurrentUser, Depends(get_current_user)],
+) -> str:
+    """
+    Stop following a user. Unfollowing someone not followed is a no-op.
+
+    Args:
+        user_id (int): The ID of the user to stop following.
+        session (SessionDep): The database session.
+        current_user (CurrentUser): The current authenticated user.
+
+    Returns:
+        str: Success message.
+    """
+    await unsubscribe(current_user.id, user_id, session=session)
+    return "success"
+
+
+@user_router.get("/{user_id}/workreviews", response_model=Page[ResponseWorkReview])
+async def get_workreviews(
+    user_id: int,
+    session: ReadSessionDep,
+    date_from: date | None = None,
+    date_to: date | None = None,
+    limit: Annotated[int, Query(ge=1, le=100)] = 20,
+    cursor: str | None = None,
+) -> Page[ResponseWorkReview]:
+    """
+    List a user's work reviews ordered by start date, oldest first.
+
+    Args:
+        user_id (int): The ID of the user.
+        session (ReadSessionDep): The database session.
+        date_from (date | None): Only reviews starting on or after this date.
+        date_to (date | None): Only reviews starting on or before this date.
+        limit (int): Page size.
+        cursor (str | None): ``next_cursor`` of the previous page.
+
+    Returns:
+        Page[ResponseWorkReview]: A page of work reviews.
+    """
+    after = decode_cursor(cursor, date.fromisoformat, int) if cursor else None
+    reviews = await get_workreview_page(
+        user_id,
+        limit + 1,
+        session=session,
+        date_from=date_from,
+        date_to=date_to,
+        after=after,
+    )
+    items = [ResponseWorkReview.model_validate(review) for review in reviews[:limit]]
+    next_cursor = None
+    if len(reviews) > limit:
+        next_cursor = encode_cursor(items[-1].date_start.isoformat(), items[-1].id)
+    return Page(items=items, next_cursor=next_cursor)
+
+
+@user_router.post("/{user_id}/like")
+async def like_user(
+    user_id: int,
+    session: SessionDep,
+    current_user: Annotated[CurrentUser, Depends(get_current_user)],
+) -> str:
+    """
+    Like a user. Liking someone already liked is a no-op.
+
+    Args:
+        user_id (int): The ID of the user to like.
+        session (SessionDep): The database session.
+        current_user (CurrentUser): The current authenticated user.
+
+    Returns:
+        str: Success message.
+
+    Raises:
+        HTTPException: If the user is the current user or does not exist.
+    """
+    if user_id == current_user.id:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="cannot like yourself"
+        )
+    if await get_user_version(id=user_id, session=session) is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="user not found"
+        )
+
+    await like(current_user.id, user_id, session=session)
+    return "success"
+
+
+@user_router.delete("/{user_id}/like")
+async def unlike_user(
+    user_id: int,
+    session: SessionDep,
+    current_user: Annotated[CurrentUser, Depends(get_current_user)],
+) -> str:
+    """
+    Take back a like. Unliking someone not liked is a no-op.
+
+    Args:
+        user_id (int): The ID of the liked user.
+        session (SessionDep): The database session.
+        current_user (CurrentUser): The current authenticated user.
+
+    Returns:
+        str: Success message.
+    """
+    await unlike(current_user.id, user_id, session=session)
+    return "success"
+
+
+@user_router.get("/{user_id}/likes", response_model=LikeCount)
+async def get_likes(user_id: int, session: ReadSessionDep) -> LikeCount:
+    """
+    Retrieve how many likes a user has received.
+
+    The count comes from the user's counter row; changes are written behind
+    and may take ``LIKE_FLUSH_INTERVAL_SECONDS`` to show up in other workers.
+
+    Args:
+        user_id (int): The ID of the user.
+        session (ReadSessionDep): The database session.
+
+    Returns:
+        LikeCount: The user's like count.
+    """
+    likes = await get_like_count(user_id, session=session)
+    return LikeCount(user_id=user_id, likes=likes)
+
+
+@user_router.patch("/me", responses={412: {"description": "Profile was modified"}})
 async def me(
     session: SessionDep,
     edited_user: EditedUser,
-    current_user: Annotated[ResponseUser, Depends(get_current_user)],
+    current_user: Annotated[CurrentUser, Depends(get_current_user)],
+    response: Response,
+    if_match: Annotated[str | None, Header()] = None,
 ) -> str:
     """
     Update the current authenticated user's details.
 
+    Only the fields present in the request are written, in a single UPDATE.
+    With ``If-Match`` set to the profile's ``ETag`` (from ``GET /user/{id}``)
+    the update only applies if nobody changed the profile since, and fails
+    with 412 otherwise. The new ``ETag`` is returned for the next edit.
+
     Args:
         session (SessionDep): The database session.
         edited_user (EditedUser): The user data to update.
-        current_user (ResponseUser): The current authenticated user.
+        current_user (CurrentUser): The current authenticated user.
+        response (Response): The response, to set the new ``ETag`` on.
+        if_match (str | None): Entity tags of the version being edited.
 
     Returns:
         str: Status message.
+
+    Raises:
+        HTTPException: If the profile does not match ``If-Match``, or the new
+            email or phone is already registered.
     """
-    for key in edited_user.model_fields_set:
-        current_user[key] = edited_user[key]
+    versions = None
+    if if_match is not None:
+        versions = if_match_versions(if_match, current_user.id)
+    values = edited_user.model_dump(include=edited_user.model_fields_set)
+
+    if not values:
+        # nothing to write, but the precondition still has to hold
+        updated = await get_user_version(id=current_user.id, session=session)
+        if updated is not None and versions is not None:
+            updated = updated if updated.version in versions else None
+    elif versions == []:
+        updated = None
+    else:
+        try:
+            updated = await update_user(
+                id=current_user.id, values=values, session=session, versions=versions
+            )
+        except IntegrityError:
+            # the email or phone belongs to someone else (unique indexes)
+            await rollback(session)
+            taken = await get_taken_login(
+                email=values.get("email"),
+                phone=values.get("phone"),
+                session=session,
+                exclude_id=current_user.id,
+            )
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="phone exists" if taken == "phone" else "email exists",
+            )
+        current_user_cache.pop(current_user.id)
 
-    session.add(current_user)
-    session.commit()
-    session.refresh(current_user)
+    if updated is None:
+        raise HTTPException(
+            status_code=status.HTTP_412_PRECONDITION_FAILED,
+            detail="profile was modified",
+        )
+    response.headers["ETag"] = make_etag(current_user.id, updated.version)
     return "success"
 
 
@@ -318,7 +1125,7 @@ async def me(
 async def create_review(
     session: SessionDep,
     review_data: WorkReview,
-    current_user: Annotated[ResponseUser, Depends(get_current_user)],
+    current_user: Annotated[CurrentUser, Depends(get_current_user)],
 ) -> str:
     """
     Create a new work review.
@@ -326,35 +1133,45 @@ async def create_review(
     Args:
         session (SessionDep): The database session.
         review_data (WorkReview): The work review data.
-        current_user (ResponseUser): The current authenticated user.
+        current_user (CurrentUser): The current authenticated user.
 
     Returns:
         str: Success message.
     """
     new_review = create_workreview(review_data, current_user.id)
 
-    session.add(new_review)
-    session.commit()
+    await save(session, new_review)
     return "success"
 
 
-@user_router.get("/search/{tags}", response_model=list[ResponseUser])
-async def search_user_by_tags(tags: str, session: SessionDep) -> list[ResponseUser]:
+@user_router.post(
+    "/workreviews",
+    response_model=list[ResponseWorkReview],
+    status_code=status.HTTP_201_CREATED,
+)
+async def create_reviews(
+    session: SessionDep,
+    reviews: list[WorkReview],
+    current_user: Annotated[CurrentUser, Depends(get_current_user)],
+) -> list[ResponseWorkReview]:
     """
-    Search for users by tags.
+    Create several work reviews at once, e.g. when importing a résumé.
+
+    All reviews are inserted in one statement and transaction.
 
     Args:
-        tags (str): Comma-separated list of tags to search for.
         session (SessionDep): The database session.
+        reviews (list[WorkReview]): Up to ``WORKREVIEW_BATCH_MAX`` work reviews.
+        current_user (CurrentUser): The current authenticated user.
 
     Returns:
-        list[ResponseUser]: List of users matching the tags.
-    """
-    tag_list = tags.split(",")
-    users = session.exec(
-        select(Users)
-        .join(TagsUsers)
-        .join(Tags)
-        .where(Tags.name.in_(tag_list))
-    ).all()
-    return users
+        list[ResponseWorkReview]: The created reviews, ordered by start date.
+    """
+    if not 0 < len(reviews) <= WORKREVIEW_BATCH_MAX:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"between 1 and {WORKREVIEW_BATCH_MAX} reviews per request",
+        )
+
+    created = await insert_workreviews(reviews, current_user.id, session=session)
+    return [ResponseWorkReview.model_validate(review) for review in created]
@@ -0,0 +1,141 @@
+"""
+This module contains the vacancy routes. The vacancy routes handle publishing vacancies and browsing the vacancy feed.
+
+Attributes:
+    vacancy_router (APIRouter): The FastAPI router for the vacancy routes.
+    logger (Logger): The logger for the vacancy routes.
+
+Functions:
+    create(session, vacancy_data, current_user) -> ResponseVacancy: Publishes a vacancy held by the current user.
+    list_feed(session, order, min_price, max_price, holder_id, q, limit, cursor) -> Page[ResponseVacancy]: Lists
+        vacancies matching the filters.
+    get_vacancy(vacancy_id, session) -> ResponseVacancy: Retrieves a vacancy by ID.
+"""
+
+import logging
+from typing import Annotated, Literal
+
+from fastapi import APIRouter, HTTPException, Query, status, Depends
+
+from database import ReadSessionDep, SessionDep
+from routes.user import get_current_user
+from shemas.user import CurrentUser
+from shemas.vacancy import CreateVacancy, ResponseVacancy
+from shemas.pagination import Page
+from helpers.pagination import decode_cursor, encode_cursor
+from helpers.crud import create_vacancy, get_vacancy_by_id, list_vacancies, save
+
+logger = logging.getLogger("vacancy_router")
+logger.setLevel("DEBUG")
+
+
+vacancy_router = APIRouter(
+    prefix="/vacancy",
+    tags=["vacancy"],
+    responses={404: {"description": "Not found"}},
+)
+
+
+@vacancy_router.post(
+    "", response_model=ResponseVacancy, status_code=status.HTTP_201_CREATED
+)
+async def create(
+    session: SessionDep,
+    vacancy_data: CreateVacancy,
+    current_user: Annotated[CurrentUser, Depends(get_current_user)],
+) -> ResponseVacancy:
+    """
+    Publish a vacancy held by the current user.
+
+    Args:
+        session (SessionDep): The database session.
+        vacancy_data (CreateVacancy): The vacancy data.
+        current_user (CurrentUser): The current authenticated user.
+
+    Returns:
+        ResponseVacancy: The created vacancy.
+    """
+    new_vacancy = create_vacancy(vacancy_data, current_user.id)
+
+    await save(session, new_vacancy)
+    logger.info(f"vacancy {new_vacancy.id} published by user {current_user.id}")
+    return ResponseVacancy.model_validate(new_vacancy)
+
+
+@vacancy_router.get("", response_model=Page[ResponseVacancy])
+async def list_feed(
+    session: ReadSessionDep,
+    order: Literal["newest", "price_asc", "price_desc"] = "newest",
+    min_price: Annotated[float | None, Query(ge=0)] = None,
+    max_price: Annotated[float | None, Query(ge=0)] = None,
+    holder_id: int | None = None,
+    q: Annotated[str | None, Query(min_length=1, max_length=256)] = None,
+    limit: Annotated[int, Query(ge=1, le=100)] = 20,
+    cursor: str | None = None,
+) -> Page[ResponseVacancy]:
+    """
+    List vacancies matching the filters.
+
+    Pages are keyset-paginated: pass ``next_cursor`` back together with the
+    same filters and order to get the next page.
+
+    Args:
+        session (ReadSessionDep): The database session.
+        order (str): ``newest`` first, or by price ascending or descending.
+        min_price (float | None): Lowest price, inclusive.
+        max_price (float | None): Highest price, inclusive.
+        holder_id (int | None): Only vacancies published by this user.
+        q (str | None): Full-text query over title and description.
+        limit (int): Page size.
+        cursor (str | None): ``next_cursor`` of the previous page.
+
+    Returns:
+        Page[ResponseVacancy]: A page of vacancies.
+    """
+    after = None
+    if cursor:
+        key_types = (int,) if order == "newest" else (float, int)
+        after = decode_cursor(cursor, *key_types)
+
+    vacancies = await list_vacancies(
+        limit + 1,
+        session=session,
+        order=order,
+        min_price=min_price,
+        max_price=max_price,
+        holder_id=holder_id,
+        text=q,
+        after=after,
+    )
+    items = [ResponseVacancy.model_validate(vacancy) for vacancy in vacancies[:limit]]
+    next_cursor = None
+    if len(vacancies) > limit:
+        last = items[-1]
+        if order == "newest":
+            next_cursor = encode_cursor(last.id)
+        else:
+            next_cursor = encode_cursor(last.price, last.id)
+    return Page(items=items, next_cursor=next_cursor)
+
+
+@vacancy_router.get("/{vacancy_id}", response_model=ResponseVacancy)
+async def get_vacancy(vacancy_id: int, session: ReadSessionDep) -> ResponseVacancy:
+    """
+    Retrieve a vacancy by ID.
+
+    Args:
+        vacancy_id (int): The ID of the vacancy.
+        session (ReadSessionDep): The database session.
+
+    Returns:
+        ResponseVacancy: The vacancy.
+
+    Raises:
+        HTTPException: If the vacancy is not found.
+    """
+    vacancy = await get_vacancy_by_id(id=vacancy_id, session=session)
+    if vacancy is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="vacancy not found"
+        )
+    return ResponseVacancy.model_validate(vacancy)
@@ -0,0 +1,74 @@
+"""
+Serves the app with one uvicorn worker process per core.
+
+A single process can only use one core, and bcrypt, JSON encoding and the
+request handlers all compete for it. Here uvicorn's supervisor runs
+``WEB_CONCURRENCY`` workers (default: the CPU count) on a shared socket and
+replaces any worker that dies. Each worker retires after about
+``WEB_MAX_REQUESTS`` requests, with up to ``WEB_MAX_REQUESTS_JITTER`` more so
+that workers don't all restart at once, and gets ``WEB_GRACEFUL_TIMEOUT``
+seconds to finish its requests and run the lifespan shutdown. ``kill -HUP``
+replaces the workers one by one, each only after its replacement is ready.
+
+The worker count is exported as ``WEB_CONCURRENCY`` so that every worker
+sizes its database pools from the same ``DB_CONNECTION_BUDGET`` (see
+``database``).
+
+Usage (from the backend directory):
+    python serve.py --port 80 --workers 4
+"""
+
+import os
+import logging
+import argparse
+
+import uvicorn
+from dotenv import load_dotenv
+
+load_dotenv(override=True)
+
+WEB_CONCURRENCY = int(os.getenv("WEB_CONCURRENCY") or os.cpu_count() or 1)
+WEB_MAX_REQUESTS = int(os.getenv("WEB_MAX_REQUESTS", 10_000))
+WEB_MAX_REQUESTS_JITTER = int(os.getenv("WEB_MAX_REQUESTS_JITTER", 1_000))
+WEB_GRACEFUL_TIMEOUT = int(os.getenv("WEB_GRACEFUL_TIMEOUT", 30))
+# how long a worker may take to answer the supervisor's health check, and to
+# start up during a ``kill -HUP`` restart; a retired worker can also go
+# unnoticed for this long before it is replaced, so keep it short
+WEB_WORKER_TIMEOUT = int(os.getenv("WEB_WORKER_TIMEOUT", 10))
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+
+logging.basicConfig(
+    format="%(levelname)s:%(asctime)s:%(message)s", datefmt="%d/%m/%Y %I:%M:%S %p"
+)
+logger = logging.getLogger("serve")
+logger.setLevel("INFO")
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", type=int, default=WEB_CONCURRENCY)
+    args = parser.parse_args(argv)
+
+    os.environ["WEB_CONCURRENCY"] = str(args.workers)
+    logger.info(f"serving on {args.host}:{args.port} with {args.workers} workers")
+
+    # a lone worker runs without the supervisor, so nothing would restart it
+    recycle = args.workers > 1 and WEB_MAX_REQUESTS > 0
+    uvicorn.run(
+        "main:app",
+        app_dir=BACKEND_DIR,
+        host=args.host,
+        port=args.port,
+        workers=args.workers,
+        limit_max_requests=WEB_MAX_REQUESTS if recycle else None,
+        limit_max_requests_jitter=WEB_MAX_REQUESTS_JITTER if recycle else 0,
+        timeout_graceful_shutdown=WEB_GRACEFUL_TIMEOUT,
+        timeout_worker_healthcheck=WEB_WORKER_TIMEOUT,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,7 @@
 from typing import Annotated, Optional, ClassVar
 from datetime import date
 
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict, field_validator
 
 
 class LoggingUser(BaseModel):
@@ -31,8 +31,67 @@ class ResponseUser(BaseModel):
     links: Optional[str]
 
 
-class EditedUser(ResponseUser):
-    pass
+class UserBatch(BaseModel):
+    users: list[ResponseUser]
+    missing: list[int]
+
+
+class UserShort(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    id: int
+    name: Optional[str]
+    surname: Optional[str]
+    short_status: Optional[str]
+
+
+class RecommendedUser(UserShort):
+    mutuals: int
+    shared_tags: int
+    score: float
+
+
+class LikeCount(BaseModel):
+    user_id: int
+    likes: int
+
+
+class CurrentUser(ResponseUser):
+    model_config = ConfigDict(frozen=True, from_attributes=True)
+
+    version: int
+
+
+class TagSearchResult(ResponseUser):
+    matched_tags: int
+
+
+class TextSearchResult(ResponseUser):
+    rank: float
+    headline: str
+
+
+class EditedUser(BaseModel):
+    name: Optional[str] = None
+    surname: Optional[str] = None
+    last_name: Optional[str] = None
+    email: Optional[str] = None
+    phone: Optional[str] = None
+    university: Optional[str] = None
+    birthdate: Optional[date] = None
+    course: Optional[str] = None
+    short_status: Optional[str] = None
+    full_status: Optional[str] = None
+    about_me: Optional[str] = None
+    links: Optional[str] = None
+
+    # may be left out, but not cleared: the columns are NOT NULL
+    @field_validator("name", "surname")
+    @classmethod
+    def not_null(cls, value: Optional[str]) -> str:
+        if value is None:
+            raise ValueError("may not be null")
+        return value
 
 
 class WorkReview(BaseModel):
@@ -41,3 +100,10 @@ class WorkReview(BaseModel):
     date_end: Optional[date]
     company_name: str
     subcompany_name: Optional[str]
+
+
+class ResponseWorkReview(WorkReview):
+    model_config = ConfigDict(from_attributes=True)
+
+    id: int
+    date_start: date
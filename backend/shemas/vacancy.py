@@ -0,0 +1,23 @@
+from typing import Optional
+
+from pydantic import BaseModel, ConfigDict, Field
+
+
+class CreateVacancy(BaseModel):
+    title: str = Field(min_length=1, max_length=256)
+    description: str
+    price: float = Field(ge=0)
+    conditions: str
+    related_project: Optional[str] = None
+
+
+class ResponseVacancy(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    id: int
+    title: str
+    description: str
+    price: float
+    conditions: str
+    vacancy_holder_id: int
+    related_project: Optional[str]
@@ -0,0 +1,138 @@
+"""
+Shared fixtures of the backend tests.
+
+The application reads its settings from the environment when its modules are
+imported, so they are set here first: the tests run against a throwaway
+SQLite database, with the HMAC test key and with the background like and
+revocation flushes slowed down so that tests run them explicitly.
+Run the suite with DB_ASYNC=false to cover the blocking session path.
+"""
+
+import os
+import sys
+import tempfile
+from datetime import timedelta
+
+import pytest
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+DATABASE_PATH = os.path.join(tempfile.mkdtemp(prefix="pautinka-tests-"), "test.db")
+
+os.environ["DATABASE_URL"] = f"sqlite:///{DATABASE_PATH}"
+os.environ["SECRET_KEY"] = "test-secret-key-of-at-least-32-bytes"
+os.environ["HASH_ALGORITHM"] = "HS256"
+os.environ["ACCESS_TOKEN_EXPIRE_MINUTES"] = "30"
+os.environ["DB_SCHEMA_CHECK"] = "false"
+os.environ["HASH_POOL_SIZE"] = "1"
+os.environ["LIKE_FLUSH_INTERVAL_SECONDS"] = "3600"
+os.environ["REVOCATION_SYNC_INTERVAL_SECONDS"] = "3600"
+os.environ.pop("DATABASE_REPLICA_URL", None)
+os.environ.pop("ROOT_NAME", None)
+
+from fastapi.testclient import TestClient  # noqa: E402
+from sqlmodel import Session, SQLModel, delete, select  # noqa: E402
+
+import database  # noqa: E402
+from main import app  # noqa: E402
+from models.users import Tags, TagsUsers, Users  # noqa: E402
+from helpers.crud import tag_id_cache  # noqa: E402
+from helpers.likes import like_counter_buffer  # noqa: E402
+from helpers.signing import verified_token_cache  # noqa: E402
+from routes.user import create_access_token, current_user_cache  # noqa: E402
+
+# database.py loads a .env file over the environment; never run against it
+if database.engine.url.database != DATABASE_PATH:
+    pytest.exit(f"DATABASE_URL is overridden by a .env file: {database.engine.url}")
+
+PASSWORD = "password"
+_password_hash = None
+
+
+@pytest.fixture(scope="session", autouse=True)
+def tables():
+    SQLModel.metadata.create_all(database.engine)
+    yield
+    database.engine.dispose()
+
+
+@pytest.fixture(autouse=True)
+def clean_database():
+    yield
+    with Session(database.engine) as session:
+        for table in reversed(SQLModel.metadata.sorted_tables):
+            session.exec(delete(table))
+        session.commit()
+    current_user_cache.clear()
+    verified_token_cache.clear()
+    tag_id_cache.clear()
+    like_counter_buffer._deltas.clear()
+
+
+@pytest.fixture(scope="session")
+def client():
+    with TestClient(app) as client:
+        yield client
+
+
+@pytest.fixture
+def session():
+    with Session(database.engine) as session:
+        yield session
+
+
+@pytest.fixture
+def make_user(session):
+    """
+    Inserts a user directly and returns its id; the password is ``PASSWORD``.
+    """
+
+    def make(**fields) -> int:
+        global _password_hash
+        if _password_hash is None:
+            from helpers.hashing import pwd_context
+
+            _password_hash = pwd_context.hash(PASSWORD)
+        fields.setdefault("name", "Name")
+        fields.setdefault("surname", "Surname")
+        user = Users(hashed_password=_password_hash, **fields)
+        session.add(user)
+        session.commit()
+        return user.id
+
+    return make
+
+
+@pytest.fixture
+def tag_user(session):
+    """
+    Gives a user the named tags, creating the missing ones.
+    """
+
+    def tag(user_id: int, *names: str) -> None:
+        for name in names:
+            tag = session.exec(select(Tags).where(Tags.name == name)).first()
+            if tag is None:
+                tag = Tags(name=name)
+                session.add(tag)
+                session.flush()
+            session.add(TagsUsers(user_id=user_id, tag_id=tag.id))
+        session.commit()
+
+    return tag
+
+
+@pytest.fixture
+def auth_headers():
+    """
+    Returns the Authorization header of a fresh access token for a user.
+    """
+
+    def headers(user_id: int) -> dict:
+        token = create_access_token(
+            data={"user-id": user_id}, expires_delta=timedelta(minutes=30)
+        )
+        return {"Authorization": f"Bearer {token}"}
+
+    return headers
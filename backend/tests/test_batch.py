@@ -0,0 +1,31 @@
+from routes.user import USER_BATCH_MAX
+
+
+def test_batch_keeps_request_order(client, make_user):
+    first, second, third = make_user(), make_user(), make_user()
+    response = client.get("/user/batch", params={"ids": f"{third},{first},{second}"})
+    assert response.status_code == 200
+    assert [user["id"] for user in response.json()["users"]] == [third, first, second]
+    assert response.json()["missing"] == []
+
+
+def test_batch_lists_missing_ids_once(client, make_user):
+    user = make_user(name="Ivan")
+    response = client.get("/user/batch", params={"ids": f"{user},999,{user},999"})
+    assert response.json()["missing"] == [999]
+    (found,) = response.json()["users"]
+    assert found["name"] == "Ivan"
+    assert "hashed_password" not in found
+
+
+def test_batch_rejects_malformed_ids(client):
+    response = client.get("/user/batch", params={"ids": "1,two"})
+    assert response.status_code == 400
+    assert response.json()["detail"] == "ids must be comma-separated integers"
+
+
+def test_batch_limit(client):
+    ids = ",".join(str(i) for i in range(1, USER_BATCH_MAX + 1))
+    assert client.get("/user/batch", params={"ids": ids}).status_code == 200
+    ids += f",{USER_BATCH_MAX + 1}"
+    assert client.get("/user/batch", params={"ids": ids}).status_code == 400
@@ -0,0 +1,71 @@
+import os
+
+import pytest
+from sqlalchemy import create_engine, func, select, text
+
+from benchmarks.bench_api import (
+    QueryCounter,
+    compare,
+    configure_environment,
+    percentile,
+    seed,
+)
+from models.users import TagsUsers, Users
+
+
+def test_percentile():
+    values = [float(i) for i in range(1, 101)]
+    assert percentile(values, 0.5) == 51.0
+    assert percentile(values, 0.99) == 99.0
+    assert percentile(values, 1.0) == 100.0
+    assert percentile([3.0], 0.95) == 3.0
+
+
+def result(p95_ms, rps):
+    return {
+        "scenarios": {"me": {"p95_ms": p95_ms, "rps": rps, "queries_per_request": 1}}
+    }
+
+
+def test_compare_flags_regressions():
+    assert not compare(result(10, 100), result(10.5, 98), threshold=0.1)
+    assert compare(result(10, 100), result(12, 100), threshold=0.1)
+    assert compare(result(10, 100), result(10, 80), threshold=0.1)
+
+
+def test_compare_skips_new_scenarios():
+    assert not compare({"scenarios": {}}, result(10, 100), threshold=0.1)
+
+
+def test_seed_is_deterministic(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'bench.db'}")
+    counter = QueryCounter(engine)
+    tag_sets = []
+    for _ in range(2):
+        seed(engine, users=20, tags=5, tags_per_user=2, password_hash="x")
+        with engine.connect() as connection:
+            assert connection.scalar(select(func.count()).select_from(Users)) == 20
+            tag_sets.append(
+                connection.execute(
+                    select(TagsUsers.user_id, TagsUsers.tag_id).order_by(
+                        TagsUsers.user_id, TagsUsers.tag_id
+                    )
+                ).all()
+            )
+    assert len(tag_sets[0]) == 40
+    assert tag_sets[0] == tag_sets[1]
+
+    before = counter.count
+    with engine.connect() as connection:
+        connection.execute(text("SELECT 1"))
+    assert counter.count == before + 1
+    engine.dispose()
+
+
+def test_configured_database_is_checked(monkeypatch, tmp_path):
+    # restored afterwards, configure_environment sets it
+    monkeypatch.setenv("DATABASE_URL", os.environ["DATABASE_URL"])
+    configure_environment(os.environ["DATABASE_URL"])
+    # database was imported with the tests' URL, as if a .env file set it
+    with pytest.raises(SystemExit, match="overridden by a .env file"):
+        configure_environment(f"sqlite:///{tmp_path / 'bench.db'}")
@@ -0,0 +1,92 @@
+"""
+The merge runs COPY and PostgreSQL-only statements, so only reading,
+validating and staging the records is tested here.
+"""
+
+import csv
+import io
+
+import pytest
+
+from tools.bulk_import import KINDS, copy_batch, read_rows, run, validate
+
+USER = {"name": "Ivan", "surname": "Petrov", "email": "ivan@example.com"}
+
+
+def test_read_csv(tmp_path):
+    path = tmp_path / "users.csv"
+    path.write_text("name,surname\nIvan,Petrov\nAnna,Ivanova\n", encoding="utf-8")
+    assert list(read_rows(str(path))) == [
+        (1, {"name": "Ivan", "surname": "Petrov"}),
+        (2, {"name": "Anna", "surname": "Ivanova"}),
+    ]
+
+
+def test_read_jsonl_skips_blank_lines(tmp_path):
+    path = tmp_path / "tags.jsonl"
+    path.write_text('{"name": "python"}\n\n{"name": "sql"}\n', encoding="utf-8")
+    assert [record for _, record in read_rows(str(path))] == [
+        {"name": "python"},
+        {"name": "sql"},
+    ]
+
+
+def test_validate_user():
+    row = validate(
+        KINDS["users"], 7, {**USER, "phone": " ", "course": " 2 ", "password": "pw"}
+    )
+    assert row["line"] == 7
+    assert row["phone"] is None
+    assert row["course"] == "2"
+    assert row["password"] == "pw"
+
+
+def test_validate_user_with_hash_skips_password():
+    row = validate(KINDS["users"], 1, {**USER, "hashed_password": "$2b$12$x"})
+    assert "password" not in row
+
+
+@pytest.mark.parametrize(
+    "record, reason",
+    [
+        ({**USER, "name": ""}, "missing name"),
+        ({**USER, "surname": None}, "missing surname"),
+        (USER, "missing password"),
+    ],
+)
+def test_validate_rejects_user(record, reason):
+    with pytest.raises(ValueError, match=reason):
+        validate(KINDS["users"], 1, record)
+
+
+def test_validate_rejects_bad_date():
+    with pytest.raises(ValueError):
+        validate(
+            KINDS["users"], 1, {**USER, "birthdate": "31.12.2000", "password": "pw"}
+        )
+
+
+def test_validate_review_needs_user():
+    record = {"post": "dev", "company_name": "ACME", "date_start": "2024-01-01"}
+    with pytest.raises(ValueError, match="missing email or phone"):
+        validate(KINDS["workreviews"], 1, record)
+    assert validate(KINDS["workreviews"], 1, {**record, "phone": "+7"})["phone"] == "+7"
+
+
+class RecordingCursor:
+    def copy_expert(self, sql, buffer):
+        self.sql = sql
+        self.rows = list(csv.reader(io.StringIO(buffer.read())))
+
+
+def test_copy_batch_writes_columns_in_order():
+    kind = KINDS["tags"]
+    cursor = RecordingCursor()
+    copy_batch(cursor, kind, [validate(kind, 1, {"name": "python"})])
+    assert cursor.sql.startswith(f"COPY staging ({', '.join(kind.columns)})")
+    assert cursor.rows == [["1", "python"]]
+
+
+def test_run_requires_postgresql(tmp_path):
+    with pytest.raises(SystemExit, match="requires PostgreSQL"):
+        run("tags", str(tmp_path / "tags.csv"), 100, 1, None)
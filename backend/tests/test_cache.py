@@ -0,0 +1,70 @@
+import time
+
+from sqlmodel import update
+
+from helpers.cache import TTLCache
+from models.users import Users
+from routes.user import current_user_cache
+
+
+def test_cache_expires_entries():
+    cache = TTLCache("test", maxsize=10, ttl=60)
+    cache.set("short", 1, ttl=0.01)
+    cache.set("long", 2)
+    time.sleep(0.02)
+    assert cache.get("short") is None
+    assert cache.get("long") == 2
+
+
+def test_cache_evicts_least_recently_used():
+    cache = TTLCache("test", maxsize=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+    assert len(cache) == 2
+
+
+def test_current_user_is_cached(client, auth_headers, make_user):
+    user = make_user()
+    assert client.get("/user/me", headers=auth_headers(user)).status_code == 200
+    assert current_user_cache.get(user).id == user
+
+
+def test_me_sees_changes_made_elsewhere(client, auth_headers, make_user, session):
+    user = make_user(name="Ivan")
+    headers = auth_headers(user)
+    assert client.get("/user/me", headers=headers).json()["name"] == "Ivan"
+
+    # e.g. an edit served by another worker, whose cache this one can't clear
+    session.exec(update(Users).where(Users.id == user).values(name="Pyotr"))
+    session.commit()
+
+    assert client.get("/user/me", headers=headers).json()["name"] == "Pyotr"
+    assert current_user_cache.get(user).name == "Pyotr"
+
+
+def test_deleted_user_is_not_authenticated(client, auth_headers, make_user, session):
+    user = make_user()
+    assert client.get("/user/me", headers=auth_headers(user)).status_code == 200
+    current_user_cache.clear()
+    session.delete(session.get(Users, user))
+    session.commit()
+    assert client.get("/user/me", headers=auth_headers(user)).status_code == 401
+
+
+def test_me_of_deleted_cached_user(client, auth_headers, make_user, session):
+    user = make_user()
+    headers = auth_headers(user)
+    assert client.get("/user/me", headers=headers).status_code == 200
+    # still cached, e.g. deleted through another worker
+    session.delete(session.get(Users, user))
+    session.commit()
+
+    response = client.get("/user/me", headers=headers)
+    assert response.status_code == 401
+    assert response.json()["detail"] == "no such login"
+    assert current_user_cache.get(user) is None
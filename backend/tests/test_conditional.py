@@ -0,0 +1,93 @@
+from datetime import datetime, timedelta, timezone
+
+from sqlmodel import update
+
+from helpers.conditional import (
+    http_date,
+    if_match_versions,
+    is_not_modified,
+    make_etag,
+)
+from models.users import Users
+
+MODIFIED = datetime(2026, 1, 2, 3, 4, 5, 600_000, tzinfo=timezone.utc)
+
+
+def test_profile_carries_validators(client, make_user):
+    user = make_user()
+    response = client.get(f"/user/{user}")
+    assert response.headers["ETag"] == f'"{user}-1"'
+    assert response.headers["Cache-Control"] == "no-cache"
+    assert response.headers["Last-Modified"].endswith(" GMT")
+
+
+def test_unchanged_profile_is_not_modified(client, make_user):
+    user = make_user()
+    first = client.get(f"/user/{user}")
+
+    response = client.get(
+        f"/user/{user}", headers={"If-None-Match": first.headers["ETag"]}
+    )
+    assert response.status_code == 304
+    assert response.content == b""
+    assert response.headers["ETag"] == first.headers["ETag"]
+
+    response = client.get(
+        f"/user/{user}", headers={"If-Modified-Since": first.headers["Last-Modified"]}
+    )
+    assert response.status_code == 304
+
+
+def test_changed_profile_is_sent_again(client, make_user, session):
+    user = make_user()
+    etag = client.get(f"/user/{user}").headers["ETag"]
+    session.exec(update(Users).where(Users.id == user).values(course="2"))
+    session.commit()
+
+    response = client.get(f"/user/{user}", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.json()["course"] == "2"
+    assert response.headers["ETag"] == f'"{user}-2"'
+
+
+def test_missing_user_is_not_found_when_revalidating(client):
+    response = client.get("/user/999", headers={"If-None-Match": '"999-1"'})
+    assert response.status_code == 404
+
+
+def test_if_none_match():
+    etag = make_etag(1, 2)
+    assert etag == '"1-2"'
+    assert is_not_modified(etag, MODIFIED, if_none_match='"1-2"')
+    assert is_not_modified(etag, MODIFIED, if_none_match='"1-1", W/"1-2"')
+    assert is_not_modified(etag, MODIFIED, if_none_match="*")
+    assert not is_not_modified(etag, MODIFIED, if_none_match='"1-1"')
+
+
+def test_if_none_match_wins_over_date():
+    later = http_date(MODIFIED + timedelta(days=1))
+    assert not is_not_modified(
+        make_etag(1, 2), MODIFIED, if_none_match='"1-1"', if_modified_since=later
+    )
+
+
+def test_if_modified_since():
+    etag = make_etag(1, 2)
+    # HTTP dates drop the fraction of a second
+    assert is_not_modified(etag, MODIFIED, if_modified_since=http_date(MODIFIED))
+    earlier = http_date(MODIFIED - timedelta(seconds=1))
+    assert not is_not_modified(etag, MODIFIED, if_modified_since=earlier)
+    assert not is_not_modified(etag, MODIFIED, if_modified_since="yesterday")
+    assert not is_not_modified(etag, MODIFIED)
+
+
+def test_naive_dates_are_utc():
+    naive = MODIFIED.replace(tzinfo=None)
+    assert http_date(naive) == "Fri, 02 Jan 2026 03:04:05 GMT"
+    assert is_not_modified("", naive, if_modified_since=http_date(MODIFIED))
+
+
+def test_if_match_versions():
+    assert if_match_versions("*", 1) is None
+    assert if_match_versions('"1-2", "1-3"', 1) == [2, 3]
+    assert if_match_versions('"2-2", W/"1-3", "1-x", "11-4"', 1) == []
@@ -0,0 +1,38 @@
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+
+from helpers.hashing import (
+    HashingPool,
+    _hash,
+    get_password_hash_sync,
+    verify_password,
+)
+
+
+def test_hash_and_verify_in_pool():
+    hashed = get_password_hash_sync("secret")
+    assert hashed != "secret"
+    assert asyncio.run(verify_password("secret", hashed))
+    assert not asyncio.run(verify_password("other", hashed))
+
+
+def test_pool_rejects_jobs_beyond_admission_limit():
+    pool = HashingPool(max_workers=1, max_pending=0)
+    with pytest.raises(HTTPException) as raised:
+        pool.submit(_hash, "secret")
+    assert raised.value.status_code == 503
+    assert raised.value.headers["Retry-After"] == "1"
+    # nothing was started for the rejected job
+    assert pool._executor is None
+
+
+def test_pool_releases_slots():
+    pool = HashingPool(max_workers=1, max_pending=3)
+    try:
+        for _ in range(3):
+            assert pool.run_sync(_hash, "secret")
+    finally:
+        pool.shutdown()
+    assert pool._pending == 0
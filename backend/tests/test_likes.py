@@ -0,0 +1,70 @@
+import pytest
+from sqlmodel import select
+
+from helpers.likes import like_counter_buffer
+from models.users import LikeCounter, Likes
+from tools import recount_likes
+
+
+@pytest.fixture
+def fans(make_user):
+    return [make_user(name=f"fan{i}") for i in range(3)]
+
+
+def likes(client, user_id):
+    return client.get(f"/user/{user_id}/likes").json()["likes"]
+
+
+def counters(session):
+    session.expire_all()
+    return {row.user_id: row.likes for row in session.exec(select(LikeCounter))}
+
+
+def test_likes_are_counted_before_and_after_flush(
+    client, auth_headers, make_user, fans, session
+):
+    star = make_user()
+    for fan in fans:
+        response = client.post(f"/user/{star}/like", headers=auth_headers(fan))
+        assert response.json() == "success"
+    # liking twice is a no-op
+    client.post(f"/user/{star}/like", headers=auth_headers(fans[0]))
+    client.delete(f"/user/{star}/like", headers=auth_headers(fans[1]))
+    client.delete(f"/user/{star}/like", headers=auth_headers(fans[1]))
+
+    assert likes(client, star) == 2
+    assert counters(session) == {}
+
+    client.portal.call(like_counter_buffer.flush)
+    assert counters(session) == {star: 2}
+    assert likes(client, star) == 2
+
+
+def test_flushes_add_up(client, auth_headers, make_user, fans, session):
+    star = make_user()
+    client.post(f"/user/{star}/like", headers=auth_headers(fans[0]))
+    client.portal.call(like_counter_buffer.flush)
+    client.post(f"/user/{star}/like", headers=auth_headers(fans[1]))
+    client.delete(f"/user/{star}/like", headers=auth_headers(fans[0]))
+    client.portal.call(like_counter_buffer.flush)
+    assert counters(session) == {star: 1}
+
+
+def test_cannot_like_yourself_or_nobody(client, auth_headers, make_user):
+    user = make_user()
+    headers = auth_headers(user)
+    response = client.post(f"/user/{user}/like", headers=headers)
+    assert response.status_code == 400
+    response = client.post(f"/user/{user + 1}/like", headers=headers)
+    assert response.status_code == 404
+
+
+def test_recount_rebuilds_counters(client, make_user, fans, session):
+    star, forgotten = make_user(), make_user()
+    session.add_all(Likes(user_id=fan, liked_user_id=star) for fan in fans)
+    # a counter with no likes left behind it
+    session.add(LikeCounter(user_id=forgotten, likes=5))
+    session.commit()
+
+    recount_likes.main()
+    assert counters(session) == {star: 3, forgotten: 0}
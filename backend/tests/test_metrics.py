@@ -0,0 +1,80 @@
+import pytest
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+
+import database
+from helpers.instrumentation import (
+    RequestStats,
+    db_query_errors,
+    http_request_duration,
+    http_requests,
+    request_db_queries,
+    request_stats,
+)
+from helpers.metrics import Counter, Gauge, Histogram, render
+
+
+def test_requests_are_recorded_by_route_template(client, make_user):
+    user = make_user()
+    route = "/user/{user_id}"
+    before = http_requests.value(method="GET", route=route, status=200)
+    timed = http_request_duration.count(method="GET", route=route)
+    queries = request_db_queries.sum(route=route)
+
+    assert client.get(f"/user/{user}").status_code == 200
+
+    assert http_requests.value(method="GET", route=route, status=200) == before + 1
+    assert http_request_duration.count(method="GET", route=route) == timed + 1
+    assert request_db_queries.sum(route=route) >= queries + 1
+
+
+def test_unmatched_paths_share_one_label(client):
+    before = http_requests.value(method="GET", route="unmatched", status=404)
+    client.get("/no/such/path")
+    assert http_requests.value(method="GET", route="unmatched", status=404) == (
+        before + 1
+    )
+
+
+def test_failed_statements_are_counted():
+    errors = db_query_errors.value()
+    stats = RequestStats()
+    token = request_stats.set(stats)
+    try:
+        with database.engine.connect() as connection:
+            with pytest.raises(OperationalError):
+                connection.execute(text("SELECT * FROM no_such_table"))
+            connection.rollback()
+            connection.execute(text("SELECT 1"))
+    finally:
+        request_stats.reset(token)
+    assert db_query_errors.value() == errors + 1
+    assert stats.queries == 2
+
+
+def test_metrics_endpoint(client):
+    client.get("/ping")
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    assert "# TYPE http_requests_total counter" in response.text
+    assert 'http_requests_total{method="GET",route="/ping",status="200"}' in (
+        response.text
+    )
+
+
+def test_render_formats():
+    counter = Counter("test_render_total", "A counter", labelnames=("kind",))
+    counter.inc(kind='a"b')
+    gauge = Gauge("test_render_gauge", "A gauge")
+    gauge.set(3)
+    histogram = Histogram("test_render_seconds", "A histogram", buckets=(0.1, 1.0))
+    histogram.observe(0.5)
+
+    text = render()
+    assert 'test_render_total{kind="a\\"b"} 1' in text
+    assert "test_render_gauge 3" in text
+    assert 'test_render_seconds_bucket{le="0.1"} 0' in text
+    assert 'test_render_seconds_bucket{le="1.0"} 1' in text
+    assert 'test_render_seconds_bucket{le="+Inf"} 1' in text
+    assert "test_render_seconds_count 1" in text
@@ -0,0 +1,68 @@
+import importlib.util
+import os
+
+import pytest
+from sqlalchemy import create_engine, text
+
+from database import ALEMBIC_DIR
+
+
+def migration(name: str):
+    """
+    Imports a migration module from its file.
+    """
+    path = os.path.join(ALEMBIC_DIR, "versions", f"{name}.py")
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+@pytest.fixture
+def connection(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'migration.db'}")
+    with engine.begin() as connection:
+        yield connection
+    engine.dispose()
+
+
+def test_duplicate_tags_are_merged(connection):
+    tag_indexes = migration("e9da0ed9e00b_tag_search_indexes")
+    connection.execute(text("CREATE TABLE tags (id INTEGER PRIMARY KEY, name TEXT)"))
+    connection.execute(
+        text(
+            "CREATE TABLE tagsusers (user_id INTEGER, tag_id INTEGER, "
+            "PRIMARY KEY (user_id, tag_id))"
+        )
+    )
+    connection.execute(
+        text("INSERT INTO tags VALUES (1, 'go'), (2, 'sql'), (3, 'go'), (4, 'go')")
+    )
+    # user 10 has two copies of go, user 11 only a later one
+    connection.execute(
+        text("INSERT INTO tagsusers VALUES (10, 1), (10, 3), (10, 2), (11, 4)")
+    )
+
+    for statement in tag_indexes.MERGE_DUPLICATE_TAGS:
+        connection.execute(text(statement))
+
+    tags = connection.execute(text("SELECT id, name FROM tags ORDER BY id")).all()
+    assert tags == [(1, "go"), (2, "sql")]
+    links = connection.execute(
+        text("SELECT user_id, tag_id FROM tagsusers ORDER BY user_id, tag_id")
+    ).all()
+    assert links == [(10, 1), (10, 2), (11, 1)]
+
+
+def test_duplicate_logins_are_found(connection):
+    unique_logins = migration("a5d2c7e9f146_users_unique_email_phone")
+    connection.execute(text("CREATE TABLE users (id INTEGER, email TEXT, phone TEXT)"))
+    connection.execute(
+        text(
+            "INSERT INTO users VALUES (1, 'a@example.com', NULL), "
+            "(2, 'a@example.com', ''), (3, 'b@example.com', ''), (4, NULL, '+7')"
+        )
+    )
+    # missing logins may repeat, the partial indexes leave them out
+    assert unique_logins.find_duplicates(connection, "email") == ["a@example.com"]
+    assert unique_logins.find_duplicates(connection, "phone") == []
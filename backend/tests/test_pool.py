@@ -0,0 +1,67 @@
+import asyncio
+
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from starlette.requests import Request
+
+import database
+from main import pool_timeout_handler
+from helpers.pool import (
+    TimedQueuePool,
+    instrument_pool,
+    pool_checked_out,
+    pool_checkout_wait,
+    pool_connects,
+    pool_timeouts,
+)
+
+
+@pytest.fixture
+def small_engine():
+    engine = create_engine(
+        database.database_url,
+        poolclass=TimedQueuePool,
+        pool_size=1,
+        max_overflow=0,
+        pool_timeout=0.05,
+    )
+    engine.pool.metrics_label = "test"
+    instrument_pool(engine.pool, "test")
+    yield engine
+    engine.dispose()
+
+
+def test_engines_use_configured_pool():
+    for pool in (database.engine.pool, database.async_engine.sync_engine.pool):
+        assert pool.size() == database.DB_POOL_SIZE
+        assert pool._timeout == database.DB_POOL_TIMEOUT
+        assert pool._recycle == database.DB_POOL_RECYCLE
+
+
+def test_checkouts_are_measured(small_engine):
+    waits = pool_checkout_wait.count(pool="test")
+    connects = pool_connects.value(pool="test")
+    with small_engine.connect() as connection:
+        connection.execute(text("SELECT 1"))
+        assert pool_checked_out.value(pool="test") == 1
+    assert pool_checked_out.value(pool="test") == 0
+    assert pool_checkout_wait.count(pool="test") == waits + 1
+    assert pool_connects.value(pool="test") == connects + 1
+
+
+def test_exhausted_pool_times_out(small_engine):
+    timeouts = pool_timeouts.value(pool="test")
+    with small_engine.connect():
+        with pytest.raises(PoolTimeoutError):
+            small_engine.connect()
+    assert pool_timeouts.value(pool="test") == timeouts + 1
+
+
+def test_pool_timeout_answers_503():
+    request = Request(
+        {"type": "http", "method": "GET", "path": "/user/1", "headers": []}
+    )
+    response = asyncio.run(pool_timeout_handler(request, PoolTimeoutError()))
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "1"
@@ -0,0 +1,121 @@
+import pytest
+
+
+@pytest.fixture
+def user(make_user):
+    return make_user(name="Ivan", email="ivan@example.com", phone="+70000000001")
+
+
+def edit(client, headers, json, if_match=None):
+    if if_match is not None:
+        headers = {**headers, "If-Match": if_match}
+    return client.patch("/user/me", json=json, headers=headers)
+
+
+def test_edit_returns_new_etag(client, auth_headers, user):
+    headers = auth_headers(user)
+    etag = client.get(f"/user/{user}").headers["ETag"]
+    assert etag == f'"{user}-1"'
+
+    response = edit(client, headers, {"about_me": "hello"}, if_match=etag)
+    assert response.status_code == 200
+    assert response.headers["ETag"] == f'"{user}-2"'
+
+    profile = client.get(f"/user/{user}")
+    assert profile.headers["ETag"] == response.headers["ETag"]
+    assert profile.json()["about_me"] == "hello"
+    # only the fields sent are written
+    assert profile.json()["name"] == "Ivan"
+
+
+def test_edit_with_stale_etag_fails(client, auth_headers, user):
+    headers = auth_headers(user)
+    etag = client.get(f"/user/{user}").headers["ETag"]
+    assert edit(client, headers, {"course": "1"}, if_match=etag).status_code == 200
+
+    response = edit(client, headers, {"course": "2"}, if_match=etag)
+    assert response.status_code == 412
+    assert response.json()["detail"] == "profile was modified"
+    assert client.get(f"/user/{user}").json()["course"] == "1"
+
+
+def test_edit_with_stale_etag_and_no_fields_fails(client, auth_headers, user):
+    headers = auth_headers(user)
+    assert edit(client, headers, {}, if_match=f'"{user}-1"').status_code == 200
+    assert edit(client, headers, {}, if_match=f'"{user}-9"').status_code == 412
+
+
+def test_edit_with_any_etag(client, auth_headers, user):
+    headers = auth_headers(user)
+    assert edit(client, headers, {"course": "1"}).status_code == 200
+
+    response = edit(client, headers, {"course": "2"}, if_match="*")
+    assert response.status_code == 200
+    assert response.headers["ETag"] == f'"{user}-3"'
+
+
+def test_edit_with_one_of_several_etags(client, auth_headers, user):
+    response = edit(
+        client, auth_headers(user), {"course": "1"}, if_match=f'"{user}-7", "{user}-1"'
+    )
+    assert response.status_code == 200
+
+
+def test_edit_with_weak_etag_fails(client, auth_headers, user):
+    # If-Match uses the strong comparison
+    response = edit(
+        client, auth_headers(user), {"course": "1"}, if_match=f'W/"{user}-1"'
+    )
+    assert response.status_code == 412
+
+
+def test_edit_with_etag_of_another_user_fails(client, auth_headers, user, make_user):
+    other = make_user()
+    response = edit(
+        client, auth_headers(user), {"course": "1"}, if_match=f'"{other}-1"'
+    )
+    assert response.status_code == 412
+
+
+def test_edit_to_taken_email(client, auth_headers, user, make_user):
+    make_user(email="taken@example.com", phone="+70000000002")
+    response = edit(client, auth_headers(user), {"email": "taken@example.com"})
+    assert response.status_code == 400
+    assert response.json()["detail"] == "email exists"
+    assert client.get(f"/user/{user}").json()["email"] == "ivan@example.com"
+
+
+def test_edit_to_taken_phone(client, auth_headers, user, make_user):
+    make_user(email="taken@example.com", phone="+70000000002")
+    response = edit(
+        client,
+        auth_headers(user),
+        {"email": "ivan@example.com", "phone": "+70000000002"},
+    )
+    assert response.status_code == 400
+    assert response.json()["detail"] == "phone exists"
+
+
+def test_edit_keeping_own_email(client, auth_headers, user):
+    response = edit(client, auth_headers(user), {"email": "ivan@example.com"})
+    assert response.status_code == 200
+
+
+@pytest.mark.parametrize("field", ["name", "surname"])
+def test_edit_rejects_null_required_field(client, auth_headers, user, field):
+    response = edit(client, auth_headers(user), {field: None})
+    assert response.status_code == 422
+    assert client.get(f"/user/{user}").json()[field] is not None
+
+
+def test_edit_clears_optional_field(client, auth_headers, make_user):
+    user = make_user(about_me="hello")
+    assert edit(client, auth_headers(user), {"about_me": None}).status_code == 200
+    assert client.get(f"/user/{user}").json()["about_me"] is None
+
+
+def test_edit_is_seen_by_me(client, auth_headers, user):
+    headers = auth_headers(user)
+    assert client.get("/user/me", headers=headers).json()["name"] == "Ivan"
+    assert edit(client, headers, {"name": "Pyotr"}).status_code == 200
+    assert client.get("/user/me", headers=headers).json()["name"] == "Pyotr"
@@ -0,0 +1,78 @@
+import random
+
+import pytest
+from sqlmodel import select
+
+from models.users import Recommendation
+from tools.rebuild_recommendations import run as rebuild
+
+
+def candidates(session):
+    session.expire_all()
+    rows = session.exec(select(Recommendation)).all()
+    return {
+        (row.user_id, row.candidate_id): (row.mutuals, row.shared_tags, row.score)
+        for row in rows
+    }
+
+
+@pytest.fixture
+def people(make_user, tag_user):
+    rng = random.Random(7)
+    users = [make_user(name=f"user{i}") for i in range(10)]
+    for user in users:
+        tag_user(user, *rng.sample(["python", "sql", "go", "rust"], rng.randint(0, 3)))
+    return users
+
+
+def test_recommendations_from_mutuals(client, auth_headers, people):
+    me, friend, other_friend, candidate = people[:4]
+    headers = auth_headers(me)
+    for followed in (friend, other_friend):
+        client.post(f"/user/{followed}/subscribe", headers=headers)
+        client.post(f"/user/{candidate}/subscribe", headers=auth_headers(followed))
+    # a follower of mine following me back doesn't make me my own candidate
+    client.post(f"/user/{me}/subscribe", headers=auth_headers(friend))
+
+    (recommended,) = client.get("/user/me/recommendations", headers=headers).json()
+    assert recommended["id"] == candidate
+    assert recommended["mutuals"] == 2
+
+    # following the candidate removes it
+    client.post(f"/user/{candidate}/subscribe", headers=headers)
+    assert client.get("/user/me/recommendations", headers=headers).json() == []
+
+
+def test_incremental_updates_match_full_rebuild(client, auth_headers, people, session):
+    rng = random.Random(42)
+    for _ in range(60):
+        follower, followed = rng.sample(people, 2)
+        method = client.post if rng.random() < 0.7 else client.delete
+        response = method(f"/user/{followed}/subscribe", headers=auth_headers(follower))
+        assert response.status_code == 200
+
+    incremental = candidates(session)
+    assert incremental
+    rebuild(batch_size=3)
+    rebuilt = candidates(session)
+    assert incremental.keys() == rebuilt.keys()
+    for key, (mutuals, shared_tags, score) in rebuilt.items():
+        assert incremental[key][:2] == (mutuals, shared_tags)
+        assert incremental[key][2] == pytest.approx(score)
+
+
+def test_rebuild_drops_stale_candidates(client, auth_headers, people, session):
+    me, friend, candidate, stale = people[:4]
+    client.post(f"/user/{friend}/subscribe", headers=auth_headers(me))
+    client.post(f"/user/{candidate}/subscribe", headers=auth_headers(friend))
+    # left behind e.g. by a bug, for a user inside and one outside the ranges
+    for user_id in (me, stale):
+        session.add(
+            Recommendation(
+                user_id=user_id, candidate_id=stale, mutuals=1, shared_tags=0, score=1
+            )
+        )
+    session.commit()
+
+    rebuild(batch_size=100)
+    assert candidates(session).keys() == {(me, candidate)}
@@ -0,0 +1,47 @@
+import pytest
+from sqlmodel import func, select
+
+from models.users import Users
+
+
+def register(client, email, phone):
+    return client.post(
+        "/user/register",
+        json={
+            "name": "Ivan",
+            "surname": "Petrov",
+            "email": email,
+            "phone": phone,
+            "password": "password",
+        },
+    )
+
+
+def test_taken_email(client):
+    assert register(client, "ivan@example.com", "+70000000001").status_code == 200
+    response = register(client, "ivan@example.com", "+70000000002")
+    assert response.status_code == 400
+    assert response.json()["detail"] == "email exists"
+
+
+def test_taken_phone(client):
+    assert register(client, "ivan@example.com", "+70000000001").status_code == 200
+    response = register(client, "anna@example.com", "+70000000001")
+    assert response.status_code == 400
+    assert response.json()["detail"] == "phone exists"
+
+
+@pytest.mark.parametrize("missing", [None, ""])
+def test_missing_logins_do_not_collide(client, session, missing):
+    assert register(client, missing, "+70000000001").status_code == 200
+    assert register(client, missing, "+70000000002").status_code == 200
+    assert register(client, "ivan@example.com", missing).status_code == 200
+    assert register(client, "anna@example.com", missing).status_code == 200
+    assert session.exec(select(func.count()).select_from(Users)).one() == 4
+
+
+def test_registered_user_can_log_in(client):
+    token = register(client, None, "+70000000001").json()["access_token"]
+    me = client.get("/user/me", headers={"Authorization": f"Bearer {token}"})
+    assert me.json()["phone"] == "+70000000001"
+    assert me.json()["email"] is None
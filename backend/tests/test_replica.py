@@ -0,0 +1,93 @@
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlmodel import Session, SQLModel
+from starlette.applications import Starlette
+from starlette.responses import PlainTextResponse
+from starlette.routing import Route
+
+import database
+import routes.user
+from database import PRIMARY_COOKIE
+from helpers.replica import PrimaryStickinessMiddleware
+from models.users import Users
+
+PRIMARY = {"Cookie": f"{PRIMARY_COOKIE}=1"}
+
+
+@pytest.fixture
+def replica(client, tmp_path, monkeypatch):
+    """
+    Serves the reads from an empty replica database; yields a blocking engine
+    on it to seed it with.
+    """
+    url = f"sqlite:///{tmp_path / 'replica.db'}"
+    sync_engine = create_engine(url)
+    SQLModel.metadata.create_all(sync_engine)
+    if database.DB_ASYNC:
+        engine = create_async_engine(url.replace("sqlite", "sqlite+aiosqlite", 1))
+    else:
+        engine = sync_engine
+    monkeypatch.setattr(database, "replica_engine", engine)
+    yield sync_engine
+    if database.DB_ASYNC:
+        client.portal.call(engine.dispose)
+    sync_engine.dispose()
+
+
+def test_reads_go_to_replica(client, make_user, replica):
+    user = make_user()
+    assert client.get(f"/user/{user}").status_code == 404
+    assert client.get(f"/user/{user}/followers").json()["items"] == []
+
+
+def test_recent_writers_read_from_primary(client, make_user, replica):
+    user = make_user()
+    response = client.get(f"/user/{user}", headers=PRIMARY)
+    assert response.status_code == 200
+
+
+def test_authentication_uses_primary(client, auth_headers, make_user, replica):
+    # the token's user was just registered and may not be replicated yet
+    user = make_user()
+    assert client.get("/user/me", headers=auth_headers(user)).status_code == 200
+
+
+def test_export_streams_from_replica(
+    client, auth_headers, make_user, session, replica, monkeypatch
+):
+    admin = make_user()
+    make_user()
+    # only the admin has been replicated yet
+    with Session(replica) as replica_session:
+        replica_session.add(Users(**session.get(Users, admin).model_dump()))
+        replica_session.commit()
+    monkeypatch.setattr(routes.user, "ADMIN_USER_IDS", {admin})
+    headers = auth_headers(admin)
+    assert client.get("/user/export", headers=headers).text.count("\n") == 1
+    response = client.get("/user/export", headers={**headers, **PRIMARY})
+    assert response.text.count("\n") == 2
+
+
+def sticky_client():
+    async def write(request):
+        status_code = int(request.query_params.get("status", 200))
+        return PlainTextResponse("", status_code=status_code)
+
+    app = Starlette(routes=[Route("/", write, methods=["GET", "POST"])])
+    app.add_middleware(PrimaryStickinessMiddleware)
+    return TestClient(app)
+
+
+def test_successful_writes_set_cookie():
+    response = sticky_client().post("/")
+    cookie = response.headers["set-cookie"]
+    assert cookie.startswith(f"{PRIMARY_COOKIE}=1; Max-Age=")
+    assert "HttpOnly" in cookie
+
+
+def test_reads_and_failed_writes_do_not_set_cookie():
+    client = sticky_client()
+    assert "set-cookie" not in client.get("/").headers
+    assert "set-cookie" not in client.post("/?status=400").headers
@@ -0,0 +1,59 @@
+from datetime import date
+
+import pytest
+from pydantic import TypeAdapter
+from sqlalchemy import select
+
+import routes.user
+from helpers.serialization import as_dicts, json_response
+from helpers.crud import RESPONSE_USER_COLUMNS
+from models.users import Subscription
+from shemas.pagination import Page
+from shemas.user import ResponseUser
+
+
+@pytest.fixture
+def users(make_user, tag_user, session):
+    ids = [
+        make_user(name="Ivan", birthdate=date(2000, 1, 31), about_me="Привет"),
+        make_user(name="Anna", email="anna@example.com", links=None),
+    ]
+    for user_id in ids:
+        tag_user(user_id, "python")
+    session.add(Subscription(user_id_from=ids[1], user_id_to=ids[0]))
+    session.commit()
+    return ids
+
+
+@pytest.mark.parametrize(
+    "url",
+    [
+        "/user/batch?ids={1},{0},999",
+        "/user/search/python?limit=1",
+        "/user/{0}/followers",
+    ],
+)
+def test_fast_path_matches_default(client, users, monkeypatch, url):
+    url = url.format(*users)
+    monkeypatch.setattr(routes.user, "FAST_JSON", False)
+    expected = client.get(url)
+    monkeypatch.setattr(routes.user, "FAST_JSON", True)
+    fast = client.get(url)
+    assert fast.status_code == expected.status_code == 200
+    assert fast.json() == expected.json()
+    assert fast.headers["content-type"] == "application/json"
+
+
+def test_as_dicts(users, session):
+    rows = session.exec(select(*RESPONSE_USER_COLUMNS)).all()
+    dicts = as_dicts(rows)
+    assert dicts[0]["name"] == "Ivan"
+    assert set(dicts[0]) == set(ResponseUser.model_fields)
+    assert as_dicts([]) == []
+
+
+def test_json_response_validates_content():
+    adapter = TypeAdapter(Page[int])
+    response = json_response(adapter, {"items": ["1", 2]}, status_code=201)
+    assert response.status_code == 201
+    assert response.body == b'{"items":[1,2],"next_cursor":null}'
@@ -0,0 +1,68 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+import serve
+
+
+@pytest.fixture
+def uvicorn_run(monkeypatch):
+    calls = []
+    monkeypatch.setattr(
+        serve.uvicorn, "run", lambda app, **kwargs: calls.append(kwargs)
+    )
+    # main exports the worker count; restore it afterwards
+    monkeypatch.setenv("WEB_CONCURRENCY", os.environ.get("WEB_CONCURRENCY", "1"))
+    return calls
+
+
+def test_workers_recycle(uvicorn_run):
+    serve.main(["--workers", "4", "--port", "8080"])
+    (options,) = uvicorn_run
+    assert options["workers"] == 4
+    assert options["port"] == 8080
+    assert options["limit_max_requests"] == serve.WEB_MAX_REQUESTS
+    assert os.environ["WEB_CONCURRENCY"] == "4"
+
+
+def test_single_worker_is_not_recycled(uvicorn_run):
+    serve.main(["--workers", "1"])
+    (options,) = uvicorn_run
+    assert options["limit_max_requests"] is None
+    assert options["limit_max_requests_jitter"] == 0
+
+
+def pool_settings(**env):
+    """
+    Imports ``database`` in a fresh interpreter with the given settings.
+    """
+    return subprocess.run(
+        [
+            sys.executable,
+            "-c",
+            "import database as d; print(d.DB_POOL_SIZE, d.DB_MAX_OVERFLOW, "
+            "d.engine.pool.size(), d.async_engine.sync_engine.pool.size())",
+        ],
+        cwd=serve.BACKEND_DIR,
+        env={**os.environ, **env},
+        capture_output=True,
+        text=True,
+    )
+
+
+def test_pools_share_connection_budget():
+    result = pool_settings(
+        DB_CONNECTION_BUDGET="20", WEB_CONCURRENCY="4", DB_ASYNC="true"
+    )
+    assert result.returncode == 0, result.stderr
+    # five connections per worker: four for the async engine serving
+    # requests, one for the sync engine
+    assert result.stdout.split() == ["4", "0", "1", "4"]
+
+
+def test_budget_too_small_for_workers():
+    result = pool_settings(DB_CONNECTION_BUDGET="7", WEB_CONCURRENCY="4")
+    assert result.returncode != 0
+    assert "too small for 4 workers" in result.stderr
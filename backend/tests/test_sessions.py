@@ -0,0 +1,35 @@
+import asyncio
+
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlmodel import Session
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+import database
+from helpers.crud import get_user_by_id, update_user
+
+
+def test_crud_helpers_accept_sync_session(make_user):
+    user_id = make_user(name="Sync")
+    with Session(database.engine) as session:
+        user = asyncio.run(get_user_by_id(id=user_id, session=session))
+    assert user.name == "Sync"
+
+
+def test_crud_helpers_accept_async_session(make_user):
+    user_id = make_user(name="Async")
+
+    # an engine of its own, the app's pool belongs to the TestClient's loop
+    engine = create_async_engine(database.async_database_url)
+
+    async def run():
+        async with AsyncSession(engine) as session:
+            updated = await update_user(
+                id=user_id, values={"name": "Changed"}, session=session
+            )
+            user = await get_user_by_id(id=user_id, session=session)
+        await engine.dispose()
+        return updated, user
+
+    updated, user = asyncio.run(run())
+    assert updated.version == 2
+    assert user.name == "Changed"
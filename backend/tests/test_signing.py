@@ -0,0 +1,106 @@
+import time
+
+import jwt
+import pytest
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import ec
+from jwt.exceptions import InvalidTokenError
+
+import helpers.signing as signing
+from helpers.signing import KeyRing, decode_access_token, verified_token_cache
+
+
+def ec_key() -> tuple[bytes, bytes]:
+    """
+    Returns a new ES256 private key and its public key, as PEM.
+    """
+    key = ec.generate_private_key(ec.SECP256R1())
+    private = key.private_bytes(
+        serialization.Encoding.PEM,
+        serialization.PrivateFormat.PKCS8,
+        serialization.NoEncryption(),
+    )
+    public = key.public_key().public_bytes(
+        serialization.Encoding.PEM,
+        serialization.PublicFormat.SubjectPublicKeyInfo,
+    )
+    return private, public
+
+
+def test_tokens_name_their_key():
+    private, _ = ec_key()
+    ring = KeyRing("ES256", "2026-10", private, {})
+    token = ring.sign({"user-id": 1})
+    assert jwt.get_unverified_header(token)["kid"] == "2026-10"
+    assert ring.verify(token) == {"user-id": 1}
+
+
+def test_retired_keys_still_verify():
+    old_private, old_public = ec_key()
+    new_private, _ = ec_key()
+    old = KeyRing("ES256", "old", old_private, {})
+    new = KeyRing("ES256", "new", new_private, {"old": old_public})
+    assert new.verify(old.sign({"user-id": 1})) == {"user-id": 1}
+
+
+def test_unknown_key_is_rejected():
+    private, _ = ec_key()
+    other = KeyRing("ES256", "other", ec_key()[0], {})
+    ring = KeyRing("ES256", "current", private, {})
+    with pytest.raises(InvalidTokenError, match="unknown key id"):
+        ring.verify(other.sign({"user-id": 1}))
+
+
+def test_tokens_without_kid_use_current_key():
+    private, _ = ec_key()
+    ring = KeyRing("ES256", "current", private, {})
+    token = jwt.encode({"user-id": 1}, private, algorithm="ES256")
+    assert ring.verify(token) == {"user-id": 1}
+
+
+def test_verified_claims_are_cached_until_expiry(monkeypatch):
+    ring = signing.get_key_ring()
+    token = ring.sign({"user-id": 1, "exp": int(time.time()) + 60})
+    assert decode_access_token(token)["user-id"] == 1
+    # a cached token is not verified again
+    monkeypatch.setattr(ring, "verify", None)
+    assert decode_access_token(token)["user-id"] == 1
+    # the default TTL is longer than the token's remaining lifetime
+    expires_at, _ = verified_token_cache._data[token]
+    assert expires_at <= time.monotonic() + 60
+
+
+@pytest.fixture
+def fresh_key_ring(monkeypatch):
+    """
+    Lets a test load the key ring again from patched settings.
+    """
+    signing.get_key_ring.cache_clear()
+    yield monkeypatch
+    monkeypatch.undo()
+    signing.get_key_ring.cache_clear()
+
+
+def test_missing_algorithm(fresh_key_ring):
+    fresh_key_ring.setattr(signing, "HASH_ALGORITHM", None)
+    with pytest.raises(RuntimeError, match="HASH_ALGORITHM"):
+        signing.get_key_ring()
+
+
+def test_private_key_file_and_retired_keys(fresh_key_ring, tmp_path):
+    private, _ = ec_key()
+    old_private, old_public = ec_key()
+    (tmp_path / "current.pem").write_bytes(private)
+    retired = tmp_path / "retired"
+    retired.mkdir()
+    (retired / "old.pem").write_bytes(old_public)
+    fresh_key_ring.setattr(signing, "HASH_ALGORITHM", "ES256")
+    fresh_key_ring.setattr(signing, "JWT_KEY_ID", "current")
+    fresh_key_ring.setattr(
+        signing, "JWT_PRIVATE_KEY_FILE", str(tmp_path / "current.pem")
+    )
+    fresh_key_ring.setattr(signing, "JWT_RETIRED_KEYS_DIR", str(retired))
+    ring = signing.get_key_ring()
+    assert set(ring.verify_keys) == {"current", "old"}
+    old = KeyRing("ES256", "old", old_private, {})
+    assert ring.verify(old.sign({"user-id": 1})) == {"user-id": 1}
@@ -0,0 +1,47 @@
+import pytest
+from alembic.runtime.migration import MigrationContext
+from alembic.script import ScriptDirectory
+from sqlalchemy import create_engine
+from sqlmodel import select
+
+import database
+from main import app, startup_seconds
+from models.users import Users
+
+
+def test_ready_once_started(client):
+    assert client.get("/ready").json() == "ready"
+    assert client.get("/ping").json() == "pong"
+    for step in ("bootstrap", "db_pool", "hashing_pool", "revocations", "total"):
+        assert startup_seconds.value(step=step) > 0
+
+
+def test_not_ready_while_starting(client, monkeypatch):
+    monkeypatch.setattr(app.state, "ready", False)
+    response = client.get("/ready")
+    assert response.status_code == 503
+    # liveness is not affected
+    assert client.get("/ping").status_code == 200
+
+
+def test_schema_check(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'schema.db'}")
+    with engine.begin() as connection:
+        with pytest.raises(RuntimeError, match="no revision"):
+            database.check_schema(connection)
+        MigrationContext.configure(connection).stamp(
+            ScriptDirectory(database.ALEMBIC_DIR), "heads"
+        )
+        database.check_schema(connection)
+    engine.dispose()
+
+
+def test_bootstrap_creates_root_user_once(client, session, monkeypatch):
+    monkeypatch.setenv("ROOT_NAME", "root")
+    monkeypatch.setenv("ROOT_SURNAME", "root")
+    monkeypatch.setenv("ROOT_PASSWORD", "root-password")
+    database.bootstrap()
+    database.bootstrap()
+    roots = session.exec(select(Users).where(Users.name == "root")).all()
+    assert len(roots) == 1
+    assert roots[0].hashed_password != "root-password"
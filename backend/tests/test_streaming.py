@@ -0,0 +1,62 @@
+import json
+
+import pytest
+
+import database
+import routes.user
+from helpers.crud import export_users_statement
+from helpers.streaming import NDJSON_MEDIA_TYPE, _stream_sync
+
+
+def lines(response):
+    return [json.loads(line) for line in response.text.splitlines()]
+
+
+def test_export_streams_every_user_in_id_order(
+    client, auth_headers, make_user, monkeypatch
+):
+    users = [make_user(name=f"user{i}") for i in range(5)]
+    monkeypatch.setattr(routes.user, "ADMIN_USER_IDS", {users[0]})
+
+    response = client.get("/user/export", headers=auth_headers(users[0]))
+    assert response.status_code == 200
+    assert response.headers["content-type"] == NDJSON_MEDIA_TYPE
+    exported = lines(response)
+    assert [user["id"] for user in exported] == users
+    assert "hashed_password" not in exported[0]
+
+
+def test_export_is_for_admins_only(client, auth_headers, make_user):
+    response = client.get("/user/export", headers=auth_headers(make_user()))
+    assert response.status_code == 403
+
+
+def test_rows_are_sent_in_chunks(make_user):
+    for i in range(5):
+        make_user(name=f"user{i}")
+    chunks = list(_stream_sync(export_users_statement(), 2, database.engine))
+    assert [chunk.count(b"\n") for chunk in chunks] == [2, 2, 1]
+
+
+@pytest.fixture
+def tagged(make_user, tag_user):
+    one, both = make_user(name="one"), make_user(name="both")
+    tag_user(one, "python")
+    tag_user(both, "python", "sql")
+    return one, both
+
+
+def test_tag_search_stream(client, tagged):
+    one, both = tagged
+    response = client.get("/user/search/python,sql/stream")
+    assert response.headers["content-type"] == NDJSON_MEDIA_TYPE
+    found = lines(response)
+    assert [user["id"] for user in found] == [both, one]
+    assert [user["matched_tags"] for user in found] == [2, 1]
+
+
+def test_tag_search_stream_match_all(client, tagged):
+    _, both = tagged
+    found = lines(client.get("/user/search/python,sql/stream?mode=all"))
+    assert [user["id"] for user in found] == [both]
+    assert client.get("/user/search/python,cobol/stream?mode=all").text == ""
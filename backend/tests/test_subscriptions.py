@@ -0,0 +1,91 @@
+import pytest
+from sqlalchemy import event
+from sqlmodel import Session
+
+import database
+from models.users import Subscription, Users
+
+
+@pytest.fixture
+def star(make_user, session):
+    """
+    A user followed by five others and following the first two of them.
+    """
+    star = make_user(name="star")
+    fans = [make_user(name=f"fan{i}") for i in range(5)]
+    session.add_all(Subscription(user_id_from=fan, user_id_to=star) for fan in fans)
+    session.add_all(Subscription(user_id_from=star, user_id_to=fan) for fan in fans[:2])
+    session.commit()
+    return star, fans
+
+
+def all_pages(client, url, limit):
+    ids, cursor = [], None
+    while True:
+        params = {"limit": limit} | ({"cursor": cursor} if cursor else {})
+        page = client.get(url, params=params).json()
+        ids += [user["id"] for user in page["items"]]
+        cursor = page["next_cursor"]
+        if cursor is None:
+            return ids
+
+
+def test_followers_pages(client, star):
+    star, fans = star
+    assert all_pages(client, f"/user/{star}/followers", limit=2) == fans
+    page = client.get(f"/user/{star}/followers", params={"limit": 5}).json()
+    assert page["next_cursor"] is None
+    assert set(page["items"][0]) == {"id", "name", "surname", "short_status"}
+
+
+def test_subscriptions_pages(client, star):
+    star, fans = star
+    assert all_pages(client, f"/user/{star}/subscriptions", limit=1) == fans[:2]
+    assert all_pages(client, f"/user/{fans[0]}/subscriptions", limit=10) == [star]
+
+
+def test_user_without_subscriptions(client, make_user):
+    user = make_user()
+    page = client.get(f"/user/{user}/followers").json()
+    assert page == {"items": [], "next_cursor": None}
+
+
+def test_subscriptions_are_not_loaded_with_the_user(star):
+    star, _ = star
+    statements = []
+
+    def count(*args):
+        statements.append(args[2])
+
+    event.listen(database.engine, "before_cursor_execute", count)
+    try:
+        with Session(database.engine) as session:
+            session.get(Users, star)
+    finally:
+        event.remove(database.engine, "before_cursor_execute", count)
+    assert len(statements) == 1
+    assert "subscription" not in statements[0]
+
+
+def test_subscribe_and_unsubscribe(client, auth_headers, make_user):
+    fan, star = make_user(), make_user()
+    headers = auth_headers(fan)
+    # both are idempotent
+    for _ in range(2):
+        response = client.post(f"/user/{star}/subscribe", headers=headers)
+        assert response.json() == "success"
+    assert all_pages(client, f"/user/{star}/followers", limit=10) == [fan]
+
+    for _ in range(2):
+        response = client.delete(f"/user/{star}/subscribe", headers=headers)
+        assert response.json() == "success"
+    assert all_pages(client, f"/user/{star}/followers", limit=10) == []
+
+
+def test_subscribe_to_yourself_or_nobody(client, auth_headers, make_user):
+    user = make_user()
+    headers = auth_headers(user)
+    response = client.post(f"/user/{user}/subscribe", headers=headers)
+    assert response.status_code == 400
+    response = client.post(f"/user/{user + 1}/subscribe", headers=headers)
+    assert response.status_code == 404
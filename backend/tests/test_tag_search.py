@@ -0,0 +1,86 @@
+import pytest
+
+from helpers.pagination import decode_cursor, encode_cursor
+
+
+@pytest.fixture
+def tagged(make_user, tag_user):
+    """
+    Users with one to three of the tags python, sql and go.
+    """
+    users = {}
+    for name, tags in [
+        ("one", ["python"]),
+        ("all", ["python", "sql", "go"]),
+        ("two", ["python", "sql"]),
+        ("also-two", ["sql", "go"]),
+        ("none", ["rust"]),
+        ("also-all", ["go", "sql", "python"]),
+    ]:
+        users[name] = make_user(name=name)
+        tag_user(users[name], *tags)
+    return users
+
+
+def names(page):
+    return [user["name"] for user in page["items"]]
+
+
+def test_ranked_by_matched_tags_then_id(client, tagged):
+    page = client.get("/user/search/python,sql,go").json()
+    assert names(page) == ["all", "also-all", "two", "also-two", "one"]
+    assert [user["matched_tags"] for user in page["items"]] == [3, 3, 2, 2, 1]
+    assert page["next_cursor"] is None
+
+
+def test_repeated_tags_are_counted_once(client, tagged):
+    page = client.get("/user/search/python,python,,sql").json()
+    assert names(page) == ["all", "two", "also-all", "one", "also-two"]
+    assert max(user["matched_tags"] for user in page["items"]) == 2
+
+
+def test_match_all(client, tagged):
+    page = client.get("/user/search/python,sql?mode=all").json()
+    assert names(page) == ["all", "two", "also-all"]
+
+
+def test_match_all_with_unknown_tag(client, tagged):
+    page = client.get("/user/search/python,cobol?mode=all").json()
+    assert page == {"items": [], "next_cursor": None}
+
+
+def test_unknown_tags(client, tagged):
+    assert client.get("/user/search/cobol").json()["items"] == []
+
+
+def test_pages_follow_each_other(client, tagged):
+    seen = []
+    cursor = None
+    while True:
+        params = {"limit": 2} | ({"cursor": cursor} if cursor else {})
+        page = client.get("/user/search/python,sql,go", params=params).json()
+        assert len(page["items"]) <= 2
+        seen += names(page)
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+    assert seen == ["all", "also-all", "two", "also-two", "one"]
+
+
+def test_invalid_cursor(client, tagged):
+    response = client.get("/user/search/python", params={"cursor": "not a cursor"})
+    assert response.status_code == 400
+    assert response.json()["detail"] == "invalid cursor"
+
+
+@pytest.mark.parametrize("tag", ["followers", "subscriptions", "workreviews", "likes"])
+def test_tags_named_like_user_routes(client, make_user, tag_user, tag):
+    user = make_user()
+    tag_user(user, tag)
+    response = client.get(f"/user/search/{tag}")
+    assert response.status_code == 200
+    assert [found["id"] for found in response.json()["items"]] == [user]
+
+
+def test_cursor_round_trip():
+    assert decode_cursor(encode_cursor(3, 42), int, int) == (3, 42)
@@ -0,0 +1,65 @@
+"""
+The full-text search needs PostgreSQL, so its query is checked as compiled
+for PostgreSQL rather than run.
+"""
+
+import asyncio
+
+from sqlalchemy.dialects import postgresql
+
+from helpers.crud import search_users_by_text
+
+
+class RecordingSession:
+    """
+    Stands in for a session and keeps the statements given to it.
+    """
+
+    def __init__(self):
+        self.statements = []
+
+    def exec(self, statement):
+        self.statements.append(statement)
+        return self
+
+    def all(self):
+        return []
+
+
+def search_sql(**kwargs) -> str:
+    session = RecordingSession()
+    asyncio.run(search_users_by_text("python -java", session=session, **kwargs))
+    (statement,) = session.statements
+    return str(statement.compile(dialect=postgresql.dialect()))
+
+
+def test_query_matches_through_search_vector():
+    sql = search_sql(limit=10)
+    assert "users.search_vector @@ websearch_to_tsquery(" in sql
+    assert "ts_rank_cd(users.search_vector, websearch_to_tsquery(" in sql
+    assert "ORDER BY anon_1.rank DESC, users.id" in sql
+
+
+def test_headlines_are_built_for_the_page_only():
+    sql = search_sql(limit=10)
+    inner, outer = sql.split("FROM users JOIN (")[1], sql.split("JOIN (")[0]
+    assert "ts_headline(" in outer
+    assert "ts_headline(" not in inner
+    assert "LIMIT" in inner
+
+
+def test_cursor_continues_after_rank_and_id():
+    assert " > " not in search_sql(limit=10).split("JOIN (")[1]
+    inner = search_sql(limit=10, after=(0.5, 42)).split("JOIN (")[1]
+    assert "ts_rank_cd(" in inner and " < " in inner and "users.id > " in inner
+
+
+def test_query_is_required(client):
+    assert client.get("/user/search/text").status_code == 422
+    assert client.get("/user/search/text", params={"q": ""}).status_code == 422
+    assert client.get("/user/search/text", params={"q": "x" * 257}).status_code == 422
+
+
+def test_invalid_cursor(client):
+    response = client.get("/user/search/text", params={"q": "python", "cursor": "x"})
+    assert response.status_code == 400
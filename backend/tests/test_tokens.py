@@ -0,0 +1,92 @@
+import uuid
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from helpers.tokens import RevocationFilter, revocation_filter
+from models.users import RevokedToken
+
+
+@pytest.fixture
+def login(client, make_user):
+    """
+    Logs a new user in and returns the issued tokens.
+    """
+    make_user(email="ivan@example.com")
+    response = client.post(
+        "/user/token",
+        json={"email": "ivan@example.com", "phone": None, "password": "password"},
+    )
+    assert response.status_code == 200
+    return response.json()
+
+
+def refresh(client, token):
+    return client.post("/user/token/refresh", json={"refresh_token": token})
+
+
+def bearer(tokens):
+    return {"Authorization": f"Bearer {tokens['access_token']}"}
+
+
+def test_refresh_rotates_token(client, login):
+    renewed = refresh(client, login["refresh_token"]).json()
+    assert renewed["refresh_token"] != login["refresh_token"]
+    assert client.get("/user/me", headers=bearer(renewed)).status_code == 200
+    assert refresh(client, renewed["refresh_token"]).status_code == 200
+
+
+def test_reused_refresh_token_revokes_family(client, login):
+    renewed = refresh(client, login["refresh_token"]).json()
+    # the first token was copied: its second use locks both holders out
+    assert refresh(client, login["refresh_token"]).status_code == 401
+    assert refresh(client, renewed["refresh_token"]).status_code == 401
+
+
+def test_unknown_refresh_token(client, login):
+    assert refresh(client, "not-a-token").status_code == 401
+
+
+def test_logout_revokes_tokens(client, login):
+    response = client.post(
+        "/user/logout",
+        json={"refresh_token": login["refresh_token"]},
+        headers=bearer(login),
+    )
+    assert response.json() == "success"
+    assert client.get("/user/me", headers=bearer(login)).status_code == 401
+    assert refresh(client, login["refresh_token"]).status_code == 401
+
+
+def test_filter_has_no_false_negatives():
+    bloom = RevocationFilter(1_000, 0.01, interval=60, rebuild_interval=3_600)
+    revoked = [uuid.uuid4().hex for _ in range(1_000)]
+    for jti in revoked:
+        bloom.add(jti)
+    assert all(bloom.might_contain(jti) for jti in revoked)
+    # at capacity, unknown ids match at about the error rate
+    false_positives = sum(bloom.might_contain(uuid.uuid4().hex) for _ in range(10_000))
+    assert false_positives < 10_000 * 0.01 * 2
+
+
+def test_sync_picks_up_other_workers_revocations(client, session):
+    jti = uuid.uuid4().hex
+    session.add(
+        RevokedToken(
+            jti=jti, expires_at=datetime.now(timezone.utc) + timedelta(minutes=30)
+        )
+    )
+    session.commit()
+    assert not revocation_filter.might_contain(jti)
+    client.portal.call(revocation_filter.sync)
+    assert revocation_filter.might_contain(jti)
+
+
+def test_load_drops_expired_revocations(client, session):
+    now = datetime.now(timezone.utc)
+    session.add(RevokedToken(jti="expired", expires_at=now - timedelta(minutes=1)))
+    session.add(RevokedToken(jti="live", expires_at=now + timedelta(minutes=30)))
+    session.commit()
+    client.portal.call(revocation_filter.load)
+    assert revocation_filter.might_contain("live")
+    assert session.get(RevokedToken, "expired") is None
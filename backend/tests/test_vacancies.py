@@ -0,0 +1,86 @@
+import pytest
+
+PRICES = [300, 100, 200, 100, 500, 200, 0]
+
+
+@pytest.fixture
+def holders(client, auth_headers, make_user):
+    """
+    Two users publishing the vacancies priced ``PRICES`` in turn.
+    """
+    holders = [make_user(), make_user()]
+    for i, price in enumerate(PRICES):
+        response = client.post(
+            "/vacancy",
+            json={
+                "title": f"vacancy {i}",
+                "description": "description",
+                "price": price,
+                "conditions": "remote",
+            },
+            headers=auth_headers(holders[i % 2]),
+        )
+        assert response.status_code == 201
+        assert response.json()["vacancy_holder_id"] == holders[i % 2]
+    return holders
+
+
+def feed(client, **params):
+    """
+    Walks every page of the feed and returns the vacancies.
+    """
+    vacancies, cursor = [], None
+    while True:
+        page = client.get(
+            "/vacancy", params={**params, **({"cursor": cursor} if cursor else {})}
+        ).json()
+        assert len(page["items"]) <= params.get("limit", 20)
+        vacancies += page["items"]
+        cursor = page["next_cursor"]
+        if cursor is None:
+            return vacancies
+
+
+def test_newest_first(client, holders):
+    vacancies = feed(client, limit=3)
+    ids = [vacancy["id"] for vacancy in vacancies]
+    assert len(ids) == len(PRICES)
+    assert ids == sorted(ids, reverse=True)
+
+
+@pytest.mark.parametrize("limit", [1, 2, 3, 100])
+def test_price_orders_page_without_gaps_or_repeats(client, holders, limit):
+    ascending = feed(client, order="price_asc", limit=limit)
+    assert [(v["price"], v["id"]) for v in ascending] == sorted(
+        (v["price"], v["id"]) for v in ascending
+    )
+    assert sorted(v["price"] for v in ascending) == sorted(PRICES)
+
+    descending = feed(client, order="price_desc", limit=limit)
+    assert descending == ascending[::-1]
+
+
+def test_filters(client, holders):
+    priced = feed(client, min_price=100, max_price=200, limit=2)
+    assert sorted(v["price"] for v in priced) == [100, 100, 200, 200]
+
+    held = feed(client, holder_id=holders[1], order="price_asc", limit=1)
+    assert [v["price"] for v in held] == [100, 100, 200]
+    assert {v["vacancy_holder_id"] for v in held} == {holders[1]}
+
+
+def test_get_vacancy(client, holders):
+    vacancy = feed(client)[0]
+    assert client.get(f"/vacancy/{vacancy['id']}").json() == vacancy
+    assert client.get("/vacancy/999").status_code == 404
+
+
+def test_invalid_input(client, auth_headers, make_user):
+    assert client.get("/vacancy", params={"cursor": "???"}).status_code == 400
+    assert client.get("/vacancy", params={"min_price": -1}).status_code == 422
+    response = client.post(
+        "/vacancy",
+        json={"title": "", "description": "", "price": 1, "conditions": ""},
+        headers=auth_headers(make_user()),
+    )
+    assert response.status_code == 422
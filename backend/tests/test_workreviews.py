@@ -0,0 +1,92 @@
+from datetime import date
+
+import pytest
+
+from routes.user import WORKREVIEW_BATCH_MAX
+
+STARTS = ["2021-03-01", "2019-09-01", "2021-03-01", "2023-01-15", "2020-06-01"]
+
+
+def review(date_start, post="developer"):
+    return {
+        "post": post,
+        "date_start": date_start,
+        "date_end": None,
+        "company_name": "ACME",
+        "subcompany_name": None,
+    }
+
+
+@pytest.fixture
+def timeline(client, auth_headers, make_user):
+    user = make_user()
+    response = client.post(
+        "/user/workreviews",
+        json=[review(start, post=f"post{i}") for i, start in enumerate(STARTS)],
+        headers=auth_headers(user),
+    )
+    assert response.status_code == 201
+    return user, response.json()
+
+
+def test_batch_is_returned_in_timeline_order(timeline):
+    _, created = timeline
+    assert [r["date_start"] for r in created] == sorted(STARTS)
+    # equal start dates are ordered by id, i.e. by their order in the request
+    assert [r["post"] for r in created if r["date_start"] == "2021-03-01"] == [
+        "post0",
+        "post2",
+    ]
+
+
+def test_pages_follow_each_other(client, timeline):
+    user, created = timeline
+    seen, cursor = [], None
+    while True:
+        params = {"limit": 2} | ({"cursor": cursor} if cursor else {})
+        page = client.get(f"/user/{user}/workreviews", params=params).json()
+        seen += page["items"]
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+    assert seen == created
+
+
+def test_date_range(client, timeline):
+    user, _ = timeline
+    page = client.get(
+        f"/user/{user}/workreviews",
+        params={"date_from": "2020-01-01", "date_to": "2021-12-31"},
+    ).json()
+    assert [r["date_start"] for r in page["items"]] == [
+        "2020-06-01",
+        "2021-03-01",
+        "2021-03-01",
+    ]
+
+
+def test_missing_start_date_is_today(client, auth_headers, make_user):
+    response = client.post(
+        "/user/workreviews", json=[review(None)], headers=auth_headers(make_user())
+    )
+    assert response.json()[0]["date_start"] == date.today().isoformat()
+
+
+@pytest.mark.parametrize("count", [0, WORKREVIEW_BATCH_MAX + 1])
+def test_batch_size_limits(client, auth_headers, make_user, count):
+    response = client.post(
+        "/user/workreviews",
+        json=[review("2020-01-01")] * count,
+        headers=auth_headers(make_user()),
+    )
+    assert response.status_code == 400
+
+
+def test_single_review(client, auth_headers, make_user):
+    user = make_user()
+    response = client.post(
+        "/user/workreview", json=review("2020-01-01"), headers=auth_headers(user)
+    )
+    assert response.json() == "success"
+    items = client.get(f"/user/{user}/workreviews").json()["items"]
+    assert [r["date_start"] for r in items] == ["2020-01-01"]
@@ -0,0 +1,380 @@
+"""
+Offline bulk loader for users, tags, user tags and work reviews.
+
+Rows are streamed from CSV or JSONL files and validated in Python. Passwords are
+hashed across a process pool, and each batch is loaded into a temporary
+staging table with PostgreSQL ``COPY``. Once the whole file is staged, a few
+set-based statements merge it into the real tables. Rows that cannot be merged
+(for example an email or phone that already exists, or that was registered
+while the load ran) are reported instead of failing the load. The whole load
+runs in one transaction.
+
+Usage (from the backend directory):
+    python -m tools.bulk_import users cohort.csv --workers 8 --rejects rejects.csv
+    python -m tools.bulk_import tags tags.jsonl
+    python -m tools.bulk_import tagsusers user_tags.csv
+    python -m tools.bulk_import workreviews reviews.jsonl
+
+Input columns:
+    users: name, surname, last_name, phone, email, university, birthdate, course,
+        short_status, full_status, about_me, links and either password or
+        hashed_password (already hashed rows skip bcrypt entirely)
+    tags: name
+    tagsusers: email or phone of the user, tag
+    workreviews: email or phone of the user, post, date_start, date_end,
+        company_name, subcompany_name
+"""
+
+import io
+import os
+import csv
+import sys
+import json
+import time
+import logging
+import argparse
+from datetime import date
+from itertools import islice
+from dataclasses import dataclass
+from concurrent.futures import ProcessPoolExecutor
+
+from database import engine
+from helpers.hashing import pwd_context
+
+logging.basicConfig(
+    format="%(levelname)s:%(asctime)s:%(message)s", datefmt="%d/%m/%Y %I:%M:%S %p"
+)
+logger = logging.getLogger("bulk_import")
+logger.setLevel("INFO")
+
+
+@dataclass
+class Kind:
+    """
+    Describes how one kind of record is validated, staged and merged.
+    """
+
+    staging_ddl: str
+    columns: tuple[str, ...]
+    required: tuple[str, ...]
+    dates: tuple[str, ...]
+    merge: tuple[str, ...]
+    # counts the inserted rows when the last merge statement is not the insert
+    count_inserted: str | None = None
+    by_user: bool = False
+    hashes_passwords: bool = False
+
+
+USER_COLUMNS = (
+    "name",
+    "surname",
+    "last_name",
+    "phone",
+    "email",
+    "university",
+    "birthdate",
+    "course",
+    "short_status",
+    "full_status",
+    "about_me",
+    "links",
+    "hashed_password",
+)
+
+# rows resolve their user by email, falling back to phone
+RESOLVE_USER = """
+    UPDATE staging s SET user_id = u.id FROM users u
+    WHERE s.email IS NOT NULL AND u.email = s.email;
+    UPDATE staging s SET user_id = u.id FROM users u
+    WHERE s.user_id IS NULL AND s.phone IS NOT NULL AND u.phone = s.phone;
+    UPDATE staging SET reject = 'unknown user' WHERE user_id IS NULL;
+"""
+
+KINDS = {
+    "users": Kind(
+        staging_ddl="""
+            CREATE TEMP TABLE staging (
+                line integer PRIMARY KEY,
+                name text, surname text, last_name text, phone text, email text,
+                university text, birthdate date, course text, short_status text,
+                full_status text, about_me text, links text, hashed_password text,
+                reject text
+            ) ON COMMIT DROP
+        """,
+        columns=("line",) + USER_COLUMNS,
+        required=("name", "surname"),
+        dates=("birthdate",),
+        merge=(
+            "CREATE INDEX ON staging (email, line)",
+            "CREATE INDEX ON staging (phone, line)",
+            "ANALYZE staging",
+            """
+            UPDATE staging s SET reject = 'duplicate in input' WHERE EXISTS (
+                SELECT 1 FROM staging e WHERE e.email = s.email AND e.line < s.line
+            ) OR EXISTS (
+                SELECT 1 FROM staging e WHERE e.phone = s.phone AND e.line < s.line
+            )
+            """,
+            """
+            UPDATE staging s SET reject = 'email exists' FROM users u
+            WHERE s.reject IS NULL AND u.email = s.email
+            """,
+            """
+            UPDATE staging s SET reject = 'phone exists' FROM users u
+            WHERE s.reject IS NULL AND u.phone = s.phone
+            """,
+            # users registering while the load runs passed the checks above;
+            # the unique indexes skip them, and rows the insert did not
+            # return are rejected (email and phone are unique in staging)
+            f"""
+            WITH inserted AS (
+                INSERT INTO users ({", ".join(USER_COLUMNS)})
+                SELECT {", ".join(USER_COLUMNS)} FROM staging
+                WHERE reject IS NULL ORDER BY line
+                ON CONFLICT DO NOTHING
+                RETURNING coalesce(email, '') AS email, coalesce(phone, '') AS phone
+            )
+            UPDATE staging s SET reject = 'email/phone exists'
+            WHERE s.reject IS NULL AND NOT EXISTS (
+                SELECT 1 FROM inserted i
+                WHERE i.email = coalesce(s.email, '')
+                    AND i.phone = coalesce(s.phone, '')
+            )
+            """,
+        ),
+        count_inserted="SELECT count(*) FROM staging WHERE reject IS NULL",
+        hashes_passwords=True,
+    ),
+    "tags": Kind(
+        staging_ddl="""
+            CREATE TEMP TABLE staging (
+                line integer PRIMARY KEY, name text, reject text
+            ) ON COMMIT DROP
+        """,
+        columns=("line", "name"),
+        required=("name",),
+        dates=(),
+        merge=(
+            """
+            UPDATE staging s SET reject = 'duplicate in input' WHERE EXISTS (
+                SELECT 1 FROM staging e WHERE e.name = s.name AND e.line < s.line
+            )
+            """,
+            """
+            UPDATE staging s SET reject = 'tag exists' FROM tags t
+            WHERE s.reject IS NULL AND t.name = s.name
+            """,
+            """
+            INSERT INTO tags (name) SELECT name FROM staging
+            WHERE reject IS NULL ORDER BY line
+            ON CONFLICT (name) DO NOTHING
+            """,
+        ),
+    ),
+    "tagsusers": Kind(
+        staging_ddl="""
+            CREATE TEMP TABLE staging (
+                line integer PRIMARY KEY, email text, phone text, tag text,
+                user_id integer, tag_id integer, reject text
+            ) ON COMMIT DROP
+        """,
+        columns=("line", "email", "phone", "tag"),
+        required=("tag",),
+        dates=(),
+        merge=(
+            RESOLVE_USER,
+            """
+            UPDATE staging s SET tag_id = t.id FROM tags t WHERE t.name = s.tag;
+            UPDATE staging SET reject = 'unknown tag'
+            WHERE reject IS NULL AND tag_id IS NULL
+            """,
+            """
+            INSERT INTO tagsusers (user_id, tag_id)
+            SELECT DISTINCT user_id, tag_id FROM staging WHERE reject IS NULL
+            ON CONFLICT (user_id, tag_id) DO NOTHING
+            """,
+        ),
+        by_user=True,
+    ),
+    "workreviews": Kind(
+        staging_ddl="""
+            CREATE TEMP TABLE staging (
+                line integer PRIMARY KEY, email text, phone text, post text,
+                date_start date, date_end date, company_name text,
+                subcompany_name text, user_id integer, reject text
+            ) ON COMMIT DROP
+        """,
+        columns=(
+            "line",
+            "email",
+            "phone",
+            "post",
+            "date_start",
+            "date_end",
+            "company_name",
+            "subcompany_name",
+        ),
+        required=("post", "date_start", "company_name"),
+        dates=("date_start", "date_end"),
+        merge=(
+            RESOLVE_USER,
+            """
+            INSERT INTO workreviews
+                (post, date_start, date_end, company_name, subcompany_name, user_id)
+            SELECT post, date_start, date_end, company_name, subcompany_name, user_id
+            FROM staging WHERE reject IS NULL ORDER BY line
+            """,
+        ),
+        by_user=True,
+    ),
+}
+
+
+def _hash_password(password: str) -> str:
+    return pwd_context.hash(password)
+
+
+def read_rows(path: str):
+    """
+    Streams records from a CSV (with a header row) or JSONL file.
+
+    Yields:
+        tuple[int, dict]: The 1-based record number and the record.
+    """
+    with open(path, newline="", encoding="utf-8") as f:
+        if path.endswith((".jsonl", ".ndjson")):
+            records = (json.loads(line) for line in f if line.strip())
+        else:
+            records = csv.DictReader(f)
+        yield from enumerate(records, start=1)
+
+
+def validate(kind: Kind, line: int, record: dict) -> dict:
+    """
+    Normalizes a record; empty strings become NULL.
+
+    Raises:
+        ValueError: With the rejection reason if the record is unusable.
+    """
+    row = {
+        column: (str(record[column]).strip() or None) if record.get(column) else None
+        for column in kind.columns[1:]
+    }
+    row["line"] = line
+    missing = [column for column in kind.required if not row.get(column)]
+    if missing:
+        raise ValueError(f"missing {', '.join(missing)}")
+    if kind.by_user and not (row["email"] or row["phone"]):
+        raise ValueError("missing email or phone")
+    for column in kind.dates:
+        if row[column]:
+            date.fromisoformat(row[column])
+    if kind.hashes_passwords and not row["hashed_password"]:
+        row["password"] = record.get("password") or None
+        if not row["password"]:
+            raise ValueError("missing password")
+    return row
+
+
+def copy_batch(cursor, kind: Kind, rows: list[dict]) -> None:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for row in rows:
+        writer.writerow(row[column] for column in kind.columns)
+    buffer.seek(0)
+    cursor.copy_expert(
+        f"COPY staging ({', '.join(kind.columns)}) FROM STDIN WITH (FORMAT csv)",
+        buffer,
+    )
+
+
+def run(kind_name: str, path: str, batch_size: int, workers: int, rejects_path):
+    if engine.dialect.name != "postgresql":
+        sys.exit("bulk import requires PostgreSQL")
+
+    kind = KINDS[kind_name]
+    rejects: list[tuple[int, str]] = []
+    read = staged = 0
+    started = time.perf_counter()
+
+    connection = engine.raw_connection()
+    executor = ProcessPoolExecutor(max_workers=workers)
+    try:
+        cursor = connection.cursor()
+        cursor.execute(kind.staging_ddl)
+
+        records = read_rows(path)
+        while batch := list(islice(records, batch_size)):
+            read += len(batch)
+            rows = []
+            for line, record in batch:
+                try:
+                    rows.append(validate(kind, line, record))
+                except ValueError as e:
+                    rejects.append((line, str(e)))
+
+            to_hash = [row for row in rows if row.get("password")]
+            hashes = executor.map(
+                _hash_password,
+                [row.pop("password") for row in to_hash],
+                chunksize=max(1, len(to_hash) // (workers * 4)),
+            )
+            for row, hashed_password in zip(to_hash, hashes):
+                row["hashed_password"] = hashed_password
+
+            copy_batch(cursor, kind, rows)
+            staged += len(rows)
+            elapsed = time.perf_counter() - started
+            logger.info(f"staged {staged} rows ({staged / elapsed:.0f} rows/s)")
+
+        staged_at = time.perf_counter()
+        for statement in kind.merge:
+            cursor.execute(statement)
+        inserted = cursor.rowcount
+        if kind.count_inserted:
+            cursor.execute(kind.count_inserted)
+            inserted = cursor.fetchone()[0]
+        cursor.execute("SELECT line, reject FROM staging WHERE reject IS NOT NULL")
+        rejects.extend(cursor.fetchall())
+        connection.commit()
+    except BaseException:
+        connection.rollback()
+        raise
+    finally:
+        executor.shutdown(cancel_futures=True)
+        connection.close()
+
+    total = time.perf_counter() - started
+    logger.info(
+        f"{kind_name}: {inserted} inserted, {len(rejects)} rejected "
+        f"in {total:.1f}s (merge {time.perf_counter() - staged_at:.1f}s, "
+        f"{read / total:.0f} rows/s overall)"
+    )
+    if rejects_path:
+        with open(rejects_path, "w", newline="", encoding="utf-8") as f:
+            writer = csv.writer(f)
+            writer.writerow(("line", "reason"))
+            writer.writerows(sorted(rejects))
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("kind", choices=KINDS)
+    parser.add_argument("path", help="CSV or JSONL (.jsonl/.ndjson) input file")
+    parser.add_argument("--batch-size", type=int, default=10_000)
+    parser.add_argument(
+        "--workers", type=int, default=None, help="hashing processes (default: CPUs)"
+    )
+    parser.add_argument("--rejects", help="write rejected line numbers here (CSV)")
+    args = parser.parse_args(argv)
+    run(
+        args.kind,
+        args.path,
+        args.batch_size,
+        args.workers or os.cpu_count() or 1,
+        args.rejects,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""
+Batch rebuild of the "people you may know" candidates.
+
+Candidates are kept current by the subscribe/unsubscribe endpoints (see
+``helpers.recommendations``). This job recomputes them from the subscription
+graph for every user, so that tag changes, a new RECOMMENDATION_TAG_WEIGHT or
+any drift are reflected. Users are processed in id ranges, each replaced in
+its own transaction, so readers only ever see whole ranges. Run it at a quiet
+time: a subscription changing while its range is rebuilt can be counted twice
+until the next run.
+
+Usage (from the backend directory):
+    python -m tools.rebuild_recommendations --batch-size 5000
+"""
+
+import time
+import logging
+import argparse
+
+from sqlalchemy import text
+
+from database import engine
+from helpers.recommendations import RECOMMENDATION_TAG_WEIGHT
+
+logging.basicConfig(
+    format="%(levelname)s:%(asctime)s:%(message)s", datefmt="%d/%m/%Y %I:%M:%S %p"
+)
+logger = logging.getLogger("rebuild_recommendations")
+logger.setLevel("INFO")
+
+CLEAR_RANGE = text("DELETE FROM recommendation WHERE user_id BETWEEN :first AND :last")
+
+# must match the scoring in helpers.recommendations
+FILL_RANGE = text("""
+    INSERT INTO recommendation (user_id, candidate_id, mutuals, shared_tags, score)
+    SELECT user_id, candidate_id, mutuals, shared_tags,
+        mutuals + :tag_weight * shared_tags
+    FROM (
+        SELECT p.user_id, p.candidate_id, p.mutuals, (
+            SELECT count(*) FROM tagsusers mine
+            JOIN tagsusers theirs ON theirs.tag_id = mine.tag_id
+            WHERE mine.user_id = p.user_id AND theirs.user_id = p.candidate_id
+        ) AS shared_tags
+        FROM (
+            SELECT a.user_id_from AS user_id, b.user_id_to AS candidate_id,
+                count(*) AS mutuals
+            FROM subscription a
+            JOIN subscription b ON b.user_id_from = a.user_id_to
+            WHERE a.user_id_from BETWEEN :first AND :last
+                AND b.user_id_to <> a.user_id_from
+                AND NOT EXISTS (
+                    SELECT 1 FROM subscription f
+                    WHERE f.user_id_from = a.user_id_from
+                        AND f.user_id_to = b.user_id_to
+                )
+            GROUP BY a.user_id_from, b.user_id_to
+        ) p
+    ) s
+    """)
+
+
+def run(batch_size: int) -> None:
+    started = time.perf_counter()
+    with engine.connect() as connection:
+        low, high = connection.execute(
+            text("SELECT min(user_id_from), max(user_id_from) FROM subscription")
+        ).one()
+    if low is None:
+        logger.info("no subscriptions, nothing to do")
+        return
+
+    candidates = 0
+    for first in range(low, high + 1, batch_size):
+        last = first + batch_size - 1
+        with engine.begin() as connection:
+            connection.execute(CLEAR_RANGE, {"first": first, "last": last})
+            inserted = connection.execute(
+                FILL_RANGE,
+                {"first": first, "last": last, "tag_weight": RECOMMENDATION_TAG_WEIGHT},
+            ).rowcount
+        candidates += inserted
+        logger.info(f"users {first}-{last}: {inserted} candidates")
+
+    # users who stopped following anyone have no range to clear them
+    with engine.begin() as connection:
+        connection.execute(
+            text("DELETE FROM recommendation WHERE user_id < :low OR user_id > :high"),
+            {"low": low, "high": high},
+        )
+    logger.info(
+        f"{candidates} candidates rebuilt in {time.perf_counter() - started:.1f}s"
+    )
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument(
+        "--batch-size", type=int, default=5_000, help="users per transaction"
+    )
+    args = parser.parse_args(argv)
+    run(args.batch_size)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+"""
+Rebuilds the like counters from the likes themselves.
+
+Like counters are written behind by each app process (see ``helpers.likes``),
+so a crash can lose the last second of changes. This job recomputes every
+counter with one set-based statement. Changes still pending in a running
+process are added on top when it flushes and would be counted twice, so run
+it while the app is stopped.
+
+Usage (from the backend directory):
+    python -m tools.recount_likes
+"""
+
+import time
+import logging
+
+from sqlalchemy import text
+
+from database import engine
+
+logging.basicConfig(
+    format="%(levelname)s:%(asctime)s:%(message)s", datefmt="%d/%m/%Y %I:%M:%S %p"
+)
+logger = logging.getLogger("recount_likes")
+logger.setLevel("INFO")
+
+RECOUNT = text("""
+    INSERT INTO likecounter (user_id, likes)
+    SELECT u.id, coalesce(l.likes, 0)
+    FROM users u
+    LEFT JOIN (
+        SELECT liked_user_id, count(*) AS likes FROM likes GROUP BY liked_user_id
+    ) l ON l.liked_user_id = u.id
+    WHERE l.likes IS NOT NULL
+        OR EXISTS (SELECT 1 FROM likecounter c WHERE c.user_id = u.id)
+    ON CONFLICT (user_id) DO UPDATE SET likes = excluded.likes
+    """)
+
+
+def main() -> None:
+    started = time.perf_counter()
+    with engine.begin() as connection:
+        updated = connection.execute(RECOUNT).rowcount
+    logger.info(
+        f"{updated} like counters recounted in {time.perf_counter() - started:.1f}s"
+    )
+
+
+if __name__ == "__main__":
+    main()